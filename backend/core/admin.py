@@ -1,7 +1,11 @@
 from django.contrib import admin
-from core.models import User, Resource, TimeSlot, Reservation
+from core.models import User, Resource, TimeSlot, Reservation, ScheduleTemplate, ScheduleException, ExportJob, DailyResourceStats
 
 admin.site.register(User)
 admin.site.register(Resource)
 admin.site.register(TimeSlot)
-admin.site.register(Reservation)
\ No newline at end of file
+admin.site.register(Reservation)
+admin.site.register(ScheduleTemplate)
+admin.site.register(ScheduleException)
+admin.site.register(ExportJob)
+admin.site.register(DailyResourceStats)
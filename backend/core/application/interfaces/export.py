@@ -3,7 +3,7 @@ Export interfaces following SOLID principles.
 Defines contracts for schedule export implementations (printing, calendar, etc.).
 """
 from abc import ABC, abstractmethod
-from typing import Optional, List
+from typing import Iterator, Optional, List
 from datetime import datetime
 
 
@@ -13,6 +13,10 @@ class ScheduleExportInterface(ABC):
     def export(self, user_id: int, start_date: datetime, end_date: datetime) -> bytes:
         pass
 
+    def stream(self, user_id: int, start_date: datetime, end_date: datetime, **options) -> Iterator[bytes]:
+        # Exporters that can produce their output incrementally override this
+        return iter([self.export(user_id, start_date, end_date)])
+
     @abstractmethod
     def get_content_type(self) -> str:
         pass
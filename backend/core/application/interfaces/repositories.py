@@ -1,10 +1,13 @@
 from abc import ABC, abstractmethod
-from typing import List, Optional
-from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Sequence, Set, Tuple
+from datetime import date, datetime
 from core.domain.entities.user import UserEntity
 from core.domain.entities.resource import ResourceEntity
 from core.domain.entities.timeslot import TimeSlotEntity
 from core.domain.entities.reservation import ReservationEntity
+from core.domain.entities.schedule import ScheduleTemplateEntity, ScheduleExceptionEntity
+from core.domain.entities.export_job import ExportJobEntity
+from core.domain.entities.daily_stats import DailyResourceStatsEntity
 
 
 class UserRepositoryInterface(ABC):
@@ -17,6 +20,16 @@ class UserRepositoryInterface(ABC):
     def get_by_id(self, user_id: int) -> Optional[UserEntity]:
         pass
 
+    @abstractmethod
+    def remember(self, user) -> UserEntity:
+        # Register an already loaded user model for the rest of the request
+        pass
+
+    @abstractmethod
+    def lock_for_booking(self, user_id: int) -> Optional[UserEntity]:
+        # Row lock held until commit; serializes one user's concurrent bookings
+        pass
+
     @abstractmethod
     def get_by_email(self, email: str) -> Optional[UserEntity]:
         pass
@@ -25,6 +38,11 @@ class UserRepositoryInterface(ABC):
     def list_all(self) -> List[UserEntity]:
         pass
 
+    @abstractmethod
+    def existing_ids(self, user_ids: List[int]) -> Set[int]:
+        # The subset of user_ids that exist, in one query
+        pass
+
     @abstractmethod
     def update(self, entity: UserEntity) -> UserEntity:
         pass
@@ -48,6 +66,11 @@ class ResourceRepositoryInterface(ABC):
     def list_all(self, type_filter: Optional[str] = None, owner_id: Optional[int] = None) -> List[ResourceEntity]:
         pass
 
+    @abstractmethod
+    def catalog_version(self) -> int:
+        # Changes whenever any resource is created, updated or deleted
+        pass
+
     @abstractmethod
     def update(self, entity: ResourceEntity) -> ResourceEntity:
         pass
@@ -63,18 +86,92 @@ class TimeSlotRepositoryInterface(ABC):
     def create(self, entity: TimeSlotEntity) -> TimeSlotEntity:
         pass
 
+    @abstractmethod
+    def bulk_create(self, entities: List[TimeSlotEntity], batch_size: int = 1000) -> Tuple[int, int]:
+        # Returns (created, skipped); slots that already exist are skipped
+        pass
+
     @abstractmethod
     def get_by_id(self, slot_id: int) -> Optional[TimeSlotEntity]:
         pass
 
+    @abstractmethod
+    def get_by_start(self, resource_id: int, start_time: datetime) -> Optional[TimeSlotEntity]:
+        pass
+
     @abstractmethod
     def list_by_resource(self, resource_id: int, start_date: Optional[datetime] = None, end_date: Optional[datetime] = None) -> List[TimeSlotEntity]:
         pass
 
+    @abstractmethod
+    def list_by_resource_page(self, resource_id: int, after: Optional[Tuple[datetime, int]] = None, limit: int = 100) -> List[TimeSlotEntity]:
+        # Keyset page ordered by (start_time, id); after is the last (start_time, id) already returned
+        pass
+
+    @abstractmethod
+    def list_by_resource_page_rows(self, resource_id: int, after: Optional[Tuple[datetime, int]] = None, limit: int = 100) -> List[dict]:
+        # Read-only projection of list_by_resource_page: plain dicts, no entity construction
+        pass
+
     @abstractmethod
     def list_by_date(self, date: datetime) -> List[TimeSlotEntity]:
         pass
 
+    @abstractmethod
+    def list_by_date_range(self, resource_ids: Optional[List[int]], start_date: date, end_date: date) -> List[TimeSlotEntity]:
+        # Slots starting on local days start_date..end_date inclusive; resource_ids=None means all resources
+        pass
+
+    @abstractmethod
+    def list_by_date_range_rows(self, resource_ids: Optional[List[int]], start_date: date, end_date: date) -> List[dict]:
+        pass
+
+    @abstractmethod
+    def list_utilization_rows(self, resource_ids: Optional[List[int]], start_date: date, end_date: date,
+                              chunk_size: int = 20000) -> Iterator[Tuple[int, int, int]]:
+        # (resource_id, start epoch seconds, active_count) per slot on local days start_date..end_date
+        pass
+
+    @abstractmethod
+    def find_bookable(self, resource_ids: Optional[List[int]], start_time: datetime, end_time: datetime,
+                      min_duration_minutes: int = 0, limit: int = 10) -> List[TimeSlotEntity]:
+        # Earliest open slots with free seats starting in [start_time, end_time); resource_ids=None means all
+        pass
+
+    @abstractmethod
+    def fingerprint(self, resource_ids: Optional[List[int]], start_date: Optional[date] = None,
+                    end_date: Optional[date] = None) -> str:
+        # Changes whenever a slot in the selection is added, removed or written; for ETags
+        pass
+
+    @abstractmethod
+    def reserve_seat(self, slot_id: int, resource_id: int, user_id: Optional[int] = None) -> bool:
+        # Atomically takes one seat if the slot is open, in the future and below capacity,
+        # and (given user_id) the user holds no active reservation overlapping it
+        pass
+
+    @abstractmethod
+    def lock_for_booking(self, slot_ids: List[int]) -> List[TimeSlotEntity]:
+        # Loads and row-locks the slots (in id order) until the surrounding transaction ends
+        pass
+
+    @abstractmethod
+    def reserve_seats(self, slot_ids: List[int]) -> int:
+        pass
+
+    @abstractmethod
+    def release_seat(self, slot_id: int) -> None:
+        pass
+
+    @abstractmethod
+    def release_seats(self, released: Dict[int, int]) -> int:
+        # released maps slot id -> seats to give back; full slots closed by booking re-open
+        pass
+
+    @abstractmethod
+    def close_range(self, resource_id: int, start_date: date, end_date: date) -> int:
+        pass
+
     @abstractmethod
     def update(self, entity: TimeSlotEntity) -> TimeSlotEntity:
         pass
@@ -90,6 +187,10 @@ class ReservationRepositoryInterface(ABC):
     def create(self, entity: ReservationEntity) -> ReservationEntity:
         pass
 
+    @abstractmethod
+    def bulk_create(self, entities: List[ReservationEntity]) -> List[ReservationEntity]:
+        pass
+
     @abstractmethod
     def get_by_id(self, reservation_id: int) -> Optional[ReservationEntity]:
         pass
@@ -98,10 +199,43 @@ class ReservationRepositoryInterface(ABC):
     def list_by_user(self, user_id: int, status: Optional[str] = None) -> List[ReservationEntity]:
         pass
 
+    @abstractmethod
+    def list_by_user_page(self, user_id: int, status: Optional[str] = None, after: Optional[Tuple[datetime, int]] = None, limit: int = 100) -> List[ReservationEntity]:
+        # Keyset page ordered newest first by (created_at, id); after is the last (created_at, id) already returned
+        pass
+
+    @abstractmethod
+    def list_by_user_page_rows(self, user_id: int, status: Optional[str] = None, after: Optional[Tuple[datetime, int]] = None, limit: int = 100) -> List[dict]:
+        # Read-only projection of list_by_user_page: plain dicts, no entity construction
+        pass
+
     @abstractmethod
     def list_all(self, status: Optional[str] = None) -> List[ReservationEntity]:
         pass
 
+    @abstractmethod
+    def list_all_page(self, status: Optional[str] = None, after: Optional[Tuple[datetime, int]] = None, limit: int = 100) -> List[ReservationEntity]:
+        pass
+
+    @abstractmethod
+    def list_all_page_rows(self, status: Optional[str] = None, after: Optional[Tuple[datetime, int]] = None, limit: int = 100) -> List[dict]:
+        pass
+
+    @abstractmethod
+    def iter_by_user(self, user_id: int, status: Optional[str] = None, chunk_size: int = 2000) -> Iterator[ReservationEntity]:
+        # Streams rows from a database cursor, newest first, without building a list
+        pass
+
+    @abstractmethod
+    def iter_all(self, status: Optional[str] = None, chunk_size: int = 2000) -> Iterator[ReservationEntity]:
+        pass
+
+    @abstractmethod
+    def iter_analytics_rows(self, start_date: Optional[date] = None, end_date: Optional[date] = None,
+                            status: Optional[str] = None, chunk_size: int = 5000) -> Iterator[tuple]:
+        # Tuples in ANALYTICS_FIELDS order: reservation joined with its slot and resource, by id
+        pass
+
     @abstractmethod
     def list_by_timeslot(self, timeslot_id: int, status: str = 'ACTIVE') -> List[ReservationEntity]:
         pass
@@ -110,10 +244,144 @@ class ReservationRepositoryInterface(ABC):
     def count_by_timeslot(self, timeslot_id: int, status: str = 'ACTIVE') -> int:
         pass
 
+    @abstractmethod
+    def count_summary(self, user_id: Optional[int], created_since: datetime) -> dict:
+        # {'total', 'active', 'cancelled', 'created_since'} for the user (all users if None), one query
+        pass
+
+    @abstractmethod
+    def fingerprint(self, user_id: Optional[int] = None, start_date: Optional[datetime] = None,
+                    end_date: Optional[datetime] = None) -> str:
+        # Changes whenever one of the user's reservations (all users if None) is added, removed or written
+        pass
+
+    @abstractmethod
+    def find_overlapping(self, user_id: int, start_time: datetime, end_time: datetime) -> List[ReservationEntity]:
+        # The user's ACTIVE reservations whose slot intersects [start_time, end_time)
+        pass
+
+    @abstractmethod
+    def list_overlapping_intervals(self, user_id: int, start_time: datetime, end_time: datetime) -> List[Tuple[int, datetime, datetime]]:
+        # Same selection as find_overlapping, as (reservation_id, start_time, end_time)
+        pass
+
+    @abstractmethod
+    def list_active_intervals(self, start_date: datetime, end_date: datetime) -> List[Tuple[int, int, datetime, datetime]]:
+        pass
+
+    @abstractmethod
+    def list_user_ids_in_range(self, start_date: date, end_date: date) -> List[int]:
+        # Members holding at least one active reservation on local days start_date..end_date
+        pass
+
+    @abstractmethod
+    def lock_active_in_range(self, start_date: date, end_date: date, user_id: Optional[int] = None,
+                             resource_id: Optional[int] = None) -> List[Tuple[int, int, int, datetime]]:
+        pass
+
+    @abstractmethod
+    def mark_cancelled_many(self, reservation_ids: List[int]) -> int:
+        pass
+
+    @abstractmethod
+    def mark_cancelled(self, reservation_id: int) -> bool:
+        # Returns False if the reservation was not ACTIVE any more
+        pass
+
     @abstractmethod
     def update(self, entity: ReservationEntity) -> ReservationEntity:
         pass
 
     @abstractmethod
     def delete(self, reservation_id: int) -> bool:
-        pass
\ No newline at end of file
+        pass
+
+
+class ScheduleRepositoryInterface(ABC):
+
+    @abstractmethod
+    def get_template(self, resource_id: int) -> Optional[ScheduleTemplateEntity]:
+        pass
+
+    @abstractmethod
+    def list_templates(self, resource_ids: Optional[List[int]] = None) -> List[ScheduleTemplateEntity]:
+        pass
+
+    @abstractmethod
+    def save_template(self, entity: ScheduleTemplateEntity) -> ScheduleTemplateEntity:
+        pass
+
+    @abstractmethod
+    def list_exceptions(self, resource_ids: List[int], start_date: date, end_date: date) -> List[ScheduleExceptionEntity]:
+        # Includes gym-wide holidays (resource_id=None)
+        pass
+
+    @abstractmethod
+    def add_exception(self, entity: ScheduleExceptionEntity) -> ScheduleExceptionEntity:
+        pass
+
+    @abstractmethod
+    def list_materialized_days(self, resource_ids: List[int], start_date: date, end_date: date) -> Set[Tuple[int, date]]:
+        pass
+
+    @abstractmethod
+    def mark_materialized(self, days: List[Tuple[int, date]]) -> None:
+        pass
+
+
+class ExportJobRepositoryInterface(ABC):
+
+    @abstractmethod
+    def create(self, entity: ExportJobEntity) -> ExportJobEntity:
+        pass
+
+    @abstractmethod
+    def get_by_id(self, job_id: int) -> Optional[ExportJobEntity]:
+        pass
+
+    @abstractmethod
+    def claim_next(self) -> Optional[ExportJobEntity]:
+        # Atomically moves the oldest PENDING job to RUNNING with a new attempt; None when nothing is waiting
+        pass
+
+    @abstractmethod
+    def heartbeat(self, job_id: int, attempt: int) -> bool:
+        # Marks the claim as alive; False when the job is no longer RUNNING under this attempt
+        pass
+
+    @abstractmethod
+    def requeue_stale(self, heartbeat_before: datetime) -> int:
+        # RUNNING jobs without a heartbeat since the cutoff (their worker died) go back to PENDING; returns how many
+        pass
+
+    @abstractmethod
+    def mark_done(self, job_id: int, attempt: int, file_path: str) -> bool:
+        # Only the worker still holding the claim may finish the job; returns whether it did
+        pass
+
+    @abstractmethod
+    def mark_failed(self, job_id: int, attempt: int, error: str) -> bool:
+        pass
+
+
+class DailyStatsRepositoryInterface(ABC):
+
+    @abstractmethod
+    def record_changes(self, booked_slot_ids: Sequence[int] = (), cancelled_slot_ids: Sequence[int] = ()) -> None:
+        # One entry per reservation made / cancelled (a slot may repeat); call after the seat counters changed
+        pass
+
+    @abstractmethod
+    def refresh_slots(self, resource_ids: List[int], start_date: date, end_date: date) -> None:
+        # After slots were created or closed: recounts slots_offered, adding rows for days without one
+        pass
+
+    @abstractmethod
+    def rebuild(self, start_date: date, end_date: date, resource_ids: Optional[List[int]] = None) -> int:
+        # Recomputes local days start_date..end_date (idle days with slots too); returns rows written
+        pass
+
+    @abstractmethod
+    def list_range(self, start_date: date, end_date: date,
+                   resource_ids: Optional[List[int]] = None) -> List[DailyResourceStatsEntity]:
+        pass
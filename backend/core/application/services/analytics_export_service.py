@@ -0,0 +1,81 @@
+"""
+Reservation history for BI tools: every reservation joined with its slot and
+resource, read from a server-side cursor and written as chunked CSV or as a
+columnar NumPy .npz archive (written without NumPy).
+"""
+import csv
+import io
+from datetime import date
+from typing import BinaryIO, Iterator, Optional
+from core.application.interfaces.repositories import ReservationRepositoryInterface
+from core.infrastructure.columnar import NpzWriter
+
+# Rows fetched per cursor round trip and encoded per yielded chunk
+ROWS_PER_CHUNK = 5000
+
+ANALYTICS_COLUMNS = (
+    'id', 'user_id', 'resource_id', 'resource_name', 'resource_type', 'time_slot_id',
+    'start_time', 'end_time', 'status', 'created_at'
+)
+# .npz column kinds, in ANALYTICS_COLUMNS order
+_NPZ_COLUMNS = {
+    'id': 'int',
+    'user_id': 'int',
+    'resource_id': 'int',
+    'resource_name': 'category',
+    'resource_type': 'category',
+    'time_slot_id': 'int',
+    'start_time': 'datetime',
+    'end_time': 'datetime',
+    'status': 'category',
+    'created_at': 'datetime'
+}
+
+
+class AnalyticsExportService:
+
+    def __init__(self, reservation_repo: ReservationRepositoryInterface):
+        self.reservation_repo = reservation_repo
+
+    def iter_csv(self, start_date: Optional[date] = None, end_date: Optional[date] = None,
+                 status: Optional[str] = None) -> Iterator[bytes]:
+        """Validate now, then return a generator yielding the CSV ROWS_PER_CHUNK rows at a time."""
+        rows = self._rows(start_date, end_date, status)
+        return self._generate_csv(rows)
+
+    def write_npz(self, output: BinaryIO, start_date: Optional[date] = None, end_date: Optional[date] = None,
+                  status: Optional[str] = None) -> int:
+        """Write the columnar archive to output; returns the number of rows."""
+        writer = NpzWriter(_NPZ_COLUMNS)
+        chunk = []
+        for row in self._rows(start_date, end_date, status):
+            chunk.append(row)
+            if len(chunk) >= ROWS_PER_CHUNK:
+                writer.append_rows(chunk)
+                chunk = []
+        writer.append_rows(chunk)
+        return writer.write(output)
+
+    def _rows(self, start_date: Optional[date], end_date: Optional[date], status: Optional[str]):
+        if (start_date is None) != (end_date is None):
+            raise ValueError("start_date и end_date се задават заедно")
+        if start_date is not None and start_date > end_date:
+            raise ValueError("start_date трябва да е преди end_date")
+        if status not in (None, 'ACTIVE', 'CANCELLED'):
+            raise ValueError("status трябва да е ACTIVE или CANCELLED")
+        return self.reservation_repo.iter_analytics_rows(start_date, end_date, status, chunk_size=ROWS_PER_CHUNK)
+
+    def _generate_csv(self, rows) -> Iterator[bytes]:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(ANALYTICS_COLUMNS)
+        count = 0
+        for row in rows:
+            # Timestamps in UTC ISO 8601, as stored
+            writer.writerow([value.isoformat() if hasattr(value, 'isoformat') else value for value in row])
+            count += 1
+            if count % ROWS_PER_CHUNK == 0:
+                yield buffer.getvalue().encode('utf-8')
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue().encode('utf-8')
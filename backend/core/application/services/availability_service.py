@@ -0,0 +1,96 @@
+from typing import List, Optional, Tuple
+from datetime import date, datetime, timedelta
+from django.utils import timezone
+from core.domain.entities.resource import ResourceEntity
+from core.domain.entities.timeslot import TimeSlotEntity
+from core.application.interfaces.repositories import ResourceRepositoryInterface, TimeSlotRepositoryInterface
+from core.application.services.schedule_service import MAX_MATERIALIZE_DAYS
+
+# Upper bound on how many slots one next-available search returns
+MAX_RESULTS = 50
+# A search window's local days must fit in one on-demand materialization
+MAX_SEARCH_DAYS = MAX_MATERIALIZE_DAYS - 1
+
+
+class AvailabilityService:
+
+    def __init__(
+            self,
+            timeslot_repo: TimeSlotRepositoryInterface,
+            resource_repo: ResourceRepositoryInterface,
+            schedule_service=None
+    ):
+        self.timeslot_repo = timeslot_repo
+        self.resource_repo = resource_repo
+        # Optional ScheduleService used to materialize template slots for the requested days
+        self.schedule_service = schedule_service
+
+    def get_matrix(self, resource_ids: Optional[List[int]], start_date: date, end_date: date,
+                   type_filter: Optional[str] = None) -> dict:
+        """Remaining capacity for every resource x slot start in [start_date, end_date].
+
+        Returns {'resources': [...], 'slots': [start_time, ...], 'matrix': [[spots or None, ...], ...]}
+        with one matrix row per resource and one column per distinct slot start; None means the
+        resource has no slot starting then, 0 that the slot is full, closed or already started.
+        """
+        if start_date > end_date:
+            raise ValueError("start_date трябва да е преди end_date")
+
+        resources = self._select_resources(resource_ids, type_filter)
+        if not resources:
+            return {'resources': [], 'slots': [], 'matrix': []}
+
+        ids = [r.id for r in resources]
+        if self.schedule_service is not None:
+            self.schedule_service.ensure_slots(ids, start_date, end_date)
+
+        # One query: the slot rows carry their own active reservation counter
+        rows = self.timeslot_repo.list_by_date_range_rows(ids, start_date, end_date)
+
+        slots = sorted({row['start_time'] for row in rows})
+        column = {start: i for i, start in enumerate(slots)}
+        position = {r.id: i for i, r in enumerate(resources)}
+        matrix = [[None] * len(slots) for _ in resources]
+        now = timezone.now()
+        for row in rows:
+            i = position[row['resource_id']]
+            bookable = row['is_available'] and row['start_time'] > now
+            matrix[i][column[row['start_time']]] = resources[i].get_available_spots(row['active_count']) if bookable else 0
+
+        return {'resources': resources, 'slots': slots, 'matrix': matrix}
+
+    def find_next_available(self, start_time: datetime, end_time: datetime, resource_ids: Optional[List[int]] = None,
+                            type_filter: Optional[str] = None, min_duration_minutes: int = 0,
+                            limit: int = 5) -> List[Tuple[TimeSlotEntity, ResourceEntity]]:
+        """Earliest bookable slots starting in [start_time, end_time), across the selected resources."""
+        if start_time >= end_time:
+            raise ValueError("start_time трябва да е преди end_time")
+        if end_time - start_time > timedelta(days=MAX_SEARCH_DAYS):
+            raise ValueError(f"Периодът не може да е повече от {MAX_SEARCH_DAYS} дни")
+        if min_duration_minutes < 0:
+            raise ValueError("min_duration не може да е отрицателно")
+        limit = max(1, min(limit, MAX_RESULTS))
+
+        resources = self._select_resources(resource_ids, type_filter)
+        if not resources:
+            return []
+        by_id = {r.id: r for r in resources}
+        # No filter at all searches every resource without a long IN list
+        ids = None if resource_ids is None and not type_filter else list(by_id)
+
+        if self.schedule_service is not None:
+            self.schedule_service.ensure_slots(ids, timezone.localtime(start_time).date(), timezone.localtime(end_time).date())
+
+        slots = self.timeslot_repo.find_bookable(ids, start_time, end_time, min_duration_minutes, limit)
+        return [(slot, by_id[slot.resource_id]) for slot in slots if slot.can_be_reserved()]
+
+    def _select_resources(self, resource_ids: Optional[List[int]], type_filter: Optional[str]) -> List[ResourceEntity]:
+        resources = self.resource_repo.list_all(type_filter)
+        if resource_ids is None:
+            return resources
+        known = {r.id for r in resources}
+        missing = [rid for rid in resource_ids if rid not in known]
+        if missing:
+            raise ValueError(f"Resource {missing[0]} не съществува")
+        wanted = set(resource_ids)
+        return [r for r in resources if r.id in wanted]
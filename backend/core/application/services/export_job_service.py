@@ -0,0 +1,178 @@
+"""
+Asynchronous schedule exports.
+
+The API only records an ExportJob; the run_export_jobs worker claims it, renders
+one file per member (in parallel worker processes when asked to) and packs them
+into a zip archive under the media root, so long multi-member exports never run
+inside a web request.
+"""
+import os
+import shutil
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, time, timedelta
+from typing import List, Optional
+from django.db import connections
+from django.utils import timezone
+from core.domain.entities.export_job import ExportJobEntity
+from core.application.interfaces.repositories import (
+    ExportJobRepositoryInterface,
+    ReservationRepositoryInterface,
+    UserRepositoryInterface
+)
+
+# Longest range one export job may cover
+MAX_EXPORT_JOB_DAYS = 366
+# Archives live under <media root>/EXPORT_DIR
+EXPORT_DIR = 'exports'
+# A RUNNING job whose worker has not reported progress for this long is taken to be abandoned and queued again
+EXPORT_JOB_TIMEOUT = timedelta(hours=1)
+
+
+def render_member_export(kind: str, user_id: int, start_date: date, end_date: date, path: str) -> str:
+    """Render one member's schedule to path; runs in a pool worker, so it builds its own services."""
+    from core.application.services.export_service import WeeklySchedulePrintService, ICalendarExportService
+    from core.infrastructure.persistence.repositories.implementations import (
+        ReservationRepository, ResourceRepository, TimeSlotRepository, UserRepository
+    )
+
+    reservation_repo = ReservationRepository()
+    user_repo = UserRepository()
+    if kind == 'ics':
+        exporter = ICalendarExportService(reservation_repo, user_repo)
+    else:
+        exporter = WeeklySchedulePrintService(reservation_repo, ResourceRepository(), TimeSlotRepository(), user_repo)
+
+    with open(path, 'wb') as output:
+        for chunk in exporter.stream(user_id, datetime.combine(start_date, time.min), datetime.combine(end_date, time.min)):
+            output.write(chunk)
+    return path
+
+
+def _init_pool_worker() -> None:
+    # Forked workers must not reuse the parent's database connections; spawned ones need Django set up
+    import django
+    django.setup()
+    connections.close_all()
+
+
+class ExportJobService:
+
+    def __init__(
+            self,
+            job_repo: ExportJobRepositoryInterface,
+            user_repo: UserRepositoryInterface,
+            reservation_repo: ReservationRepositoryInterface,
+            media_root: str,
+            stale_after: timedelta = EXPORT_JOB_TIMEOUT
+    ):
+        self.job_repo = job_repo
+        self.user_repo = user_repo
+        self.reservation_repo = reservation_repo
+        self.media_root = str(media_root)
+        self.stale_after = stale_after
+
+    def create_job(self, requested_by: int, kind: str, start_date: date, end_date: date,
+                   user_ids: Optional[List[int]] = None) -> ExportJobEntity:
+        user = self.user_repo.get_by_id(requested_by)
+        if not user:
+            raise ValueError(f"User {requested_by} не съществува")
+
+        if not user.is_admin():
+            # Members may only export their own schedule
+            if user_ids is not None and user_ids != [requested_by]:
+                raise ValueError("Само администратор може да експортира графика на други членове")
+            user_ids = [requested_by]
+        elif user_ids is not None:
+            if not user_ids:
+                raise ValueError("Няма избрани членове за експорт")
+            # Checked here, so one bad id is a 400 now instead of a failed job later
+            missing = set(user_ids) - self.user_repo.existing_ids(user_ids)
+            if missing:
+                raise ValueError(f"User {min(missing)} не съществува")
+
+        job = ExportJobEntity(
+            id=None,
+            requested_by_id=requested_by,
+            kind=kind,
+            start_date=start_date,
+            end_date=end_date,
+            user_ids=sorted(set(user_ids)) if user_ids is not None else None
+        )
+        if (end_date - start_date).days + 1 > MAX_EXPORT_JOB_DAYS:
+            raise ValueError(f"Периодът не може да е повече от {MAX_EXPORT_JOB_DAYS} дни")
+        return self.job_repo.create(job)
+
+    def get_job(self, job_id: int, user_id: int) -> ExportJobEntity:
+        job = self.job_repo.get_by_id(job_id)
+        if not job:
+            raise ValueError(f"Export {job_id} не съществува")
+        if job.requested_by_id != user_id:
+            user = self.user_repo.get_by_id(user_id)
+            if not user or not user.is_admin():
+                raise ValueError("Нямаш права за този експорт")
+        return job
+
+    def get_archive_path(self, job_id: int, user_id: int) -> str:
+        job = self.get_job(job_id, user_id)
+        if not job.is_ready():
+            raise ValueError("Експортът още не е готов")
+        return os.path.join(self.media_root, job.file_path)
+
+    def run_next(self, processes: int = 0) -> Optional[ExportJobEntity]:
+        """Claim and run the oldest pending job; returns it (with its final status) or None."""
+        self.job_repo.requeue_stale(timezone.now() - self.stale_after)
+        job = self.job_repo.claim_next()
+        if job is None:
+            return None
+        # mark_done/mark_failed are no-ops once the job was re-queued and claimed by another worker
+        try:
+            self.job_repo.mark_done(job.id, job.attempt, self._render(job, processes))
+        except Exception as e:
+            self.job_repo.mark_failed(job.id, job.attempt, str(e))
+        return self.job_repo.get_by_id(job.id)
+
+    def _keep_claim(self, job: ExportJobEntity) -> None:
+        if not self.job_repo.heartbeat(job.id, job.attempt):
+            raise ValueError(f"Export {job.id} е поет от друг worker")
+
+    def _render(self, job: ExportJobEntity, processes: int) -> str:
+        user_ids = job.user_ids
+        if user_ids is None:
+            user_ids = self.reservation_repo.list_user_ids_in_range(job.start_date, job.end_date)
+
+        # Each attempt renders into its own directory and temporary archive, so a worker that was
+        # presumed dead cannot delete or overwrite the files of the worker that took the job over
+        relative_path = os.path.join(EXPORT_DIR, f'job_{job.id}.zip')
+        archive = os.path.join(self.media_root, relative_path)
+        partial = f'{archive}.{job.attempt}.part'
+        work_dir = os.path.join(self.media_root, EXPORT_DIR, f'job_{job.id}_{job.attempt}')
+        os.makedirs(work_dir, exist_ok=True)
+        try:
+            tasks = [
+                (job.kind, user_id, job.start_date, job.end_date, os.path.join(work_dir, f'user_{user_id}.{job.kind}'))
+                for user_id in user_ids
+            ]
+            paths = []
+            if processes > 0 and len(tasks) > 1:
+                # Children open their own connections; the parent's must not be shared across the fork
+                connections.close_all()
+                with ProcessPoolExecutor(max_workers=processes, initializer=_init_pool_worker) as pool:
+                    for path in pool.map(render_member_export, *zip(*tasks)):
+                        self._keep_claim(job)
+                        paths.append(path)
+            else:
+                for task in tasks:
+                    paths.append(render_member_export(*task))
+                    self._keep_claim(job)
+
+            with zipfile.ZipFile(partial, 'w', compression=zipfile.ZIP_DEFLATED) as zf:
+                for path in paths:
+                    zf.write(path, arcname=os.path.basename(path))
+            self._keep_claim(job)
+            os.replace(partial, archive)
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+            if os.path.exists(partial):
+                os.remove(partial)
+        return relative_path
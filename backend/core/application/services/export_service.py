@@ -2,10 +2,13 @@
 Export service implementations using SOLID principles.
 Handles PDF printing and iCalendar exports.
 """
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Iterable, Iterator
 from datetime import datetime, timedelta
 import io
 from abc import ABC, abstractmethod
+from django.core.cache import cache
+from django.utils import timezone
+from django.utils.html import escape
 
 # Import the interface
 from core.application.interfaces.export import ScheduleExportInterface
@@ -17,47 +20,92 @@ from core.infrastructure.persistence.repositories.implementations import (
 )
 
 
-class WeeklySchedulePrintService(ScheduleExportInterface):
-    
+# Entries are keyed by a fingerprint of the data, so this only bounds how long stale keys linger
+EXPORT_CACHE_TIMEOUT = 60 * 60 * 24
+# Larger outputs are streamed without being kept; caching them would mean buffering the whole document
+EXPORT_CACHE_MAX_BYTES = 1024 * 1024
+
+
+class CachedScheduleExport(ScheduleExportInterface):
+    """
+    Serves stored output of another exporter while the reservations it covers are unchanged.
+
+    The key holds the exporter type, user, date range, options, a fingerprint of the user's
+    reservations in the range and the resource catalog version: any booking, cancellation or
+    resource edit yields a new key, so entries never need explicit invalidation.
+    """
+
     def __init__(
         self,
+        exporter: ScheduleExportInterface,
         reservation_repo: ReservationRepository,
         resource_repo: ResourceRepository,
-        timeslot_repo: TimeSlotRepository,
-        user_repo: UserRepository
+        timeout: int = EXPORT_CACHE_TIMEOUT
     ):
+        self.exporter = exporter
         self.reservation_repo = reservation_repo
         self.resource_repo = resource_repo
-        self.timeslot_repo = timeslot_repo
-        self.user_repo = user_repo
-    
+        self.timeout = timeout
+
     def export(self, user_id: int, start_date: datetime, end_date: datetime) -> bytes:
-        if start_date > end_date:
-            raise ValueError("start_date must be before end_date")
-        
-        user = self.user_repo.get_by_id(user_id)
-        if not user:
-            raise ValueError(f"User {user_id} not found")
-        
-        # Fetch reservations for the date range
-        reservations = self.reservation_repo.list_by_user_and_date_range(
-            user_id, start_date, end_date, status='ACTIVE'
+        return b''.join(self.stream(user_id, start_date, end_date))
+
+    def stream(self, user_id: int, start_date: datetime, end_date: datetime, fingerprint: Optional[str] = None,
+               **options) -> Iterator[bytes]:
+        # fingerprint: the caller's reservation_repo.fingerprint() for the same scope and range,
+        # when it already computed one (e.g. for an ETag), so the aggregate isn't run twice
+        # The wrapped exporter checks the user, their rights and the range before it returns; only
+        # the lazy rendering behind the returned generator is skipped on a hit
+        chunks = self.exporter.stream(user_id, start_date, end_date, **options)
+        key = self._cache_key(user_id, start_date, end_date, options, fingerprint)
+        cached = cache.get(key)
+        if cached is not None:
+            if hasattr(chunks, 'close'):
+                chunks.close()
+            return iter([cached])
+        return self._store_after_streaming(key, chunks)
+
+    def _store_after_streaming(self, key: str, chunks: Iterator[bytes]) -> Iterator[bytes]:
+        kept = []
+        size = 0
+        for chunk in chunks:
+            if kept is not None:
+                size += len(chunk)
+                if size <= EXPORT_CACHE_MAX_BYTES:
+                    kept.append(chunk)
+                else:
+                    kept = None
+            yield chunk
+        # Only a fully sent document is stored
+        if kept is not None:
+            cache.set(key, b''.join(kept), self.timeout)
+
+    def _cache_key(self, user_id: int, start_date: datetime, end_date: datetime, options: dict,
+                   fingerprint: Optional[str]) -> str:
+        if fingerprint is None:
+            # all_members exports cover everyone's reservations, not just the requesting user's
+            scope = None if options.get('all_members') else user_id
+            fingerprint = self.reservation_repo.fingerprint(scope, start_date, end_date)
+        flags = ','.join(f'{name}={value}' for name, value in sorted(options.items()))
+        return (
+            f'exports:{self.get_file_extension()}:{user_id}:{start_date.date()}:{end_date.date()}:'
+            f'{flags}:{fingerprint}:{self.resource_repo.catalog_version()}'
         )
-        
-        html = self._generate_html(user, reservations, start_date, end_date)
-        return html.encode('utf-8')
-    
-    def _generate_html(self, user: Any, reservations: List[Any], start_date: datetime, end_date: datetime) -> str:
-        # Group reservations by date
-        by_date = self._group_by_date(reservations)
-        
-        # Build HTML
-        html = f"""
+
+    def get_content_type(self) -> str:
+        return self.exporter.get_content_type()
+
+    def get_file_extension(self) -> str:
+        return self.exporter.get_file_extension()
+
+
+# Fixed pieces of the printable schedule; the renderer fills them in and yields them chunk by chunk
+_HTML_HEAD = """
 <!DOCTYPE html>
 <html>
 <head>
     <meta charset="UTF-8">
-    <title>Седмичен график - {user.email}</title>
+    <title>Седмичен график - {title}</title>
     <style>
         * {{ margin: 0; padding: 0; box-sizing: border-box; }}
         body {{ font-family: Arial, sans-serif; padding: 20px; background: white; }}
@@ -75,6 +123,7 @@ class WeeklySchedulePrintService(ScheduleExportInterface):
         .resource-name {{ font-weight: bold; color: #333; margin-bottom: 5px; }}
         .time {{ color: #666; font-size: 14px; margin-bottom: 3px; }}
         .resource-type {{ display: inline-block; background: #e0e0e0; padding: 2px 8px; border-radius: 3px; font-size: 12px; color: #555; }}
+        .member {{ color: #555; font-size: 13px; margin-top: 5px; }}
         .notes {{ color: #888; font-size: 12px; margin-top: 5px; font-style: italic; }}
         .empty-day {{ padding: 15px; color: #999; text-align: center; }}
         .color-box {{ width: 12px; height: 12px; border-radius: 3px; margin-right: 10px; flex-shrink: 0; margin-top: 2px; }}
@@ -91,89 +140,133 @@ class WeeklySchedulePrintService(ScheduleExportInterface):
         <p>GymDesk Резервационна Система</p>
     </div>
     <div class="date-range">
-        {start_date.strftime('%d.%m.%Y')} - {end_date.strftime('%d.%m.%Y')} | Потребител: {user.email}
+        {start} - {end} | Потребител: {owner}
     </div>
     <div class="schedule-grid">
 """
-        
-        # Generate day sections
-        current = start_date.date()
-        end = end_date.date()
-        
-        while current <= end:
-            day_reservations = by_date.get(current.isoformat(), [])
-            day_name = self._get_day_name(current)
-            
-            html += f"""
+
+_DAY_OPEN = """
         <div class="day-section">
-            <div class="day-header">{day_name} - {current.strftime('%d.%m.%Y')}</div>
+            <div class="day-header">{day_name} - {day}</div>
             <div class="reservations">
 """
-            
-            if not day_reservations:
-                html += '<div class="empty-day">Няма резервации</div>'
-            else:
-                for res in day_reservations:
-                    html += self._format_reservation_html(res)
-            
-            html += """
+
+_DAY_CLOSE = """
             </div>
         </div>
 """
-            current += timedelta(days=1)
-        
-        html += f"""
+
+_RESERVATION_OPEN = """
+                <div class="reservation">
+                    <div class="color-box" style="background-color: {color};"></div>
+                    <div class="reservation-info">
+                        <div class="resource-name">{name}</div>
+                        <div class="time">
+                            {start} - {end}
+                        </div>
+                        <span class="resource-type">{type}</span>
+"""
+
+_RESERVATION_CLOSE = """
+                    </div>
+                </div>
+"""
+
+_HTML_FOOT = """
     </div>
     <div class="footer">
-        Генерирано на: {datetime.now().strftime('%d.%m.%Y %H:%M')}
+        Генерирано на: {generated}
     </div>
 </body>
 </html>
 """
-        return html
+
+
+class WeeklySchedulePrintService(ScheduleExportInterface):
     
-    def _group_by_date(self, reservations: List[Any]) -> Dict[str, List[Any]]:
-        """Group reservations by date."""
-        result = {}
-        for res in reservations:
-            # Assuming timeslot has start_time
-            date_key = res.time_slot.start_time.date().isoformat()
-            if date_key not in result:
-                result[date_key] = []
-            result[date_key].append(res)
+    def __init__(
+        self,
+        reservation_repo: ReservationRepository,
+        resource_repo: ResourceRepository,
+        timeslot_repo: TimeSlotRepository,
+        user_repo: UserRepository
+    ):
+        self.reservation_repo = reservation_repo
+        self.resource_repo = resource_repo
+        self.timeslot_repo = timeslot_repo
+        self.user_repo = user_repo
+    
+    def export(self, user_id: int, start_date: datetime, end_date: datetime) -> bytes:
+        return b''.join(self.stream(user_id, start_date, end_date))
+
+    def stream(self, user_id: int, start_date: datetime, end_date: datetime, all_members: bool = False) -> Iterator[bytes]:
+        """
+        Validate now, then return a generator yielding the document one day section at a time.
+        With all_members (admins only) every member's reservations are printed.
+        """
+        if start_date > end_date:
+            raise ValueError("start_date must be before end_date")
         
-        # Sort each day's reservations by time
-        for key in result:
-            result[key].sort(key=lambda r: r.time_slot.start_time)
+        user = self.user_repo.get_by_id(user_id)
+        if not user:
+            raise ValueError(f"User {user_id} not found")
+        if all_members and not user.is_admin():
+            raise ValueError("Само администратор може да печата графика на всички членове")
         
-        return result
+        # Reservations are read lazily from a cursor, in start time order
+        reservations = self.reservation_repo.iter_by_date_range(
+            None if all_members else user_id, start_date, end_date, status='ACTIVE'
+        )
+        return self._generate_html(user, reservations, start_date, end_date, all_members)
     
-    def _format_reservation_html(self, reservation: Any) -> str:
+    def _generate_html(self, user: Any, reservations: Iterable[Any], start_date: datetime, end_date: datetime,
+                       all_members: bool = False) -> Iterator[bytes]:
+        owner = 'всички членове' if all_members else escape(user.email)
+        yield _HTML_HEAD.format(
+            title=owner,
+            start=start_date.strftime('%d.%m.%Y'),
+            end=end_date.strftime('%d.%m.%Y'),
+            owner=owner
+        ).encode('utf-8')
+
+        # One chunk per day: days are walked in order while the reservations are consumed alongside
+        rows = iter(reservations)
+        pending = next(rows, None)
+        current = start_date.date()
+        end = end_date.date()
+        while current <= end:
+            parts = [_DAY_OPEN.format(day_name=self._get_day_name(current), day=current.strftime('%d.%m.%Y'))]
+            while pending is not None and timezone.localtime(pending.time_slot.start_time).date() <= current:
+                if timezone.localtime(pending.time_slot.start_time).date() == current:
+                    parts.append(self._format_reservation_html(pending, all_members))
+                pending = next(rows, None)
+            if len(parts) == 1:
+                parts.append('<div class="empty-day">Няма резервации</div>')
+            parts.append(_DAY_CLOSE)
+            yield ''.join(parts).encode('utf-8')
+            current += timedelta(days=1)
+
+        yield _HTML_FOOT.format(generated=timezone.localtime().strftime('%d.%m.%Y %H:%M')).encode('utf-8')
+    
+    def _format_reservation_html(self, reservation: Any, show_member: bool = False) -> str:
         """Format a single reservation as HTML."""
         resource = reservation.resource
         timeslot = reservation.time_slot
-        
-        color_box = f'<div class="color-box" style="background-color: {resource.color_code};"></div>'
-        
-        html = f"""
-                <div class="reservation">
-                    {color_box}
-                    <div class="reservation-info">
-                        <div class="resource-name">{resource.name}</div>
-                        <div class="time">
-                            {timeslot.start_time.strftime('%H:%M')} - {timeslot.end_time.strftime('%H:%M')}
-                        </div>
-                        <span class="resource-type">{resource.type}</span>
-"""
-        
+        parts = [
+            _RESERVATION_OPEN.format(
+                color=escape(resource.color_code),
+                name=escape(resource.name),
+                start=timezone.localtime(timeslot.start_time).strftime('%H:%M'),
+                end=timezone.localtime(timeslot.end_time).strftime('%H:%M'),
+                type=escape(resource.type)
+            )
+        ]
+        if show_member:
+            parts.append(f'                        <div class="member">{escape(reservation.user.email)}</div>\n')
         if reservation.notes:
-            html += f'                        <div class="notes">Бележка: {reservation.notes}</div>\n'
-        
-        html += """
-                    </div>
-                </div>
-"""
-        return html
+            parts.append(f'                        <div class="notes">Бележка: {escape(reservation.notes)}</div>\n')
+        parts.append(_RESERVATION_CLOSE)
+        return ''.join(parts)
     
     def _get_day_name(self, date: Any) -> str:
         """Get Bulgarian day name."""
@@ -187,6 +280,37 @@ class WeeklySchedulePrintService(ScheduleExportInterface):
         return 'html'
 
 
+# Events encoded per yielded chunk of the iCalendar stream
+ICS_EVENTS_PER_CHUNK = 200
+
+# Backslash, newline, semicolon and comma are escaped (RFC 5545 TEXT); carriage returns are dropped
+_ICS_ESCAPES = str.maketrans({'\\': '\\\\', '\n': '\\n', '\r': None, ';': '\\;', ',': '\\,'})
+
+_ICS_HEAD = """BEGIN:VCALENDAR
+VERSION:2.0
+PRODID:-//GymDesk//Reservations//BG
+CALSCALE:GREGORIAN
+METHOD:PUBLISH
+X-WR-CALNAME:GymDesk - Мои Резервации
+X-WR-TIMEZONE:Europe/Sofia
+BEGIN:VTIMEZONE
+TZID:Europe/Sofia
+BEGIN:STANDARD
+DTSTART:19700101T000000
+TZOFFSETFROM:+0300
+TZOFFSETTO:+0200
+TZNAME:EET
+END:STANDARD
+BEGIN:DAYLIGHT
+DTSTART:19700101T030000
+TZOFFSETFROM:+0200
+TZOFFSETTO:+0300
+TZNAME:EEST
+END:DAYLIGHT
+END:VTIMEZONE
+"""
+
+
 class ICalendarExportService(ScheduleExportInterface):
     """
     Generates iCalendar (.ics) file for importing reservations into calendar apps.
@@ -205,6 +329,12 @@ class ICalendarExportService(ScheduleExportInterface):
         """
         Generate iCalendar file (.ics format).
         """
+        return b''.join(self.stream(user_id, start_date, end_date))
+
+    def stream(self, user_id: int, start_date: datetime, end_date: datetime) -> Iterator[bytes]:
+        """
+        Validate now, then return a generator yielding the calendar in chunks of events.
+        """
         if start_date > end_date:
             raise ValueError("start_date must be before end_date")
         
@@ -212,58 +342,34 @@ class ICalendarExportService(ScheduleExportInterface):
         if not user:
             raise ValueError(f"User {user_id} not found")
         
-        # Fetch reservations for the date range
-        reservations = self.reservation_repo.list_by_user_and_date_range(
+        # Reservations are read lazily from a cursor, with slot and resource joined in
+        reservations = self.reservation_repo.iter_by_date_range(
             user_id, start_date, end_date, status='ACTIVE'
         )
-        
-        ics_content = self._generate_ics(user, reservations)
-        return ics_content.encode('utf-8')
+        return self._generate_ics(user, reservations)
     
-    def _generate_ics(self, user: Any, reservations: List[Any]) -> str:
-        """Generate iCalendar file content."""
-        now = datetime.now().isoformat().replace(':', '').replace('-', '') + 'Z'
-        
-        ics = """BEGIN:VCALENDAR
-VERSION:2.0
-PRODID:-//GymDesk//Reservations//BG
-CALSCALE:GREGORIAN
-METHOD:PUBLISH
-X-WR-CALNAME:GymDesk - Мои Резервации
-X-WR-TIMEZONE:Europe/Sofia
-BEGIN:VTIMEZONE
-TZID:Europe/Sofia
-BEGIN:STANDARD
-DTSTART:19700101T000000
-TZOFFSETFROM:+0300
-TZOFFSETTO:+0200
-TZNAME:EET
-END:STANDARD
-BEGIN:DAYLIGHT
-DTSTART:19700101T030000
-TZOFFSETFROM:+0200
-TZOFFSETTO:+0300
-TZNAME:EEST
-END:DAYLIGHT
-END:VTIMEZONE
-"""
+    def _generate_ics(self, user: Any, reservations: Iterable[Any]) -> Iterator[bytes]:
+        """Generate iCalendar file content, ICS_EVENTS_PER_CHUNK events at a time."""
+        now = timezone.now().strftime('%Y%m%dT%H%M%SZ')
         
-        # Add events
+        buffer = [_ICS_HEAD]
         for res in reservations:
-            event = self._format_ics_event(res, now)
-            ics += event
+            buffer.append(self._format_ics_event(res, now))
+            if len(buffer) >= ICS_EVENTS_PER_CHUNK:
+                yield ''.join(buffer).encode('utf-8')
+                buffer = []
         
-        ics += "END:VCALENDAR\n"
-        return ics
+        buffer.append("END:VCALENDAR\n")
+        yield ''.join(buffer).encode('utf-8')
     
     def _format_ics_event(self, reservation: Any, now: str) -> str:
         """Format a single reservation as iCalendar event."""
         resource = reservation.resource
         timeslot = reservation.time_slot
         
-        # Format dates for iCalendar (YYYYMMDDTHHMMSS format)
-        dtstart = timeslot.start_time.isoformat().replace(':', '').replace('-', '')
-        dtend = timeslot.end_time.isoformat().replace(':', '').replace('-', '')
+        # Local wall-clock time (YYYYMMDDTHHMMSS) to match the TZID parameter
+        dtstart = timezone.localtime(timeslot.start_time).strftime('%Y%m%dT%H%M%S')
+        dtend = timezone.localtime(timeslot.end_time).strftime('%Y%m%dT%H%M%S')
         
         # Create unique UID
         uid = f"gymdesk-res-{reservation.id}@gymdesk.local"
@@ -273,7 +379,7 @@ END:VTIMEZONE
         if reservation.notes:
             description += f"\\nБележка: {self._escape_ics_text(reservation.notes)}"
         
-        event = f"""BEGIN:VEVENT
+        return f"""BEGIN:VEVENT
 UID:{uid}
 DTSTAMP:{now}
 DTSTART;TZID=Europe/Sofia:{dtstart}
@@ -285,17 +391,10 @@ STATUS:CONFIRMED
 SEQUENCE:0
 END:VEVENT
 """
-        return event
     
     def _escape_ics_text(self, text: str) -> str:
         """Escape special characters for iCalendar format."""
-        # Replace newlines with \n, escape commas, semicolons, and backslashes
-        text = text.replace('\\', '\\\\')
-        text = text.replace('\n', '\\n')
-        text = text.replace('\r', '')
-        text = text.replace(';', '\\;')
-        text = text.replace(',', '\\,')
-        return text
+        return text.translate(_ICS_ESCAPES)
     
     def get_content_type(self) -> str:
         return 'text/calendar'
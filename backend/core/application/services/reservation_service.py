@@ -1,15 +1,24 @@
-from typing import List, Optional
-from datetime import datetime, timedelta
+from collections import Counter
+from typing import List, Optional, Tuple
+from datetime import date, datetime, timedelta
 from django.utils import timezone
 from core.domain.entities.reservation import ReservationEntity
+from core.domain.intervals import IntervalTree
 from core.application.interfaces.repositories import (
     ReservationRepositoryInterface,
     UserRepositoryInterface,
     ResourceRepositoryInterface,
-    TimeSlotRepositoryInterface
+    TimeSlotRepositoryInterface,
+    DailyStatsRepositoryInterface
 )
+from core.application.services.schedule_service import MAX_MATERIALIZE_DAYS
 from django.db import transaction
 
+# Largest number of slots one batch booking may request
+MAX_BATCH_SIZE = 50
+# Members may not cancel later than this before the slot starts
+CANCEL_NOTICE = timedelta(hours=1)
+
 
 class ReservationService:
 
@@ -18,18 +27,45 @@ class ReservationService:
             reservation_repo: ReservationRepositoryInterface,
             user_repo: UserRepositoryInterface,
             resource_repo: ResourceRepositoryInterface,
-            timeslot_repo: TimeSlotRepositoryInterface
+            timeslot_repo: TimeSlotRepositoryInterface,
+            schedule_service=None,
+            stats_repo: Optional[DailyStatsRepositoryInterface] = None
     ):
         self.reservation_repo = reservation_repo
         self.user_repo = user_repo
         self.resource_repo = resource_repo
         self.timeslot_repo = timeslot_repo
+        # Optional ScheduleService used to materialize template slots on demand
+        self.schedule_service = schedule_service
+        # Optional daily rollup kept current in the same transaction as every booking change
+        self.stats_repo = stats_repo
 
     def create_reservation(self, user_id: int, resource_id: int, timeslot_id: int, notes: Optional[str] = None) -> ReservationEntity:
-        user = self.user_repo.get_by_id(user_id)
-        if not user:
-            raise ValueError(f"User {user_id} не съществува")
+        # Taking the seat is a single conditional UPDATE on the slot row (existence, ownership,
+        # availability, start time, capacity and no overlapping booking of this user); the row
+        # lock it holds until commit keeps concurrent bookings from overbooking
+        with transaction.atomic():
+            # The user row lock serializes this user's bookings, so two parallel requests for
+            # overlapping slots (different slot rows) can't both pass the overlap check
+            if not self.user_repo.lock_for_booking(user_id):
+                raise ValueError(f"User {user_id} не съществува")
+            if self.timeslot_repo.reserve_seat(timeslot_id, resource_id, user_id):
+                entity = ReservationEntity(
+                    id=None,
+                    user_id=user_id,
+                    resource_id=resource_id,
+                    time_slot_id=timeslot_id,
+                    status='ACTIVE',
+                    notes=notes
+                )
+                created = self.reservation_repo.create(entity)
+                self._record_stats(booked=[timeslot_id])
+                return created
 
+        # Booking failed; only now look up why so the frontend can show an actionable message
+        self._raise_booking_error(resource_id, timeslot_id, user_id)
+
+    def _raise_booking_error(self, resource_id: int, timeslot_id: int, user_id: int) -> None:
         resource = self.resource_repo.get_by_id(resource_id)
         if not resource:
             raise ValueError(f"Resource {resource_id} не съществува")
@@ -38,44 +74,118 @@ class ReservationService:
         if not timeslot:
             raise ValueError(f"TimeSlot {timeslot_id} не съществува")
 
-        # Provide more specific errors so frontend can show actionable messages
+        if timeslot.resource_id != resource.id:
+            raise ValueError(f"TimeSlot {timeslot_id} не принадлежи на Resource {resource_id}")
         if not timeslot.is_available:
             raise ValueError("TimeSlot е затворен за резервации")
         if timeslot.is_in_past():
             raise ValueError("TimeSlot е в миналото и не може да се резервира")
+        if self.reservation_repo.find_overlapping(user_id, timeslot.start_time, timeslot.end_time):
+            raise ValueError("Вече имаш активна резервация, която се застъпва с този TimeSlot")
+
+        raise ValueError("TimeSlot е пълен")
+
+    def create_reservations_batch(self, user_id: int, resource_id: int, timeslot_ids: List[int],
+                                  notes: Optional[str] = None, all_or_nothing: bool = True) -> List[dict]:
+        """Book several slots of one resource in one transaction.
+
+        Returns one result per requested slot, in request order: {'timeslot_id', 'success',
+        'reservation'} or {'timeslot_id', 'success', 'error'}. With all_or_nothing a single invalid
+        slot books nothing; otherwise every valid slot is booked.
+        """
+        if not timeslot_ids:
+            raise ValueError("Няма избрани TimeSlot-ове")
+        if len(timeslot_ids) > MAX_BATCH_SIZE:
+            raise ValueError(f"Не може да се резервират повече от {MAX_BATCH_SIZE} слота наведнъж")
+        if len(set(timeslot_ids)) != len(timeslot_ids):
+            raise ValueError("Един TimeSlot е избран повече от веднъж")
+
+        resource = self.resource_repo.get_by_id(resource_id)
+        if not resource:
+            raise ValueError(f"Resource {resource_id} не съществува")
 
-        # perform create and potential timeslot update atomically
         with transaction.atomic():
-            current_count = self.reservation_repo.count_by_timeslot(timeslot_id, 'ACTIVE')
-
-            if not resource.can_accept_reservations(current_count):
-                raise ValueError("TimeSlot е пълен")
-
-            entity = ReservationEntity(
-                id=None,
-                user_id=user_id,
-                resource_id=resource_id,
-                time_slot_id=timeslot_id,
-                status='ACTIVE',
-                notes=notes
+            # User first, then slots: the same lock order as create_reservation
+            if not self.user_repo.lock_for_booking(user_id):
+                raise ValueError(f"User {user_id} не съществува")
+            slots = {slot.id: slot for slot in self.timeslot_repo.lock_for_booking(sorted(timeslot_ids))}
+            errors = self._validate_batch(user_id, resource, timeslot_ids, slots)
+
+            accepted = [slot_id for slot_id in timeslot_ids if slot_id not in errors]
+            if errors and all_or_nothing:
+                for slot_id in accepted:
+                    errors[slot_id] = "Не е резервиран: друг слот от заявката е невалиден"
+                accepted = []
+
+            created = {}
+            if accepted:
+                # Rows are locked and validated, so every slot must still have room
+                if self.timeslot_repo.reserve_seats(accepted) != len(accepted):
+                    raise ValueError("Капацитетът се промени по време на резервацията, опитай отново")
+                entities = [
+                    ReservationEntity(id=None, user_id=user_id, resource_id=resource_id,
+                                      time_slot_id=slot_id, status='ACTIVE', notes=notes)
+                    for slot_id in accepted
+                ]
+                created = {r.time_slot_id: r for r in self.reservation_repo.bulk_create(entities)}
+                self._record_stats(booked=accepted)
+
+        return [
+            {'timeslot_id': slot_id, 'success': True, 'reservation': created[slot_id]}
+            if slot_id in created else
+            {'timeslot_id': slot_id, 'success': False, 'error': errors[slot_id]}
+            for slot_id in timeslot_ids
+        ]
+
+    def _validate_batch(self, user_id: int, resource, timeslot_ids: List[int], slots: dict) -> dict:
+        # Same rules as create_reservation, checked in memory against rows loaded in one query
+        errors = {}
+        known = [slots[slot_id] for slot_id in timeslot_ids if slot_id in slots]
+        existing = IntervalTree([])
+        if known:
+            intervals = self.reservation_repo.list_overlapping_intervals(
+                user_id, min(s.start_time for s in known), max(s.end_time for s in known)
             )
+            existing = IntervalTree((start, end, reservation_id) for reservation_id, start, end in intervals)
 
-            reservation = self.reservation_repo.create(entity)
+        accepted = []
+        for slot_id in timeslot_ids:
+            slot = slots.get(slot_id)
+            if slot is None:
+                errors[slot_id] = f"TimeSlot {slot_id} не съществува"
+            elif slot.resource_id != resource.id:
+                errors[slot_id] = f"TimeSlot {slot_id} не принадлежи на Resource {resource.id}"
+            elif not slot.is_available:
+                errors[slot_id] = "TimeSlot е затворен за резервации"
+            elif slot.is_in_past():
+                errors[slot_id] = "TimeSlot е в миналото и не може да се резервира"
+            elif not resource.can_accept_reservations(slot.active_count):
+                errors[slot_id] = "TimeSlot е пълен"
+            elif existing.overlapping(slot.start_time, slot.end_time) or any(
+                    a.overlaps_with(slot.start_time, slot.end_time) for a in accepted):
+                errors[slot_id] = "Вече имаш активна резервация, която се застъпва с този TimeSlot"
+            else:
+                accepted.append(slot)
+        return errors
 
-            # After creating, re-check count and close timeslot if it reached max_bookings
-            new_count = self.reservation_repo.count_by_timeslot(timeslot_id, 'ACTIVE')
-            if not resource.can_accept_reservations(new_count):
-                # fetch timeslot and mark unavailable
-                timeslot = self.timeslot_repo.get_by_id(timeslot_id)
-                if timeslot and timeslot.is_available:
-                    timeslot.is_available = False
-                    self.timeslot_repo.update(timeslot)
+    def create_reservation_at(self, user_id: int, resource_id: int, start_time: datetime, notes: Optional[str] = None) -> ReservationEntity:
+        # Book by start time; the slot is created from the resource's schedule template if it doesn't exist yet
+        if self.schedule_service is not None:
+            timeslot = self.schedule_service.ensure_slot_at(resource_id, start_time)
+        else:
+            timeslot = self.timeslot_repo.get_by_start(resource_id, start_time)
+        if not timeslot:
+            raise ValueError(f"Няма TimeSlot за Resource {resource_id} в {start_time.isoformat()}")
 
-            return reservation
+        return self.create_reservation(user_id, resource_id, timeslot.id, notes)
 
     def get_user_reservations(self, user_id: int, status: Optional[str] = None) -> List[ReservationEntity]:
         return self.reservation_repo.list_by_user(user_id, status)
 
+    def get_user_reservations_page(self, user_id: int, status: Optional[str] = None,
+                                   after: Optional[Tuple[datetime, int]] = None, limit: int = 100) -> List[ReservationEntity]:
+        return self.reservation_repo.list_by_user_page(user_id, status, after, limit)
+
     def cancel_reservation(self, reservation_id: int, user_id: int) -> ReservationEntity:
         reservation = self.reservation_repo.get_by_id(reservation_id)
         if not reservation:
@@ -88,11 +198,99 @@ class ReservationService:
 
         timeslot = self.timeslot_repo.get_by_id(reservation.time_slot_id)
         # compare using timezone-aware now to avoid naive/aware comparison errors
-        if timeslot and timeslot.start_time - timezone.now() < timedelta(hours=1):
+        if timeslot and timeslot.start_time - timezone.now() < CANCEL_NOTICE:
             raise ValueError("Не може да отменяш по-малко от 1 час преди началото")
 
         reservation.cancel()
-        return self.reservation_repo.update(reservation)
+        with transaction.atomic():
+            # Conditional status change so a double cancel can't release the seat twice
+            if not self.reservation_repo.mark_cancelled(reservation.id):
+                raise ValueError("Резервацията вече е отменена")
+            self.timeslot_repo.release_seat(reservation.time_slot_id)
+            self._record_stats(cancelled=[reservation.time_slot_id])
+        return reservation
+
+    def cancel_reservations_in_range(self, user_id: int, start_date: date, end_date: date,
+                                     resource_id: Optional[int] = None) -> List[dict]:
+        """Cancel the user's own upcoming reservations on local days start_date..end_date.
+
+        Returns one outcome per reservation: {'reservation_id', 'timeslot_id', 'success'} plus 'error'
+        for reservations too close to their start to cancel.
+        """
+        self._check_range(start_date, end_date)
+        with transaction.atomic():
+            rows = self.reservation_repo.lock_active_in_range(start_date, end_date, user_id=user_id, resource_id=resource_id)
+            return self._cancel_rows(rows, enforce_notice=True)
+
+    def close_resource(self, admin_id: int, resource_id: int, start_date: date, end_date: date) -> dict:
+        """Maintenance: cancel every upcoming reservation on the resource in the range and close its slots."""
+        admin = self.user_repo.get_by_id(admin_id)
+        if not admin or not admin.is_admin():
+            raise ValueError("Само администратор може да затваря ресурс")
+        if not self.resource_repo.get_by_id(resource_id):
+            raise ValueError(f"Resource {resource_id} не съществува")
+        self._check_range(start_date, end_date)
+
+        if self.schedule_service is not None:
+            # Materialize first, so template slots for these days exist (and get closed) now
+            self.schedule_service.ensure_slots([resource_id], start_date, end_date)
+
+        with transaction.atomic():
+            rows = self.reservation_repo.lock_active_in_range(start_date, end_date, resource_id=resource_id)
+            results = self._cancel_rows(rows, enforce_notice=False)
+            # After the seats are released, so the re-open of full slots can't undo the close
+            closed = self.timeslot_repo.close_range(resource_id, start_date, end_date)
+            if self.stats_repo is not None:
+                self.stats_repo.refresh_slots([resource_id], start_date, end_date)
+        return {'results': results, 'closed_slots': closed}
+
+    def _cancel_rows(self, rows: List[Tuple[int, int, int, datetime]], enforce_notice: bool) -> List[dict]:
+        # Set-based: one UPDATE for the reservations, one for the seat counters of every touched slot
+        now = timezone.now()
+        results = []
+        cancelled = []
+        for reservation_id, user_id, timeslot_id, start_time in rows:
+            result = {'reservation_id': reservation_id, 'user_id': user_id, 'timeslot_id': timeslot_id}
+            if enforce_notice and start_time - now < CANCEL_NOTICE:
+                result.update(success=False, error="Не може да отменяш по-малко от 1 час преди началото")
+            else:
+                result['success'] = True
+                cancelled.append((reservation_id, timeslot_id))
+            results.append(result)
+
+        if cancelled:
+            # The rows are locked, so every one of them is still ACTIVE
+            if self.reservation_repo.mark_cancelled_many([r for r, _ in cancelled]) != len(cancelled):
+                raise ValueError("Резервациите се промениха по време на отмяната, опитай отново")
+            self.timeslot_repo.release_seats(dict(Counter(slot_id for _, slot_id in cancelled)))
+            self._record_stats(cancelled=[slot_id for _, slot_id in cancelled])
+        return results
+
+    def _record_stats(self, booked: List[int] = (), cancelled: List[int] = ()) -> None:
+        if self.stats_repo is not None:
+            self.stats_repo.record_changes(booked_slot_ids=booked, cancelled_slot_ids=cancelled)
+
+    @staticmethod
+    def _check_range(start_date: date, end_date: date) -> None:
+        if start_date > end_date:
+            raise ValueError("start_date трябва да е преди end_date")
+        if (end_date - start_date).days + 1 > MAX_MATERIALIZE_DAYS:
+            raise ValueError(f"Периодът не може да е повече от {MAX_MATERIALIZE_DAYS} дни")
+
+    def find_double_bookings(self, start_date: datetime, end_date: datetime) -> List[dict]:
+        """Audit: pairs of one user's active reservations that overlap in time, on days start_date..end_date."""
+        if start_date > end_date:
+            raise ValueError("start_date трябва да е преди end_date")
+
+        by_user = {}
+        for reservation_id, user_id, start_time, end_time in self.reservation_repo.list_active_intervals(start_date, end_date):
+            by_user.setdefault(user_id, []).append((start_time, end_time, reservation_id))
+
+        conflicts = []
+        for user_id, intervals in sorted(by_user.items()):
+            for first_id, second_id in IntervalTree(intervals).overlapping_pairs():
+                conflicts.append({'user_id': user_id, 'reservation_ids': sorted([first_id, second_id])})
+        return conflicts
 
     def get_reservation(self, reservation_id: int) -> Optional[ReservationEntity]:
         return self.reservation_repo.get_by_id(reservation_id)
\ No newline at end of file
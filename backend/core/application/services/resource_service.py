@@ -1,16 +1,23 @@
 from typing import List, Optional
 from core.domain.entities.resource import ResourceEntity
 from core.domain.entities.timeslot import TimeSlotEntity
-from core.application.interfaces.repositories import ResourceRepositoryInterface, TimeSlotRepositoryInterface
+from core.application.interfaces.repositories import (
+    ResourceRepositoryInterface,
+    TimeSlotRepositoryInterface,
+    DailyStatsRepositoryInterface
+)
 from datetime import datetime, timedelta
 from django.utils import timezone
 
 
 class ResourceService:
 
-    def __init__(self, resource_repo: ResourceRepositoryInterface, timeslot_repo: TimeSlotRepositoryInterface):
+    def __init__(self, resource_repo: ResourceRepositoryInterface, timeslot_repo: TimeSlotRepositoryInterface,
+                 stats_repo: Optional[DailyStatsRepositoryInterface] = None):
         self.resource_repo = resource_repo
         self.timeslot_repo = timeslot_repo
+        # Optional daily rollup whose offered slot counts follow generated slots
+        self.stats_repo = stats_repo
 
     def create_resource(self, name: str, type: str, max_bookings: int, color_code: str, owner_id: Optional[int] = None) -> ResourceEntity:
         entity = ResourceEntity(
@@ -30,6 +37,9 @@ class ResourceService:
     def list_resources(self, type_filter: Optional[str] = None, owner_id: Optional[int] = None) -> List[ResourceEntity]:
         return self.resource_repo.list_all(type_filter, owner_id)
 
+    def catalog_version(self) -> int:
+        return self.resource_repo.catalog_version()
+
     def update_resource(self, resource_id: int, name: str, type: str, max_bookings: int, color_code: str) -> ResourceEntity:
         entity = ResourceEntity(
             id=resource_id,
@@ -44,7 +54,7 @@ class ResourceService:
     def delete_resource(self, resource_id: int) -> bool:
         return self.resource_repo.delete(resource_id)
 
-    def generate_timeslots(self, resource_id: int, start_date: datetime, end_date: datetime, duration_minutes: int = 60):
+    def generate_timeslots(self, resource_id: int, start_date: datetime, end_date: datetime, duration_minutes: int = 60) -> dict:
         resource = self.resource_repo.get_by_id(resource_id)
         if not resource:
             raise ValueError(f"Resource {resource_id} не съществува")
@@ -52,6 +62,8 @@ class ResourceService:
         current_date = start_date.date()
         end = end_date.date()
 
+        # Plan every slot in memory first, then hand them to the repository in one bulk call
+        planned = []
         while current_date <= end:
             for hour in range(8, 22):
                 slot_start = datetime.combine(current_date, datetime.min.time().replace(hour=hour))
@@ -63,14 +75,17 @@ class ResourceService:
                 if timezone.is_naive(slot_end):
                     slot_end = timezone.make_aware(slot_end, timezone.get_current_timezone())
 
-                entity = TimeSlotEntity(
+                planned.append(TimeSlotEntity(
                     id=None,
                     resource_id=resource_id,
                     start_time=slot_start,
                     end_time=slot_end,
                     is_available=True
-                )
+                ))
 
-                self.timeslot_repo.create(entity)
+            current_date += timedelta(days=1)
 
-            current_date += timedelta(days=1)
\ No newline at end of file
+        created, skipped = self.timeslot_repo.bulk_create(planned)
+        if created and self.stats_repo is not None:
+            self.stats_repo.refresh_slots([resource_id], start_date.date(), end)
+        return {'created': created, 'skipped': skipped}
@@ -0,0 +1,124 @@
+from typing import Dict, List, Optional, Tuple
+from datetime import date, datetime, time, timedelta
+from django.db import transaction
+from django.utils import timezone
+from core.domain.entities.schedule import ScheduleTemplateEntity, ScheduleExceptionEntity
+from core.domain.entities.timeslot import TimeSlotEntity
+from core.application.interfaces.repositories import (
+    ScheduleRepositoryInterface,
+    TimeSlotRepositoryInterface,
+    ResourceRepositoryInterface,
+    DailyStatsRepositoryInterface
+)
+
+# Upper bound for a single on-demand materialization so one request can't fill years of slots
+MAX_MATERIALIZE_DAYS = 92
+
+
+class ScheduleService:
+
+    def __init__(
+            self,
+            schedule_repo: ScheduleRepositoryInterface,
+            timeslot_repo: TimeSlotRepositoryInterface,
+            resource_repo: ResourceRepositoryInterface,
+            stats_repo: Optional[DailyStatsRepositoryInterface] = None
+    ):
+        self.schedule_repo = schedule_repo
+        self.timeslot_repo = timeslot_repo
+        self.resource_repo = resource_repo
+        # Optional daily rollup that gets rows for newly materialized days
+        self.stats_repo = stats_repo
+
+    def get_template(self, resource_id: int) -> Optional[ScheduleTemplateEntity]:
+        return self.schedule_repo.get_template(resource_id)
+
+    def set_template(self, resource_id: int, weekly_hours: Dict[int, Tuple[time, time]], slot_duration_minutes: int = 60) -> ScheduleTemplateEntity:
+        if not self.resource_repo.get_by_id(resource_id):
+            raise ValueError(f"Resource {resource_id} не съществува")
+
+        entity = ScheduleTemplateEntity(
+            id=None,
+            resource_id=resource_id,
+            weekly_hours=weekly_hours,
+            slot_duration_minutes=slot_duration_minutes
+        )
+        return self.schedule_repo.save_template(entity)
+
+    def add_exception(self, resource_id: Optional[int], day: date, is_closed: bool = True,
+                      open_time: Optional[time] = None, close_time: Optional[time] = None,
+                      reason: Optional[str] = None) -> ScheduleExceptionEntity:
+        if resource_id is not None and not self.resource_repo.get_by_id(resource_id):
+            raise ValueError(f"Resource {resource_id} не съществува")
+
+        entity = ScheduleExceptionEntity(
+            id=None,
+            resource_id=resource_id,
+            date=day,
+            is_closed=is_closed,
+            open_time=open_time,
+            close_time=close_time,
+            reason=reason
+        )
+        return self.schedule_repo.add_exception(entity)
+
+    def ensure_slots(self, resource_ids: Optional[List[int]], start_date: date, end_date: date) -> int:
+        """Create template slots for the days in [start_date, end_date] that were never materialized.
+
+        Resources without a template are left alone. Returns the number of created slots.
+        """
+        if start_date > end_date:
+            raise ValueError("start_date трябва да е преди end_date")
+        day_count = (end_date - start_date).days + 1
+        if day_count > MAX_MATERIALIZE_DAYS:
+            raise ValueError(f"Периодът не може да е повече от {MAX_MATERIALIZE_DAYS} дни")
+
+        templates = self.schedule_repo.list_templates(resource_ids)
+        if not templates:
+            return 0
+
+        template_ids = [t.resource_id for t in templates]
+        done = self.schedule_repo.list_materialized_days(template_ids, start_date, end_date)
+        days = [start_date + timedelta(days=i) for i in range(day_count)]
+        pending = [(t, day) for t in templates for day in days if (t.resource_id, day) not in done]
+        if not pending:
+            return 0
+
+        holidays = {}
+        overrides = {}
+        for exception in self.schedule_repo.list_exceptions(template_ids, start_date, end_date):
+            if exception.resource_id is None:
+                holidays[exception.date] = exception
+            else:
+                overrides.setdefault(exception.resource_id, {})[exception.date] = exception
+
+        tz = timezone.get_current_timezone()
+        planned = []
+        for template, day in pending:
+            # A resource-specific exception wins over a gym-wide holiday on the same date
+            exceptions = {**holidays, **overrides.get(template.resource_id, {})}
+            for slot_start, slot_end in template.plan_slots(day, exceptions):
+                planned.append(TimeSlotEntity(
+                    id=None,
+                    resource_id=template.resource_id,
+                    start_time=timezone.make_aware(slot_start, tz),
+                    end_time=timezone.make_aware(slot_end, tz),
+                    is_available=True
+                ))
+
+        with transaction.atomic():
+            created = 0
+            if planned:
+                created, skipped = self.timeslot_repo.bulk_create(planned)
+            self.schedule_repo.mark_materialized([(t.resource_id, day) for t, day in pending])
+            if created and self.stats_repo is not None:
+                self.stats_repo.refresh_slots(sorted({slot.resource_id for slot in planned}), start_date, end_date)
+        return created
+
+    def ensure_slot_at(self, resource_id: int, start_time: datetime) -> Optional[TimeSlotEntity]:
+        # Materialize the day of start_time (local) and return the matching slot, if the template has one
+        day = timezone.localtime(start_time).date() if timezone.is_aware(start_time) else start_time.date()
+        self.ensure_slots([resource_id], day, day)
+        if timezone.is_naive(start_time):
+            start_time = timezone.make_aware(start_time, timezone.get_current_timezone())
+        return self.timeslot_repo.get_by_start(resource_id, start_time)
@@ -0,0 +1,143 @@
+from itertools import chain
+from typing import List, Optional
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from django.utils import timezone
+from core.application.interfaces.repositories import (
+    DailyStatsRepositoryInterface,
+    ResourceRepositoryInterface,
+    TimeSlotRepositoryInterface
+)
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - numpy is listed in requirements.txt
+    np = None
+
+# Longest range one utilization report may cover
+MAX_UTILIZATION_DAYS = 366
+# Hour-of-week buckets, Monday 00:00 local time = 0
+HOURS_PER_WEEK = 7 * 24
+# 1970-01-01 was a Thursday: hour 0 of the epoch is hour 72 of its (Monday-based) week
+_EPOCH_HOUR_OF_WEEK = 3 * 24
+# Hours reported as each resource's peak
+PEAK_HOURS = 3
+
+
+class UtilizationService:
+    """
+    Occupancy (booked seats / offered seats) per resource, overall and by local hour of week.
+
+    Slots are streamed as three integer columns and aggregated with NumPy bincounts, so the
+    cost is one database scan plus a few vector passes, however many resources are involved.
+    A slot counts towards the hour in which it starts.
+
+    The scan dominates: on SQLite a year of 200 resources (~1M slots) takes about 2 s, most of it
+    inside the driver handing out the rows. Sub-second reports at that size need an hourly
+    pre-aggregate, like the daily rollup, rather than a faster per-slot fetch.
+    """
+
+    def __init__(self, timeslot_repo: TimeSlotRepositoryInterface, resource_repo: ResourceRepositoryInterface,
+                 stats_repo: Optional[DailyStatsRepositoryInterface] = None):
+        self.timeslot_repo = timeslot_repo
+        self.resource_repo = resource_repo
+        # Optional daily rollup backing get_daily_stats
+        self.stats_repo = stats_repo
+
+    def get_utilization(self, start_date: date, end_date: date, resource_ids: Optional[List[int]] = None,
+                        type_filter: Optional[str] = None) -> dict:
+        """Returns {'resources', 'slots', 'capacity', 'booked', 'occupancy', 'peak_hours', 'heatmap'}.
+
+        Every value except 'resources' is a list with one entry per resource; 'heatmap' entries are
+        7 x 24 occupancy grids (weekday, hour) with None where the resource offered no seats.
+        """
+        if np is None:
+            raise RuntimeError("UtilizationService изисква NumPy (pip install numpy)")
+        resources, ids = self._select(start_date, end_date, resource_ids, type_filter)
+
+        rows = self.timeslot_repo.list_utilization_rows(ids, start_date, end_date)
+        columns = np.fromiter(chain.from_iterable(rows), dtype=np.int64).reshape(-1, 3)
+        resource_col, epoch, booked_col = columns[:, 0], columns[:, 1], columns[:, 2]
+
+        resource_ids_sorted = np.array([r.id for r in resources], dtype=np.int64)
+        max_bookings = np.array([r.max_bookings for r in resources], dtype=np.int64)
+        position = np.searchsorted(resource_ids_sorted, resource_col)
+
+        local_epoch = epoch + self._utc_offsets(epoch, start_date, end_date)
+        hour_of_week = (local_epoch // 3600 + _EPOCH_HOUR_OF_WEEK) % HOURS_PER_WEEK
+        bucket = position * HOURS_PER_WEEK + hour_of_week
+
+        size = len(resources) * HOURS_PER_WEEK
+        booked = np.bincount(bucket, weights=booked_col, minlength=size).reshape(-1, HOURS_PER_WEEK)
+        capacity = np.bincount(bucket, weights=max_bookings[position], minlength=size).reshape(-1, HOURS_PER_WEEK)
+        slots = np.bincount(position, minlength=len(resources))
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            heatmap = np.where(capacity > 0, booked / capacity, np.nan)
+            total_capacity = capacity.sum(axis=1)
+            total_booked = booked.sum(axis=1)
+            occupancy = np.where(total_capacity > 0, total_booked / total_capacity, np.nan)
+
+        # Highest occupancy first; hours without capacity sort last and are dropped
+        ranked = np.argsort(-np.nan_to_num(heatmap, nan=-1.0), axis=1, kind='stable')[:, :PEAK_HOURS]
+
+        return {
+            'resources': resources,
+            'slots': slots.tolist(),
+            'capacity': total_capacity.astype(np.int64).tolist(),
+            'booked': total_booked.astype(np.int64).tolist(),
+            'occupancy': [None if np.isnan(value) else round(float(value), 4) for value in occupancy],
+            'peak_hours': [
+                [
+                    {'weekday': int(hour) // 24, 'hour': int(hour) % 24, 'occupancy': round(float(heatmap[i, hour]), 4)}
+                    for hour in ranked[i] if not np.isnan(heatmap[i, hour])
+                ]
+                for i in range(len(resources))
+            ],
+            'heatmap': [
+                [[None if np.isnan(value) else round(float(value), 4) for value in day] for day in grid]
+                for grid in heatmap.reshape(-1, 7, 24)
+            ]
+        }
+
+    def get_daily_stats(self, start_date: date, end_date: date, resource_ids: Optional[List[int]] = None,
+                        type_filter: Optional[str] = None) -> dict:
+        """Returns {'resources', 'days'}: the precomputed per-day rollup rows, one per resource and active day."""
+        if self.stats_repo is None:
+            raise RuntimeError("UtilizationService няма конфигурирана дневна статистика")
+        resources, ids = self._select(start_date, end_date, resource_ids, type_filter)
+        return {'resources': resources, 'days': self.stats_repo.list_range(start_date, end_date, ids)}
+
+    def _select(self, start_date: date, end_date: date, resource_ids: Optional[List[int]], type_filter: Optional[str]):
+        if start_date > end_date:
+            raise ValueError("start_date трябва да е преди end_date")
+        if (end_date - start_date).days + 1 > MAX_UTILIZATION_DAYS:
+            raise ValueError(f"Периодът не може да е повече от {MAX_UTILIZATION_DAYS} дни")
+
+        resources = self.resource_repo.list_all(type_filter)
+        if resource_ids is not None:
+            missing = set(resource_ids) - {r.id for r in resources}
+            if missing:
+                raise ValueError(f"Resource {min(missing)} не съществува")
+            wanted = set(resource_ids)
+            resources = [r for r in resources if r.id in wanted]
+        resources.sort(key=lambda r: r.id)
+        # No filter at all reads every resource without a long IN list
+        return resources, None if resource_ids is None and not type_filter else [r.id for r in resources]
+
+    @staticmethod
+    def _utc_offsets(epoch, start_date: date, end_date: date):
+        # Local UTC offset (seconds) of every timestamp: find where the offset changes in the range,
+        # then look each timestamp up with one vectorized binary search
+        tz = timezone.get_current_timezone()
+        first = datetime.combine(start_date - timedelta(days=1), datetime.min.time(), tzinfo=dt_timezone.utc)
+        hours = int((end_date - start_date).days + 3) * 24
+        changes = []
+        offsets = []
+        for h in range(hours):
+            instant = first + timedelta(hours=h)
+            offset = int(instant.astimezone(tz).utcoffset().total_seconds())
+            if not offsets or offset != offsets[-1]:
+                changes.append(int(instant.timestamp()))
+                offsets.append(offset)
+        index = np.searchsorted(np.array(changes, dtype=np.int64), epoch, side='right') - 1
+        return np.array(offsets, dtype=np.int64)[np.clip(index, 0, None)]
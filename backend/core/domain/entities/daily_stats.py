@@ -0,0 +1,18 @@
+from dataclasses import dataclass
+from datetime import date
+from typing import Optional
+
+
+@dataclass(slots=True)
+class DailyResourceStatsEntity:
+    id: Optional[int]
+    resource_id: int
+    date: date
+    slots_offered: int = 0
+    bookings: int = 0
+    cancellations: int = 0
+    peak_occupancy: int = 0
+
+    @property
+    def active_bookings(self) -> int:
+        return self.bookings - self.cancellations
@@ -0,0 +1,49 @@
+"""
+Бизнес правила:
+- Експортът се изпълнява асинхронно от worker процес (run_export_jobs)
+- Без user_ids експортът обхваща всички членове с активни резервации в периода
+- Само завършен (DONE) експорт може да бъде изтеглен
+"""
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import List, Optional
+
+EXPORT_KINDS = ('html', 'ics')
+EXPORT_STATUSES = ('PENDING', 'RUNNING', 'DONE', 'FAILED')
+
+
+@dataclass(slots=True)
+class ExportJobEntity:
+    id: Optional[int]
+    requested_by_id: int
+    kind: str
+    start_date: date
+    end_date: date
+    user_ids: Optional[List[int]] = None
+    status: str = 'PENDING'
+    file_path: Optional[str] = None
+    error: Optional[str] = None
+    created_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    attempt: int = 0
+    heartbeat_at: Optional[datetime] = None
+
+    def __post_init__(self):
+        self._validate()
+
+    def _validate(self):
+        if self.kind not in EXPORT_KINDS:
+            raise ValueError(f"kind трябва да е един от {', '.join(EXPORT_KINDS)}")
+        if self.status not in EXPORT_STATUSES:
+            raise ValueError(f"Невалиден статус '{self.status}'")
+        if self.start_date > self.end_date:
+            raise ValueError("start_date трябва да е преди end_date")
+        if self.user_ids is not None and not self.user_ids:
+            raise ValueError("user_ids не може да е празен списък")
+
+    def is_ready(self) -> bool:
+        return self.status == 'DONE' and bool(self.file_path)
+
+    def is_finished(self) -> bool:
+        return self.status in ('DONE', 'FAILED')
@@ -1,9 +1,9 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Any, Optional
 
 
-@dataclass
+@dataclass(slots=True)
 class ReservationEntity:
 
     id: Optional[int]
@@ -13,10 +13,32 @@ class ReservationEntity:
     status: str = 'ACTIVE'  # ACTIVE or CANCELLED
     notes: Optional[str] = None
     created_at: Optional[datetime] = None
+    # Related ORM objects, attached only by repositories that load them (export services)
+    time_slot: Any = field(default=None, repr=False, compare=False)
+    resource: Any = field(default=None, repr=False, compare=False)
+    user: Any = field(default=None, repr=False, compare=False)
 
     def __post_init__(self):
         self._validate()
 
+    @classmethod
+    def from_row(cls, id: int, user_id: int, resource_id: int, time_slot_id: int, status: str = 'ACTIVE',
+                 notes: Optional[str] = None, created_at: Optional[datetime] = None) -> 'ReservationEntity':
+        # Trusted constructor for rows loaded from the database: they were validated on write
+        entity = cls.__new__(cls)
+        entity.id = id
+        entity.user_id = user_id
+        entity.resource_id = resource_id
+        entity.time_slot_id = time_slot_id
+        entity.status = status
+        # Blank notes still read back as None, as through the validating constructor
+        entity.notes = notes if notes is None or notes.strip() else None
+        entity.created_at = created_at
+        entity.time_slot = None
+        entity.resource = None
+        entity.user = None
+        return entity
+
     def _validate(self):
         # Валидация на ID-та
         if self.user_id <= 0:
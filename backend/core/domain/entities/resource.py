@@ -2,7 +2,7 @@ from dataclasses import dataclass
 from datetime import datetime
 from typing import Optional
 
-@dataclass
+@dataclass(slots=True)
 class ResourceEntity:
     id: Optional[int]
     name: str
@@ -15,6 +15,20 @@ class ResourceEntity:
     def __post_init__(self):
         self._validate()
 
+    @classmethod
+    def from_row(cls, id: int, name: str, type: str, max_bookings: int, color_code: str,
+                 created_at: Optional[datetime] = None, owner_id: Optional[int] = None) -> 'ResourceEntity':
+        # Trusted constructor for rows loaded from the database: they were validated on write
+        entity = cls.__new__(cls)
+        entity.id = id
+        entity.name = name
+        entity.type = type
+        entity.max_bookings = max_bookings
+        entity.color_code = color_code
+        entity.created_at = created_at
+        entity.owner_id = owner_id
+        return entity
+
     def _validate(self):
         #Name validation
         if not self.name or len(self.name.strip()) < 2:
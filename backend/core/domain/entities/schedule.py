@@ -0,0 +1,99 @@
+"""
+Бизнес правила:
+- Всеки Resource може да има един ScheduleTemplate (1:1)
+- Шаблонът задава работно време за всеки ден от седмицата и дължина на слота
+- ScheduleException променя или затваря конкретна дата; без resource_id важи за цялата зала (празник)
+- Слотовете се създават от шаблона едва когато датата бъде поискана
+"""
+from dataclasses import dataclass, field
+from datetime import date, datetime, time, timedelta
+from typing import Dict, List, Optional, Tuple
+
+
+@dataclass
+class ScheduleExceptionEntity:
+    id: Optional[int]
+    resource_id: Optional[int]  # None = празник за всички ресурси
+    date: date
+    is_closed: bool = True
+    open_time: Optional[time] = None
+    close_time: Optional[time] = None
+    reason: Optional[str] = None
+
+    def __post_init__(self):
+        self._validate()
+
+    def _validate(self):
+        if self.resource_id is not None and self.resource_id <= 0:
+            raise ValueError("resource_id трябва да е положително число")
+
+        if not self.is_closed:
+            if self.open_time is None or self.close_time is None:
+                raise ValueError("open_time и close_time са задължителни, когато денят не е затворен")
+            if self.open_time >= self.close_time:
+                raise ValueError("open_time трябва да е преди close_time")
+
+    def is_holiday(self) -> bool:
+        return self.resource_id is None and self.is_closed
+
+
+@dataclass
+class ScheduleTemplateEntity:
+    id: Optional[int]
+    resource_id: int
+    weekly_hours: Dict[int, Tuple[time, time]] = field(default_factory=dict)  # 0 = понеделник
+    slot_duration_minutes: int = 60
+
+    def __post_init__(self):
+        self._validate()
+
+    def _validate(self):
+        if self.resource_id <= 0:
+            raise ValueError("resource_id трябва да е положително число")
+
+        if self.slot_duration_minutes < 15:
+            raise ValueError("slot_duration_minutes трябва да е поне 15 минути")
+        if self.slot_duration_minutes > 24 * 60:
+            raise ValueError("slot_duration_minutes не може да е повече от 24 часа")
+
+        for weekday, (open_time, close_time) in self.weekly_hours.items():
+            if weekday not in range(7):
+                raise ValueError(f"Невалиден ден от седмицата: {weekday}")
+            if open_time >= close_time:
+                raise ValueError("Началото на работното време трябва да е преди края")
+
+    @classmethod
+    def default(cls, resource_id: int) -> 'ScheduleTemplateEntity':
+        # Same opening hours generate_timeslots uses: every day 08:00-22:00, one hour per slot
+        return cls(
+            id=None,
+            resource_id=resource_id,
+            weekly_hours={weekday: (time(8, 0), time(22, 0)) for weekday in range(7)},
+            slot_duration_minutes=60
+        )
+
+    def hours_for(self, day: date, exceptions: Optional[Dict[date, ScheduleExceptionEntity]] = None) -> Optional[Tuple[time, time]]:
+        exception = (exceptions or {}).get(day)
+        if exception is not None:
+            if exception.is_closed:
+                return None
+            return exception.open_time, exception.close_time
+        return self.weekly_hours.get(day.weekday())
+
+    def plan_slots(self, day: date, exceptions: Optional[Dict[date, ScheduleExceptionEntity]] = None) -> List[Tuple[datetime, datetime]]:
+        # Returns naive (start, end) pairs; the caller decides the timezone
+        hours = self.hours_for(day, exceptions)
+        if hours is None:
+            return []
+
+        step = timedelta(minutes=self.slot_duration_minutes)
+        current = datetime.combine(day, hours[0])
+        close = datetime.combine(day, hours[1])
+        slots = []
+        while current + step <= close:
+            slots.append((current, current + step))
+            current += step
+        return slots
+
+    def __str__(self) -> str:
+        return f"Schedule for resource #{self.resource_id} ({self.slot_duration_minutes} min)"
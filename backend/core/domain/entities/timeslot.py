@@ -11,17 +11,31 @@ from django.utils import timezone
 from typing import Optional
 
 
-@dataclass
+@dataclass(slots=True)
 class TimeSlotEntity:
     id: Optional[int]
     resource_id: int  # FK към Resource
     start_time: datetime
     end_time: datetime
     is_available: bool = True #open timeslot by default
+    active_count: int = 0  # active reservations, maintained by the repository
 
     def __post_init__(self):
         self._validate()
 
+    @classmethod
+    def from_row(cls, id: int, resource_id: int, start_time: datetime, end_time: datetime,
+                 is_available: bool = True, active_count: int = 0) -> 'TimeSlotEntity':
+        # Trusted constructor for rows loaded from the database: they were validated on write
+        entity = cls.__new__(cls)
+        entity.id = id
+        entity.resource_id = resource_id
+        entity.start_time = start_time
+        entity.end_time = end_time
+        entity.is_available = is_available
+        entity.active_count = active_count
+        return entity
+
     def _validate(self):
         if self.start_time >= self.end_time:
             raise ValueError("start_time трябва да е преди end_time")
@@ -36,6 +50,9 @@ class TimeSlotEntity:
         if self.resource_id <= 0:
             raise ValueError("resource_id трябва да е положително число")
 
+        if self.active_count < 0:
+            raise ValueError("active_count не може да е отрицателно")
+
     def is_in_past(self, current_time: Optional[datetime] = None) -> bool:
         if current_time is None:
             current_time = timezone.now()
@@ -3,7 +3,7 @@ from datetime import datetime
 from typing import Optional
 
 
-@dataclass
+@dataclass(slots=True)
 class UserEntity:
     id: Optional[int]
     email: str
@@ -16,6 +16,20 @@ class UserEntity:
     def __post_init__(self):
         self._validate()
 
+    @classmethod
+    def from_row(cls, id: int, email: str, first_name: str, last_name: str, password_hash: str, role: str,
+                 created_at: Optional[datetime] = None) -> 'UserEntity':
+        # Trusted constructor for rows loaded from the database: they were validated on write
+        entity = cls.__new__(cls)
+        entity.id = id
+        entity.email = email
+        entity.first_name = first_name
+        entity.last_name = last_name
+        entity.password_hash = password_hash
+        entity.role = role
+        entity.created_at = created_at
+        return entity
+
     def _validate(self):
         if self.id is None:
             # Email validation
@@ -0,0 +1,70 @@
+"""
+Static interval tree for overlap queries over many half-open [start, end) intervals.
+
+Built once in O(n log n) from the intervals sorted by start; each node of the implicit
+balanced tree (the middle of a sorted sub-range) also stores the largest end in its
+sub-range, so whole sub-trees that end before the query are skipped. A query costs
+O(log n + k) for k hits, and all overlapping pairs of n intervals cost O(n log n + k)
+instead of comparing every pair.
+"""
+from typing import Any, Generic, Iterable, List, Tuple, TypeVar
+
+K = TypeVar('K')  # comparable bound, e.g. datetime
+V = TypeVar('V')
+
+
+class IntervalTree(Generic[K, V]):
+
+    def __init__(self, intervals: Iterable[Tuple[K, K, V]]):
+        items = sorted(intervals, key=lambda item: (item[0], item[1]))
+        self._starts: List[K] = [item[0] for item in items]
+        self._ends: List[K] = [item[1] for item in items]
+        self._values: List[V] = [item[2] for item in items]
+        self._max_end: List[Any] = list(self._ends)
+        if items:
+            self._build(0, len(items) - 1)
+
+    def __len__(self) -> int:
+        return len(self._starts)
+
+    def _build(self, lo: int, hi: int) -> K:
+        mid = (lo + hi) // 2
+        best = self._ends[mid]
+        if lo < mid:
+            best = max(best, self._build(lo, mid - 1))
+        if mid < hi:
+            best = max(best, self._build(mid + 1, hi))
+        self._max_end[mid] = best
+        return best
+
+    def overlapping(self, start: K, end: K) -> List[Tuple[K, K, V]]:
+        """Every stored interval intersecting [start, end), ordered by start."""
+        return [(self._starts[i], self._ends[i], self._values[i]) for i in self._overlapping_indexes(start, end, 0)]
+
+    def _overlapping_indexes(self, start: K, end: K, first: int) -> List[int]:
+        # Indexes >= first whose interval intersects [start, end)
+        found = []
+        stack = [(0, len(self._starts) - 1)] if self._starts else []
+        while stack:
+            lo, hi = stack.pop()
+            if lo > hi:
+                continue
+            mid = (lo + hi) // 2
+            if self._max_end[mid] <= start or hi < first:
+                continue
+            # Right half starts at or after starts[mid]; it can only matter if that is before end
+            if self._starts[mid] < end:
+                stack.append((mid + 1, hi))
+                if mid >= first and self._ends[mid] > start:
+                    found.append(mid)
+            stack.append((lo, mid - 1))
+        return sorted(found)
+
+    def overlapping_pairs(self) -> List[Tuple[V, V]]:
+        """All pairs of stored intervals that intersect, each pair once, earlier start first."""
+        pairs = []
+        for i in range(len(self._starts)):
+            # Later intervals that start before this one ends; earlier ones were paired already
+            for j in self._overlapping_indexes(self._starts[i], self._ends[i], i + 1):
+                pairs.append((self._values[i], self._values[j]))
+        return pairs
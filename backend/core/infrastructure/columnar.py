@@ -0,0 +1,108 @@
+"""
+Dependency-free writer for NumPy .npz archives.
+
+An .npz file is a zip of .npy arrays, and .npy is a short text header followed by
+raw little-endian values, so both can be produced with the standard library.
+Columns are spooled to temporary files while rows stream in, which keeps memory
+flat; the row count the .npy header needs is only known once the rows are done.
+numpy.load() reads the result; NumPy itself is never imported here.
+"""
+import shutil
+import struct
+import sys
+import tempfile
+import zipfile
+from array import array
+from datetime import datetime, timedelta, timezone as dt_timezone
+from typing import BinaryIO, Dict, Iterable, List, Optional
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+_MICROSECOND = timedelta(microseconds=1)
+_LITTLE_ENDIAN = sys.byteorder == 'little'
+
+
+def _npy_header(descr: str, length: int) -> bytes:
+    # Format version 1.0: magic, version, header length, then a dict literal padded to 64 bytes
+    header = "{'descr': '%s', 'fortran_order': False, 'shape': (%d,), }" % (descr, length)
+    header += ' ' * (-(10 + len(header) + 1) % 64) + '\n'
+    return b'\x93NUMPY\x01\x00' + struct.pack('<H', len(header)) + header.encode('latin1')
+
+
+def to_microseconds(value: Optional[datetime]) -> int:
+    # datetime64[us] since the epoch; NaT for missing values
+    if value is None:
+        return -2 ** 63
+    return (value - _EPOCH) // _MICROSECOND
+
+
+class _Column:
+
+    def __init__(self, name: str, typecode: str, descr: str):
+        self.name = name
+        self.typecode = typecode
+        self.descr = descr
+        self.spool = tempfile.TemporaryFile()
+        self.length = 0
+
+    def extend(self, values: List[int]) -> None:
+        chunk = array(self.typecode, values)
+        if not _LITTLE_ENDIAN:
+            chunk.byteswap()
+        chunk.tofile(self.spool)
+        self.length += len(chunk)
+
+    def write_to(self, archive: zipfile.ZipFile) -> None:
+        self.spool.seek(0)
+        with archive.open(f'{self.name}.npy', 'w', force_zip64=True) as member:
+            member.write(_npy_header(self.descr, self.length))
+            shutil.copyfileobj(self.spool, member)
+        self.spool.close()
+
+
+class NpzWriter:
+    """
+    Column-oriented .npz builder.
+
+    Column kinds: 'int' (int64), 'datetime' (datetime64[us], values are aware datetimes) and
+    'category' (int32 codes plus a '<name>_labels' unicode array, for repetitive strings).
+    """
+
+    def __init__(self, columns: Dict[str, str]):
+        self.kinds = columns
+        self.columns = {}
+        self.labels: Dict[str, Dict[str, int]] = {}
+        for name, kind in columns.items():
+            if kind == 'category':
+                self.columns[name] = _Column(name, 'i', '<i4')
+                self.labels[name] = {}
+            elif kind in ('int', 'datetime'):
+                self.columns[name] = _Column(name, 'q', '<M8[us]' if kind == 'datetime' else '<i8')
+            else:
+                raise ValueError(f"Непознат тип колона '{kind}'")
+
+    def append_rows(self, rows: Iterable[tuple]) -> None:
+        """Append a chunk of rows whose values are in the order the columns were declared."""
+        by_column = list(zip(*rows))
+        if not by_column:
+            return
+        for (name, kind), values in zip(self.kinds.items(), by_column):
+            if kind == 'datetime':
+                values = [to_microseconds(v) for v in values]
+            elif kind == 'category':
+                codes = self.labels[name]
+                values = [codes.setdefault(v, len(codes)) for v in values]
+            self.columns[name].extend(values)
+
+    def write(self, output: BinaryIO) -> int:
+        """Write the archive to output (seekable or not); returns the number of rows."""
+        length = 0
+        with zipfile.ZipFile(output, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+            for name, column in self.columns.items():
+                length = column.length
+                column.write_to(archive)
+            for name, codes in self.labels.items():
+                labels = list(codes)
+                width = max([len(label) for label in labels] + [1])
+                data = b''.join(label.encode('utf-32-le').ljust(4 * width, b'\0') for label in labels)
+                archive.writestr(f'{name}_labels.npy', _npy_header(f'<U{width}', len(labels)) + data)
+        return length
@@ -0,0 +1,48 @@
+"""
+Request-scoped identity map shared by the repositories.
+
+Within one request every get_by_id for the same row returns the same entity
+without another query. Outside a scope (management commands, shell, plain
+tests) nothing is cached. Repositories evict an entry whenever they write the
+row, so a later read in the same request sees the new state.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+_current: ContextVar[Optional[Dict[Tuple[str, int], Any]]] = ContextVar('identity_map', default=None)
+
+
+@contextmanager
+def identity_scope() -> Iterator[None]:
+    token = _current.set({})
+    try:
+        yield
+    finally:
+        _current.reset(token)
+
+
+def get(kind: str, pk: Optional[int]) -> Optional[Any]:
+    entries = _current.get()
+    if entries is None or pk is None:
+        return None
+    return entries.get((kind, pk))
+
+
+def put(kind: str, entity: Any) -> Any:
+    entries = _current.get()
+    if entries is not None and entity is not None and entity.id is not None:
+        entries[(kind, entity.id)] = entity
+    return entity
+
+
+def evict(kind: str, pk: Optional[int]) -> None:
+    entries = _current.get()
+    if entries is not None:
+        entries.pop((kind, pk), None)
+
+
+def clear() -> None:
+    entries = _current.get()
+    if entries is not None:
+        entries.clear()
@@ -1,17 +1,132 @@
-from typing import List, Optional
-from datetime import datetime
+import time as time_module
+from typing import Dict, Iterator, List, Optional, Sequence, Set, Tuple
+from datetime import date, datetime, time, timedelta
 from core.application.interfaces.repositories import (
     UserRepositoryInterface,
     ResourceRepositoryInterface,
     TimeSlotRepositoryInterface,
-    ReservationRepositoryInterface
+    ReservationRepositoryInterface,
+    ScheduleRepositoryInterface,
+    ExportJobRepositoryInterface,
+    DailyStatsRepositoryInterface
 )
 from core.domain.entities.user import UserEntity
 from core.domain.entities.resource import ResourceEntity
 from core.domain.entities.timeslot import TimeSlotEntity
 from core.domain.entities.reservation import ReservationEntity
-from core.models import User, Resource, TimeSlot, Reservation
-from django.db import IntegrityError
+from core.domain.entities.schedule import ScheduleTemplateEntity, ScheduleExceptionEntity
+from core.domain.entities.export_job import ExportJobEntity
+from core.domain.entities.daily_stats import DailyResourceStatsEntity
+from core.infrastructure.persistence import identity_map
+from core.models import (
+    User, Resource, TimeSlot, Reservation, ScheduleTemplate, ScheduleException, MaterializedDay, ExportJob,
+    DailyResourceStats
+)
+from django.db.models import (
+    Q, F, Case, When, Value, Subquery, Exists, OuterRef, Count, Max, ExpressionWrapper, DurationField,
+    Func, BigIntegerField
+)
+from django.db.models.functions import Greatest, TruncDate
+from django.utils import timezone
+from django.db import IntegrityError, NotSupportedError, connections, transaction
+from django.core.cache import cache
+
+
+def local_day_range(start_date, end_date) -> Tuple[datetime, datetime]:
+    """Half-open [local midnight of start_date, local midnight after end_date) as aware datetimes.
+
+    Comparing start_time against these bounds keeps date filters index-friendly, unlike __date
+    lookups which wrap the column in a cast, and uses the Europe/Sofia day instead of UTC.
+    """
+    tz = timezone.get_current_timezone()
+
+    def as_local_date(value):
+        if isinstance(value, datetime):
+            return timezone.localtime(value, tz).date() if timezone.is_aware(value) else value.date()
+        return value
+
+    start_day = as_local_date(start_date)
+    end_day = as_local_date(end_date)
+    return (
+        timezone.make_aware(datetime.combine(start_day, time.min), tz),
+        timezone.make_aware(datetime.combine(end_day + timedelta(days=1), time.min), tz)
+    )
+
+
+RESOURCE_CATALOG_VERSION_KEY = 'resources:version'
+RESOURCE_CATALOG_TIMEOUT = 60 * 60 * 24
+
+
+def _new_catalog_version() -> int:
+    # Millisecond timestamp, so a flushed or restarted cache never reuses an old version (or ETag)
+    return int(time_module.time() * 1000)
+
+
+def resource_catalog_version() -> int:
+    version = cache.get(RESOURCE_CATALOG_VERSION_KEY)
+    if version is None:
+        cache.add(RESOURCE_CATALOG_VERSION_KEY, _new_catalog_version(), timeout=None)
+        version = cache.get(RESOURCE_CATALOG_VERSION_KEY)
+    return version
+
+
+def fingerprint(queryset) -> str:
+    """Cheap change marker for a listing: row count plus newest updated_at.
+
+    Any insert or delete changes the count and every write bumps updated_at, so the value
+    changes whenever a row of the queryset does; used to build ETags.
+    """
+    stats = queryset.order_by().aggregate(total=Count('id'), latest=Max('updated_at'))
+    latest = stats['latest']
+    return f"{stats['total']}.{int(latest.timestamp() * 1_000_000) if latest else 0}"
+
+
+class EpochSeconds(Func):
+    """Whole seconds since 1970-01-01 UTC, computed by the database so rows load as plain integers.
+
+    Only the vendors listed in `vendors` are supported; callers check it and fall back to
+    converting fetched datetimes in Python elsewhere.
+    """
+    output_field = BigIntegerField()
+    vendors = ('sqlite', 'postgresql', 'mysql')
+
+    @property
+    def convert_value(self):
+        # Every variant casts to an integer in SQL, so the per-row int() of BigIntegerField is skipped;
+        # on a million-row scan that cast alone costs as much as fetching the rows
+        return self._convert_value_noop
+
+    def as_sql(self, compiler, connection, **extra_context):
+        raise NotSupportedError(f"EpochSeconds is not implemented for {connection.vendor}")
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        if connection.Database.sqlite_version_info >= (3, 38, 0):
+            # Native since 3.38 and about a third faster than formatting the value through strftime
+            return super().as_sql(compiler, connection, template='unixepoch(%(expressions)s)', **extra_context)
+        # %%%% survives the template formatting as the %% a literal % needs in the final SQL
+        return super().as_sql(compiler, connection, template="CAST(strftime('%%%%s', %(expressions)s) AS INTEGER)", **extra_context)
+
+    def as_postgresql(self, compiler, connection, **extra_context):
+        return super().as_sql(compiler, connection, template='CAST(EXTRACT(EPOCH FROM %(expressions)s) AS BIGINT)', **extra_context)
+
+    def as_mysql(self, compiler, connection, **extra_context):
+        return super().as_sql(compiler, connection, template='CAST(FLOOR(UNIX_TIMESTAMP(%(expressions)s)) AS SIGNED)', **extra_context)
+
+
+def invalidate_resource_catalog() -> None:
+    """Bump the catalog version; entries cached under older versions are never read again.
+
+    Bumped now for this process's own reads and again on commit, so a reader that cached the
+    pre-commit rows under the new version is superseded as soon as the write is visible.
+    """
+    def bump():
+        try:
+            cache.incr(RESOURCE_CATALOG_VERSION_KEY)
+        except ValueError:
+            cache.add(RESOURCE_CATALOG_VERSION_KEY, _new_catalog_version(), timeout=None)
+
+    bump()
+    transaction.on_commit(bump)
 
 
 class UserRepository(UserRepositoryInterface):
@@ -28,12 +143,28 @@ class UserRepository(UserRepositoryInterface):
         return self._to_entity(user)
 
     def get_by_id(self, user_id: int) -> Optional[UserEntity]:
+        cached = identity_map.get('user', user_id)
+        if cached is not None:
+            return cached
         try:
             user = User.objects.get(id=user_id)
-            return self._to_entity(user)
+            return identity_map.put('user', self._to_entity(user))
         except User.DoesNotExist:
             return None
 
+    def remember(self, user: User) -> UserEntity:
+        # Seed the identity map with an already loaded user (request.user) so services don't refetch it
+        return identity_map.put('user', self._to_entity(user))
+
+    def existing_ids(self, user_ids: List[int]) -> Set[int]:
+        return set(User.objects.filter(id__in=user_ids).values_list('id', flat=True))
+
+    def lock_for_booking(self, user_id: int) -> Optional[UserEntity]:
+        # Always hits the database: the point is the row lock, not the data
+        # (SQLite ignores FOR UPDATE; its single writer lock serializes the bookings instead)
+        user = User.objects.select_for_update().filter(id=user_id).first()
+        return identity_map.put('user', self._to_entity(user)) if user else None
+
     def get_by_email(self, email: str) -> Optional[UserEntity]:
         try:
             user = User.objects.get(email=email)
@@ -46,6 +177,9 @@ class UserRepository(UserRepositoryInterface):
         return [self._to_entity(u) for u in users]
 
     def update(self, entity: UserEntity) -> UserEntity:
+        # Entities loaded with from_row skip validation, so re-check whatever the caller changed
+        entity._validate()
+        identity_map.evict('user', entity.id)
         user = User.objects.get(id=entity.id)
         user.email = entity.email
         user.first_name = entity.first_name
@@ -55,6 +189,7 @@ class UserRepository(UserRepositoryInterface):
         return self._to_entity(user)
 
     def delete(self, user_id: int) -> bool:
+        identity_map.evict('user', user_id)
         try:
             User.objects.filter(id=user_id).delete()
             return True
@@ -62,7 +197,7 @@ class UserRepository(UserRepositoryInterface):
             return False
 
     def _to_entity(self, model: User) -> UserEntity:
-        return UserEntity(
+        return UserEntity.from_row(
             id=model.id,
             email=model.email,
             first_name=model.first_name,
@@ -74,6 +209,9 @@ class UserRepository(UserRepositoryInterface):
 
 
 class ResourceRepository(ResourceRepositoryInterface):
+    # Reads are served from a versioned copy of the whole catalog in Django's cache. Every save or
+    # delete of a Resource row (create/update/delete here, or the admin) bumps the version through
+    # the model signals in core.signals, so the cache is written through without explicit deletes.
 
     def create(self, entity: ResourceEntity) -> ResourceEntity:
         resource = Resource.objects.create(
@@ -86,21 +224,32 @@ class ResourceRepository(ResourceRepositoryInterface):
         return self._to_entity(resource)
 
     def get_by_id(self, resource_id: int) -> Optional[ResourceEntity]:
-        try:
-            resource = Resource.objects.get(id=resource_id)
-            return self._to_entity(resource)
-        except Resource.DoesNotExist:
-            return None
+        cached = identity_map.get('resource', resource_id)
+        if cached is not None:
+            return cached
+        return identity_map.put('resource', self._catalog().get(resource_id))
 
     def list_all(self, type_filter: Optional[str] = None, owner_id: Optional[int] = None) -> List[ResourceEntity]:
-        queryset = Resource.objects.all()
-        if type_filter:
-            queryset = queryset.filter(type=type_filter)
-        if owner_id is not None:
-            queryset = queryset.filter(owner_id=owner_id)
-        return [self._to_entity(r) for r in queryset]
+        return [
+            r for r in self._catalog().values()
+            if (not type_filter or r.type == type_filter) and (owner_id is None or r.owner_id == owner_id)
+        ]
+
+    def catalog_version(self) -> int:
+        return resource_catalog_version()
+
+    def _catalog(self) -> Dict[int, ResourceEntity]:
+        key = f'resources:catalog:{resource_catalog_version()}'
+        catalog = cache.get(key)
+        if catalog is None:
+            catalog = {r.id: self._to_entity(r) for r in Resource.objects.order_by('id')}
+            cache.set(key, catalog, RESOURCE_CATALOG_TIMEOUT)
+        return catalog
 
     def update(self, entity: ResourceEntity) -> ResourceEntity:
+        # Entities loaded with from_row skip validation, so re-check whatever the caller changed
+        entity._validate()
+        identity_map.evict('resource', entity.id)
         resource = Resource.objects.get(id=entity.id)
         resource.name = entity.name
         resource.type = entity.type
@@ -110,6 +259,7 @@ class ResourceRepository(ResourceRepositoryInterface):
         return self._to_entity(resource)
 
     def delete(self, resource_id: int) -> bool:
+        identity_map.evict('resource', resource_id)
         try:
             Resource.objects.filter(id=resource_id).delete()
             return True
@@ -117,7 +267,7 @@ class ResourceRepository(ResourceRepositoryInterface):
             return False
 
     def _to_entity(self, model: Resource) -> ResourceEntity:
-        return ResourceEntity(
+        return ResourceEntity.from_row(
             id=model.id,
             name=model.name,
             type=model.type,
@@ -129,6 +279,8 @@ class ResourceRepository(ResourceRepositoryInterface):
 
 
 class TimeSlotRepository(TimeSlotRepositoryInterface):
+    # Columns returned by the *_rows readers; listings serialize these directly without entities
+    ROW_FIELDS = ('id', 'resource_id', 'start_time', 'end_time', 'is_available', 'active_count', 'updated_at')
 
     def create(self, entity: TimeSlotEntity) -> TimeSlotEntity:
         try:
@@ -150,13 +302,68 @@ class TimeSlotRepository(TimeSlotRepositoryInterface):
                 # re-raise original error if we can't recover
                 raise
 
+    def bulk_create(self, entities: List[TimeSlotEntity], batch_size: int = 1000) -> Tuple[int, int]:
+        by_resource = {}
+        for entity in entities:
+            by_resource.setdefault(entity.resource_id, []).append(entity)
+
+        to_insert = []
+        for resource_id, planned in by_resource.items():
+            # One query per resource covering the whole planned window
+            existing = set(
+                TimeSlot.objects.filter(
+                    resource_id=resource_id,
+                    start_time__gte=min(e.start_time for e in planned),
+                    start_time__lte=max(e.start_time for e in planned)
+                ).values_list('start_time', 'end_time')
+            )
+            for entity in planned:
+                key = (entity.start_time, entity.end_time)
+                if key in existing:
+                    continue
+                existing.add(key)
+                to_insert.append(TimeSlot(
+                    resource_id=resource_id,
+                    start_time=entity.start_time,
+                    end_time=entity.end_time,
+                    is_available=entity.is_available
+                ))
+
+        created = 0
+        with transaction.atomic():
+            for i in range(0, len(to_insert), batch_size):
+                batch = to_insert[i:i + batch_size]
+                try:
+                    with transaction.atomic():
+                        TimeSlot.objects.bulk_create(batch)
+                    created += len(batch)
+                except IntegrityError:
+                    # Another process inserted some of these slots since the lookup: insert the rest
+                    # one at a time so only rows that really went in are counted as created
+                    for slot in batch:
+                        try:
+                            with transaction.atomic():
+                                TimeSlot.objects.bulk_create([slot])
+                            created += 1
+                        except IntegrityError:
+                            pass
+
+        return created, len(entities) - created
+
     def get_by_id(self, slot_id: int) -> Optional[TimeSlotEntity]:
+        cached = identity_map.get('timeslot', slot_id)
+        if cached is not None:
+            return cached
         try:
             slot = TimeSlot.objects.get(id=slot_id)
-            return self._to_entity(slot)
+            return identity_map.put('timeslot', self._to_entity(slot))
         except TimeSlot.DoesNotExist:
             return None
 
+    def get_by_start(self, resource_id: int, start_time: datetime) -> Optional[TimeSlotEntity]:
+        slot = TimeSlot.objects.filter(resource_id=resource_id, start_time=start_time).first()
+        return self._to_entity(slot) if slot else None
+
     def list_by_resource(self, resource_id: int, start_date: Optional[datetime] = None, end_date: Optional[datetime] = None) -> List[TimeSlotEntity]:
         queryset = TimeSlot.objects.filter(resource_id=resource_id)
         if start_date:
@@ -165,17 +372,186 @@ class TimeSlotRepository(TimeSlotRepositoryInterface):
             queryset = queryset.filter(end_time__lte=end_date)
         return [self._to_entity(s) for s in queryset]
 
+    def list_by_resource_page(self, resource_id: int, after: Optional[Tuple[datetime, int]] = None, limit: int = 100) -> List[TimeSlotEntity]:
+        return [self._to_entity(s) for s in self._resource_page_queryset(resource_id, after)[:limit]]
+
+    def list_by_resource_page_rows(self, resource_id: int, after: Optional[Tuple[datetime, int]] = None, limit: int = 100) -> List[dict]:
+        return list(self._resource_page_queryset(resource_id, after).values(*self.ROW_FIELDS)[:limit])
+
+    def _resource_page_queryset(self, resource_id: int, after: Optional[Tuple[datetime, int]]):
+        queryset = TimeSlot.objects.filter(resource_id=resource_id)
+        if after:
+            start_time, slot_id = after
+            queryset = queryset.filter(Q(start_time__gt=start_time) | Q(start_time=start_time, id__gt=slot_id))
+        return queryset.order_by('start_time', 'id')
+
     def list_by_date(self, date: datetime) -> List[TimeSlotEntity]:
-        queryset = TimeSlot.objects.filter(start_time__date=date.date())
-        return [self._to_entity(s) for s in queryset]
+        return self.list_by_date_range(None, date, date)
+
+    def list_by_date_range(self, resource_ids: Optional[List[int]], start_date: date, end_date: date) -> List[TimeSlotEntity]:
+        return [self._to_entity(s) for s in self._date_range_queryset(resource_ids, start_date, end_date)]
+
+    def list_by_date_range_rows(self, resource_ids: Optional[List[int]], start_date: date, end_date: date) -> List[dict]:
+        return list(self._date_range_queryset(resource_ids, start_date, end_date).values(*self.ROW_FIELDS))
+
+    def _date_range_queryset(self, resource_ids: Optional[List[int]], start_date: date, end_date: date):
+        range_start, range_end = local_day_range(start_date, end_date)
+        queryset = TimeSlot.objects.filter(start_time__gte=range_start, start_time__lt=range_end)
+        if resource_ids is not None:
+            queryset = queryset.filter(resource_id__in=resource_ids)
+        return queryset.order_by('start_time', 'id')
+
+    def find_bookable(self, resource_ids: Optional[List[int]], start_time: datetime, end_time: datetime,
+                      min_duration_minutes: int = 0, limit: int = 10) -> List[TimeSlotEntity]:
+        # Walks the start_time index in order and stops after `limit` hits; capacity comes from the
+        # slot's own counter, so no reservation rows are read
+        queryset = TimeSlot.objects.filter(
+            start_time__gte=max(start_time, timezone.now()),
+            start_time__lt=end_time,
+            is_available=True,
+            active_count__lt=F('resource__max_bookings')
+        )
+        if resource_ids is not None:
+            queryset = queryset.filter(resource_id__in=resource_ids)
+        if min_duration_minutes:
+            queryset = queryset.alias(duration=ExpressionWrapper(F('end_time') - F('start_time'), output_field=DurationField()))
+            queryset = queryset.filter(duration__gte=timedelta(minutes=min_duration_minutes))
+        return [self._to_entity(s) for s in queryset.order_by('start_time', 'id')[:limit]]
+
+    def list_utilization_rows(self, resource_ids: Optional[List[int]], start_date: date, end_date: date,
+                              chunk_size: int = 20000) -> Iterator[Tuple[int, int, int]]:
+        # (resource_id, start epoch seconds, active_count) of the slots that offered seats; a closed
+        # slot that still had room was shut for maintenance and offered nothing
+        range_start, range_end = local_day_range(start_date, end_date)
+        queryset = TimeSlot.objects.filter(
+            Q(is_available=True) | Q(active_count__gte=F('resource__max_bookings')),
+            start_time__gte=range_start,
+            start_time__lt=range_end
+        )
+        if resource_ids is not None:
+            queryset = queryset.filter(resource_id__in=resource_ids)
+        queryset = queryset.order_by()
+        # Streamed from the cursor: the caller packs the rows straight into an array, no list in between
+        if connections[queryset.db].vendor in EpochSeconds.vendors:
+            return (
+                queryset.annotate(start_epoch=EpochSeconds('start_time'))
+                .values_list('resource_id', 'start_epoch', 'active_count')
+                .iterator(chunk_size=chunk_size)
+            )
+        # Any other backend: convert the fetched datetimes here (slower, but the same rows)
+        return (
+            (resource_id, int(start_time.timestamp()), active_count)
+            for resource_id, start_time, active_count in queryset.values_list(
+                'resource_id', 'start_time', 'active_count'
+            ).iterator(chunk_size=chunk_size)
+        )
+
+    def fingerprint(self, resource_ids: Optional[List[int]], start_date: Optional[date] = None,
+                    end_date: Optional[date] = None) -> str:
+        if start_date is not None and end_date is not None:
+            queryset = self._date_range_queryset(resource_ids, start_date, end_date)
+        else:
+            queryset = TimeSlot.objects.filter(resource_id__in=resource_ids)
+        return fingerprint(queryset)
+
+    def reserve_seat(self, slot_id: int, resource_id: int, user_id: Optional[int] = None) -> bool:
+        identity_map.evict('timeslot', slot_id)
+        max_bookings = Subquery(Resource.objects.filter(id=resource_id).values('max_bookings')[:1])
+        # Capacity check and increment in one statement: the row lock taken by UPDATE
+        # serializes concurrent bookings, and the WHERE is re-checked against the new count
+        queryset = TimeSlot.objects.filter(
+            id=slot_id,
+            resource_id=resource_id,
+            is_available=True,
+            start_time__gt=timezone.now(),
+            active_count__lt=max_bookings
+        )
+        if user_id is not None:
+            # ...and the user must not already hold an active reservation overlapping this slot
+            queryset = queryset.filter(~Exists(Reservation.objects.filter(
+                user_id=user_id,
+                status='ACTIVE',
+                time_slot__start_time__lt=OuterRef('end_time'),
+                time_slot__end_time__gt=OuterRef('start_time')
+            )))
+        updated = queryset.update(
+            active_count=F('active_count') + 1,
+            updated_at=timezone.now(),
+            # Close the slot when this booking takes the last seat
+            is_available=Case(
+                When(active_count__gte=max_bookings - 1, then=Value(False)),
+                default=F('is_available')
+            )
+        )
+        return updated == 1
+
+    def lock_for_booking(self, slot_ids: List[int]) -> List[TimeSlotEntity]:
+        # Row locks in id order, so two batches touching the same slots can't deadlock each other
+        # (SQLite ignores FOR UPDATE; its single writer lock serializes the batches instead)
+        for slot_id in slot_ids:
+            identity_map.evict('timeslot', slot_id)
+        slots = TimeSlot.objects.select_for_update().filter(id__in=slot_ids).order_by('id')
+        return [self._to_entity(s) for s in slots]
+
+    def reserve_seats(self, slot_ids: List[int]) -> int:
+        """Take one seat in each slot with a single UPDATE; returns how many slots had room."""
+        for slot_id in slot_ids:
+            identity_map.evict('timeslot', slot_id)
+        max_bookings = Subquery(Resource.objects.filter(id=OuterRef('resource_id')).values('max_bookings')[:1])
+        return TimeSlot.objects.filter(
+            id__in=slot_ids,
+            is_available=True,
+            active_count__lt=max_bookings
+        ).update(
+            active_count=F('active_count') + 1,
+            updated_at=timezone.now(),
+            is_available=Case(
+                When(active_count__gte=max_bookings - 1, then=Value(False)),
+                default=F('is_available')
+            )
+        )
+
+    def release_seat(self, slot_id: int) -> None:
+        self.release_seats({slot_id: 1})
+
+    def release_seats(self, released: Dict[int, int]) -> int:
+        """Give back released[slot_id] seats in each slot with a single UPDATE; returns the number of slots."""
+        if not released:
+            return 0
+        by_count = {}
+        for slot_id, count in released.items():
+            identity_map.evict('timeslot', slot_id)
+            by_count.setdefault(count, []).append(slot_id)
+        seats = Case(*[When(id__in=ids, then=Value(count)) for count, ids in by_count.items()], default=Value(0))
+        max_bookings = Subquery(Resource.objects.filter(id=OuterRef('resource_id')).values('max_bookings')[:1])
+        return TimeSlot.objects.filter(id__in=list(released)).update(
+            active_count=Greatest(F('active_count') - seats, Value(0)),
+            updated_at=timezone.now(),
+            # Booking closes a slot exactly when it fills up, so a closed slot that was full re-opens;
+            # slots closed while they still had room (maintenance, admin) stay closed
+            is_available=Case(
+                When(is_available=False, active_count__gte=max_bookings, then=Value(True)),
+                default=F('is_available')
+            )
+        )
+
+    def close_range(self, resource_id: int, start_date: date, end_date: date) -> int:
+        # Upcoming slots of the resource on local days start_date..end_date
+        queryset = self._date_range_queryset([resource_id], start_date, end_date).filter(start_time__gt=timezone.now())
+        identity_map.clear()
+        return queryset.update(is_available=False, updated_at=timezone.now())
 
     def update(self, entity: TimeSlotEntity) -> TimeSlotEntity:
+        # Entities loaded with from_row skip validation, so re-check whatever the caller changed
+        entity._validate()
+        identity_map.evict('timeslot', entity.id)
         slot = TimeSlot.objects.get(id=entity.id)
         slot.is_available = entity.is_available
         slot.save()
         return self._to_entity(slot)
 
     def delete(self, slot_id: int) -> bool:
+        identity_map.evict('timeslot', slot_id)
         try:
             TimeSlot.objects.filter(id=slot_id).delete()
             return True
@@ -183,16 +559,24 @@ class TimeSlotRepository(TimeSlotRepositoryInterface):
             return False
 
     def _to_entity(self, model: TimeSlot) -> TimeSlotEntity:
-        return TimeSlotEntity(
+        return TimeSlotEntity.from_row(
             id=model.id,
             resource_id=model.resource_id,
             start_time=model.start_time,
             end_time=model.end_time,
-            is_available=model.is_available
+            is_available=model.is_available,
+            active_count=model.active_count
         )
 
 
 class ReservationRepository(ReservationRepositoryInterface):
+    # Columns returned by the *_rows readers; listings serialize these directly without entities
+    ROW_FIELDS = ('id', 'user_id', 'resource_id', 'time_slot_id', 'status', 'notes', 'created_at', 'updated_at')
+    # Columns of the analytics export
+    ANALYTICS_FIELDS = (
+        'id', 'user_id', 'resource_id', 'resource__name', 'resource__type', 'time_slot_id',
+        'time_slot__start_time', 'time_slot__end_time', 'status', 'created_at'
+    )
 
     def create(self, entity: ReservationEntity) -> ReservationEntity:
         reservation = Reservation.objects.create(
@@ -204,10 +588,26 @@ class ReservationRepository(ReservationRepositoryInterface):
         )
         return self._to_entity(reservation)
 
+    def bulk_create(self, entities: List[ReservationEntity]) -> List[ReservationEntity]:
+        reservations = Reservation.objects.bulk_create([
+            Reservation(
+                user_id=entity.user_id,
+                resource_id=entity.resource_id,
+                time_slot_id=entity.time_slot_id,
+                status=entity.status,
+                notes=entity.notes
+            )
+            for entity in entities
+        ])
+        return [self._to_entity(r) for r in reservations]
+
     def get_by_id(self, reservation_id: int) -> Optional[ReservationEntity]:
+        cached = identity_map.get('reservation', reservation_id)
+        if cached is not None:
+            return cached
         try:
             reservation = Reservation.objects.get(id=reservation_id)
-            return self._to_entity(reservation)
+            return identity_map.put('reservation', self._to_entity(reservation))
         except Reservation.DoesNotExist:
             return None
 
@@ -224,16 +624,29 @@ class ReservationRepository(ReservationRepositoryInterface):
         end_date: datetime,
         status: Optional[str] = None
     ) -> List[ReservationEntity]:
+        queryset = self._date_range_with_relations(user_id, start_date, end_date, status)
+        return [self._to_entity_with_relations(r) for r in queryset]
+
+    def iter_by_date_range(self, user_id: Optional[int], start_date: datetime, end_date: datetime,
+                           status: Optional[str] = None, chunk_size: int = 2000) -> Iterator[ReservationEntity]:
+        # Server-side cursor in slot start order; user_id=None covers every member
+        queryset = self._date_range_with_relations(user_id, start_date, end_date, status)
+        for reservation in queryset.iterator(chunk_size=chunk_size):
+            yield self._to_entity_with_relations(reservation)
+
+    def _date_range_with_relations(self, user_id: Optional[int], start_date: datetime, end_date: datetime,
+                                   status: Optional[str]):
+        # Whole local days, same bounds as TimeSlotRepository.list_by_date_range
+        range_start, range_end = local_day_range(start_date, end_date)
         queryset = Reservation.objects.filter(
-            user_id=user_id,
-            time_slot__start_time__gte=start_date,
-            time_slot__end_time__lte=end_date
+            time_slot__start_time__gte=range_start,
+            time_slot__start_time__lt=range_end
         ).select_related('time_slot', 'resource', 'user')
-        
+        if user_id is not None:
+            queryset = queryset.filter(user_id=user_id)
         if status:
             queryset = queryset.filter(status=status)
-        
-        return [self._to_entity_with_relations(r) for r in queryset.order_by('time_slot__start_time')]
+        return queryset.order_by('time_slot__start_time', 'id')
 
     def list_all(self, status: Optional[str] = None) -> List[ReservationEntity]:
         queryset = Reservation.objects.all()
@@ -241,6 +654,50 @@ class ReservationRepository(ReservationRepositoryInterface):
             queryset = queryset.filter(status=status)
         return [self._to_entity(r) for r in queryset.order_by('-created_at')]
 
+    def list_by_user_page(self, user_id: int, status: Optional[str] = None, after: Optional[Tuple[datetime, int]] = None, limit: int = 100) -> List[ReservationEntity]:
+        return [self._to_entity(r) for r in self._newest_first(self._by_user(user_id, status), after)[:limit]]
+
+    def list_by_user_page_rows(self, user_id: int, status: Optional[str] = None, after: Optional[Tuple[datetime, int]] = None, limit: int = 100) -> List[dict]:
+        return list(self._newest_first(self._by_user(user_id, status), after).values(*self.ROW_FIELDS)[:limit])
+
+    def list_all_page(self, status: Optional[str] = None, after: Optional[Tuple[datetime, int]] = None, limit: int = 100) -> List[ReservationEntity]:
+        return [self._to_entity(r) for r in self._newest_first(self._by_status(status), after)[:limit]]
+
+    def list_all_page_rows(self, status: Optional[str] = None, after: Optional[Tuple[datetime, int]] = None, limit: int = 100) -> List[dict]:
+        return list(self._newest_first(self._by_status(status), after).values(*self.ROW_FIELDS)[:limit])
+
+    def iter_by_user(self, user_id: int, status: Optional[str] = None, chunk_size: int = 2000) -> Iterator[ReservationEntity]:
+        for reservation in self._newest_first(self._by_user(user_id, status), None).iterator(chunk_size=chunk_size):
+            yield self._to_entity(reservation)
+
+    def iter_all(self, status: Optional[str] = None, chunk_size: int = 2000) -> Iterator[ReservationEntity]:
+        for reservation in self._newest_first(self._by_status(status), None).iterator(chunk_size=chunk_size):
+            yield self._to_entity(reservation)
+
+    def iter_analytics_rows(self, start_date: Optional[date] = None, end_date: Optional[date] = None,
+                            status: Optional[str] = None, chunk_size: int = 5000) -> Iterator[tuple]:
+        # Plain tuples off a server-side cursor, in primary key order
+        queryset = self._by_status(status)
+        if start_date is not None and end_date is not None:
+            range_start, range_end = local_day_range(start_date, end_date)
+            queryset = queryset.filter(time_slot__start_time__gte=range_start, time_slot__start_time__lt=range_end)
+        return queryset.order_by('id').values_list(*self.ANALYTICS_FIELDS).iterator(chunk_size=chunk_size)
+
+    def _by_user(self, user_id: int, status: Optional[str]):
+        return self._by_status(status).filter(user_id=user_id)
+
+    def _by_status(self, status: Optional[str]):
+        queryset = Reservation.objects.all()
+        if status:
+            queryset = queryset.filter(status=status)
+        return queryset
+
+    def _newest_first(self, queryset, after: Optional[Tuple[datetime, int]]):
+        if after:
+            created_at, reservation_id = after
+            queryset = queryset.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=reservation_id))
+        return queryset.order_by('-created_at', '-id')
+
     def list_by_timeslot(self, timeslot_id: int, status: str = 'ACTIVE') -> List[ReservationEntity]:
         queryset = Reservation.objects.filter(time_slot_id=timeslot_id, status=status)
         return [self._to_entity(r) for r in queryset]
@@ -248,7 +705,100 @@ class ReservationRepository(ReservationRepositoryInterface):
     def count_by_timeslot(self, timeslot_id: int, status: str = 'ACTIVE') -> int:
         return Reservation.objects.filter(time_slot_id=timeslot_id, status=status).count()
 
+    def count_summary(self, user_id: Optional[int], created_since: datetime) -> dict:
+        queryset = Reservation.objects.all() if user_id is None else Reservation.objects.filter(user_id=user_id)
+        return queryset.aggregate(
+            total=Count('id'),
+            active=Count('id', filter=Q(status='ACTIVE')),
+            cancelled=Count('id', filter=Q(status='CANCELLED')),
+            created_since=Count('id', filter=Q(created_at__gte=created_since))
+        )
+
+    def fingerprint(self, user_id: Optional[int] = None, start_date: Optional[datetime] = None,
+                    end_date: Optional[datetime] = None) -> str:
+        # Covers every status: a cancellation bumps updated_at, so filtered listings change too
+        queryset = Reservation.objects.all()
+        if user_id is not None:
+            queryset = queryset.filter(user_id=user_id)
+        if start_date is not None and end_date is not None:
+            range_start, range_end = local_day_range(start_date, end_date)
+            queryset = queryset.filter(time_slot__start_time__gte=range_start, time_slot__start_time__lt=range_end)
+        return fingerprint(queryset)
+
+    def find_overlapping(self, user_id: int, start_time: datetime, end_time: datetime) -> List[ReservationEntity]:
+        queryset = self._overlapping(user_id, start_time, end_time)
+        return [self._to_entity(r) for r in queryset.order_by('time_slot__start_time')]
+
+    def list_overlapping_intervals(self, user_id: int, start_time: datetime, end_time: datetime) -> List[Tuple[int, datetime, datetime]]:
+        queryset = self._overlapping(user_id, start_time, end_time)
+        return list(queryset.values_list('id', 'time_slot__start_time', 'time_slot__end_time'))
+
+    def _overlapping(self, user_id: int, start_time: datetime, end_time: datetime):
+        # The user's active reservations come from the (user, status) index; slots are joined by id
+        return Reservation.objects.filter(
+            user_id=user_id,
+            status='ACTIVE',
+            time_slot__start_time__lt=end_time,
+            time_slot__end_time__gt=start_time
+        )
+
+    def list_active_intervals(self, start_date: datetime, end_date: datetime) -> List[Tuple[int, int, datetime, datetime]]:
+        # (reservation_id, user_id, start_time, end_time) of active reservations on local days start_date..end_date
+        range_start, range_end = local_day_range(start_date, end_date)
+        return list(
+            Reservation.objects.filter(
+                status='ACTIVE',
+                time_slot__start_time__gte=range_start,
+                time_slot__start_time__lt=range_end
+            ).values_list('id', 'user_id', 'time_slot__start_time', 'time_slot__end_time')
+        )
+
+    def list_user_ids_in_range(self, start_date: date, end_date: date) -> List[int]:
+        range_start, range_end = local_day_range(start_date, end_date)
+        return list(
+            Reservation.objects.filter(
+                status='ACTIVE',
+                time_slot__start_time__gte=range_start,
+                time_slot__start_time__lt=range_end
+            ).order_by('user_id').values_list('user_id', flat=True).distinct()
+        )
+
+    def lock_active_in_range(self, start_date: date, end_date: date, user_id: Optional[int] = None,
+                             resource_id: Optional[int] = None) -> List[Tuple[int, int, int, datetime]]:
+        # (id, user_id, time_slot_id, start_time) of upcoming active reservations on local days
+        # start_date..end_date, row-locked until the surrounding transaction ends
+        range_start, range_end = local_day_range(start_date, end_date)
+        queryset = Reservation.objects.select_for_update(of=('self',)).filter(
+            status='ACTIVE',
+            time_slot__start_time__gte=max(range_start, timezone.now()),
+            time_slot__start_time__lt=range_end
+        )
+        if user_id is not None:
+            queryset = queryset.filter(user_id=user_id)
+        if resource_id is not None:
+            queryset = queryset.filter(resource_id=resource_id)
+        return list(
+            queryset.order_by('time_slot__start_time', 'id')
+            .values_list('id', 'user_id', 'time_slot_id', 'time_slot__start_time')
+        )
+
+    def mark_cancelled_many(self, reservation_ids: List[int]) -> int:
+        for reservation_id in reservation_ids:
+            identity_map.evict('reservation', reservation_id)
+        return Reservation.objects.filter(id__in=reservation_ids, status='ACTIVE').update(
+            status='CANCELLED', updated_at=timezone.now()
+        )
+
+    def mark_cancelled(self, reservation_id: int) -> bool:
+        identity_map.evict('reservation', reservation_id)
+        return Reservation.objects.filter(id=reservation_id, status='ACTIVE').update(
+            status='CANCELLED', updated_at=timezone.now()
+        ) == 1
+
     def update(self, entity: ReservationEntity) -> ReservationEntity:
+        # Entities loaded with from_row skip validation, so re-check whatever the caller changed
+        entity._validate()
+        identity_map.evict('reservation', entity.id)
         reservation = Reservation.objects.get(id=entity.id)
         reservation.status = entity.status
         reservation.notes = entity.notes
@@ -256,6 +806,7 @@ class ReservationRepository(ReservationRepositoryInterface):
         return self._to_entity(reservation)
 
     def delete(self, reservation_id: int) -> bool:
+        identity_map.evict('reservation', reservation_id)
         try:
             Reservation.objects.filter(id=reservation_id).delete()
             return True
@@ -263,7 +814,7 @@ class ReservationRepository(ReservationRepositoryInterface):
             return False
 
     def _to_entity(self, model: Reservation) -> ReservationEntity:
-        return ReservationEntity(
+        return ReservationEntity.from_row(
             id=model.id,
             user_id=model.user_id,
             resource_id=model.resource_id,
@@ -279,4 +830,314 @@ class ReservationRepository(ReservationRepositoryInterface):
         entity.time_slot = model.time_slot
         entity.resource = model.resource
         entity.user = model.user
-        return entity
\ No newline at end of file
+        return entity
+
+
+class ScheduleRepository(ScheduleRepositoryInterface):
+
+    def get_template(self, resource_id: int) -> Optional[ScheduleTemplateEntity]:
+        try:
+            template = ScheduleTemplate.objects.get(resource_id=resource_id)
+            return self._to_template_entity(template)
+        except ScheduleTemplate.DoesNotExist:
+            return None
+
+    def list_templates(self, resource_ids: Optional[List[int]] = None) -> List[ScheduleTemplateEntity]:
+        queryset = ScheduleTemplate.objects.all()
+        if resource_ids is not None:
+            queryset = queryset.filter(resource_id__in=resource_ids)
+        return [self._to_template_entity(t) for t in queryset]
+
+    def save_template(self, entity: ScheduleTemplateEntity) -> ScheduleTemplateEntity:
+        template, created = ScheduleTemplate.objects.update_or_create(
+            resource_id=entity.resource_id,
+            defaults={
+                'weekly_hours': {
+                    str(weekday): [open_time.strftime('%H:%M'), close_time.strftime('%H:%M')]
+                    for weekday, (open_time, close_time) in entity.weekly_hours.items()
+                },
+                'slot_duration_minutes': entity.slot_duration_minutes
+            }
+        )
+        return self._to_template_entity(template)
+
+    def list_exceptions(self, resource_ids: List[int], start_date: date, end_date: date) -> List[ScheduleExceptionEntity]:
+        queryset = ScheduleException.objects.filter(
+            Q(resource_id__in=resource_ids) | Q(resource__isnull=True),
+            date__gte=start_date,
+            date__lte=end_date
+        )
+        return [self._to_exception_entity(e) for e in queryset]
+
+    def add_exception(self, entity: ScheduleExceptionEntity) -> ScheduleExceptionEntity:
+        exception, created = ScheduleException.objects.update_or_create(
+            resource_id=entity.resource_id,
+            date=entity.date,
+            defaults={
+                'is_closed': entity.is_closed,
+                'open_time': entity.open_time,
+                'close_time': entity.close_time,
+                'reason': entity.reason
+            }
+        )
+        return self._to_exception_entity(exception)
+
+    def list_materialized_days(self, resource_ids: List[int], start_date: date, end_date: date) -> Set[Tuple[int, date]]:
+        return set(
+            MaterializedDay.objects.filter(
+                resource_id__in=resource_ids,
+                date__gte=start_date,
+                date__lte=end_date
+            ).values_list('resource_id', 'date')
+        )
+
+    def mark_materialized(self, days: List[Tuple[int, date]]) -> None:
+        MaterializedDay.objects.bulk_create(
+            [MaterializedDay(resource_id=resource_id, date=day) for resource_id, day in days],
+            ignore_conflicts=True
+        )
+
+    def _to_template_entity(self, model: ScheduleTemplate) -> ScheduleTemplateEntity:
+        return ScheduleTemplateEntity(
+            id=model.id,
+            resource_id=model.resource_id,
+            weekly_hours={
+                int(weekday): (time.fromisoformat(hours[0]), time.fromisoformat(hours[1]))
+                for weekday, hours in model.weekly_hours.items()
+            },
+            slot_duration_minutes=model.slot_duration_minutes
+        )
+
+    def _to_exception_entity(self, model: ScheduleException) -> ScheduleExceptionEntity:
+        return ScheduleExceptionEntity(
+            id=model.id,
+            resource_id=model.resource_id,
+            date=model.date,
+            is_closed=model.is_closed,
+            open_time=model.open_time,
+            close_time=model.close_time,
+            reason=model.reason
+        )
+
+
+class ExportJobRepository(ExportJobRepositoryInterface):
+
+    def create(self, entity: ExportJobEntity) -> ExportJobEntity:
+        job = ExportJob.objects.create(
+            requested_by_id=entity.requested_by_id,
+            kind=entity.kind,
+            user_ids=entity.user_ids,
+            start_date=entity.start_date,
+            end_date=entity.end_date
+        )
+        return self._to_entity(job)
+
+    def get_by_id(self, job_id: int) -> Optional[ExportJobEntity]:
+        try:
+            return self._to_entity(ExportJob.objects.get(id=job_id))
+        except ExportJob.DoesNotExist:
+            return None
+
+    def claim_next(self) -> Optional[ExportJobEntity]:
+        # Several workers may poll at once: the conditional UPDATE lets exactly one of them win a job
+        while True:
+            job_id = ExportJob.objects.filter(status='PENDING').order_by('created_at', 'id').values_list('id', flat=True).first()
+            if job_id is None:
+                return None
+            now = timezone.now()
+            if ExportJob.objects.filter(id=job_id, status='PENDING').update(
+                status='RUNNING', started_at=now, heartbeat_at=now, attempt=F('attempt') + 1
+            ):
+                return self.get_by_id(job_id)
+
+    def heartbeat(self, job_id: int, attempt: int) -> bool:
+        return bool(ExportJob.objects.filter(id=job_id, status='RUNNING', attempt=attempt).update(heartbeat_at=timezone.now()))
+
+    def requeue_stale(self, heartbeat_before: datetime) -> int:
+        return ExportJob.objects.filter(status='RUNNING', heartbeat_at__lt=heartbeat_before).update(
+            status='PENDING', started_at=None, heartbeat_at=None
+        )
+
+    def mark_done(self, job_id: int, attempt: int, file_path: str) -> bool:
+        return bool(ExportJob.objects.filter(id=job_id, status='RUNNING', attempt=attempt).update(
+            status='DONE', file_path=file_path, finished_at=timezone.now()
+        ))
+
+    def mark_failed(self, job_id: int, attempt: int, error: str) -> bool:
+        return bool(ExportJob.objects.filter(id=job_id, status='RUNNING', attempt=attempt).update(
+            status='FAILED', error=error, finished_at=timezone.now()
+        ))
+
+    def _to_entity(self, model: ExportJob) -> ExportJobEntity:
+        return ExportJobEntity(
+            id=model.id,
+            requested_by_id=model.requested_by_id,
+            kind=model.kind,
+            start_date=model.start_date,
+            end_date=model.end_date,
+            user_ids=model.user_ids,
+            status=model.status,
+            file_path=model.file_path,
+            error=model.error,
+            created_at=model.created_at,
+            started_at=model.started_at,
+            finished_at=model.finished_at,
+            attempt=model.attempt,
+            heartbeat_at=model.heartbeat_at
+        )
+
+
+class DailyStatsRepository(DailyStatsRepositoryInterface):
+
+    def record_changes(self, booked_slot_ids: Sequence[int] = (), cancelled_slot_ids: Sequence[int] = ()) -> None:
+        if not booked_slot_ids and not cancelled_slot_ids:
+            return
+        if not cancelled_slot_ids and len(set(booked_slot_ids)) == 1:
+            # A single booking: one UPDATE that finds the day row through the slot and takes the
+            # peak from the counter the booking UPDATE just raised
+            slot = TimeSlot.objects.filter(id=booked_slot_ids[0])
+            updated = DailyResourceStats.objects.filter(
+                resource_id=Subquery(slot.values('resource_id')[:1]),
+                date=Subquery(slot.annotate(day=TruncDate('start_time', tzinfo=timezone.get_current_timezone())).values('day')[:1])
+            ).update(
+                bookings=F('bookings') + len(booked_slot_ids),
+                peak_occupancy=Greatest(F('peak_occupancy'), Subquery(slot.values('active_count')[:1])),
+                updated_at=timezone.now()
+            )
+            if updated:
+                return
+
+        slot_ids = set(booked_slot_ids) | set(cancelled_slot_ids)
+        day_of = {
+            slot_id: (resource_id, timezone.localdate(start_time))
+            for slot_id, resource_id, start_time in TimeSlot.objects.filter(id__in=slot_ids).values_list('id', 'resource_id', 'start_time')
+        }
+        deltas = {}
+        for slot_id in booked_slot_ids:
+            deltas.setdefault(day_of[slot_id], [0, 0])[0] += 1
+        for slot_id in cancelled_slot_ids:
+            deltas.setdefault(day_of[slot_id], [0, 0])[1] += 1
+
+        for (resource_id, day), (booked, cancelled) in deltas.items():
+            range_start, range_end = local_day_range(day, day)
+            # Cancellations can lower the peak, so it is recounted inside the same UPDATE
+            peak = TimeSlot.objects.filter(
+                resource_id=resource_id, start_time__gte=range_start, start_time__lt=range_end
+            ).order_by().values('resource_id').annotate(peak=Max('active_count')).values('peak')
+            changes = dict(
+                bookings=F('bookings') + booked,
+                cancellations=F('cancellations') + cancelled,
+                peak_occupancy=Subquery(peak[:1]),
+                updated_at=timezone.now()
+            )
+            row = DailyResourceStats.objects.filter(resource_id=resource_id, date=day)
+            if not row.update(**changes):
+                self._create_from_recount(resource_id, day, changes)
+
+    def _create_from_recount(self, resource_id: int, day: date, changes: dict) -> None:
+        # A day never rolled up (or backfilled): count it from scratch, this transaction's change included
+        stats = self._compute(day, day, [resource_id]).get((resource_id, day))
+        try:
+            with transaction.atomic():
+                (stats or DailyResourceStats(resource_id=resource_id, date=day)).save(force_insert=True)
+        except IntegrityError:
+            # Another transaction created the row first; its count can't include our uncommitted change
+            DailyResourceStats.objects.filter(resource_id=resource_id, date=day).update(**changes)
+
+    def refresh_slots(self, resource_ids: List[int], start_date: date, end_date: date) -> None:
+        computed = self._compute(start_date, end_date, resource_ids)
+        existing = {
+            (resource_id, day): row_id
+            for row_id, resource_id, day in DailyResourceStats.objects.filter(
+                resource_id__in=resource_ids, date__gte=start_date, date__lte=end_date
+            ).values_list('id', 'resource_id', 'date')
+        }
+        # Only slots_offered on existing rows: their booking counters and peak belong to record_changes
+        changed = []
+        for key, row_id in existing.items():
+            offered = computed[key].slots_offered if key in computed else 0
+            changed.append(DailyResourceStats(id=row_id, slots_offered=offered, updated_at=timezone.now()))
+        DailyResourceStats.objects.bulk_update(changed, ['slots_offered', 'updated_at'], batch_size=1000)
+        DailyResourceStats.objects.bulk_create(
+            [stats for key, stats in computed.items() if key not in existing], batch_size=1000, ignore_conflicts=True
+        )
+
+    def rebuild(self, start_date: date, end_date: date, resource_ids: Optional[List[int]] = None) -> int:
+        existing = DailyResourceStats.objects.filter(date__gte=start_date, date__lte=end_date)
+        if resource_ids is not None:
+            existing = existing.filter(resource_id__in=resource_ids)
+        with transaction.atomic():
+            # Lock the rows first and count afterwards: a record_changes that already updated a row has
+            # committed before the count reads it, and one that comes later waits and applies its delta
+            # to the rebuilt row. Rows are overwritten in place rather than deleted and re-inserted.
+            row_ids = {
+                (resource_id, day): row_id
+                for row_id, resource_id, day in existing.select_for_update().values_list('id', 'resource_id', 'date')
+            }
+            stats = self._compute(start_date, end_date, resource_ids)
+            now = timezone.now()
+            for key, entry in stats.items():
+                entry.id = row_ids.get(key)
+                entry.updated_at = now
+            DailyResourceStats.objects.filter(id__in=[row_id for key, row_id in row_ids.items() if key not in stats]).delete()
+            DailyResourceStats.objects.bulk_update(
+                [entry for entry in stats.values() if entry.id is not None],
+                ['slots_offered', 'bookings', 'cancellations', 'peak_occupancy', 'updated_at'],
+                batch_size=1000
+            )
+            # A day first booked during the rebuild already got its row from record_changes' own recount
+            DailyResourceStats.objects.bulk_create(
+                [entry for entry in stats.values() if entry.id is None], batch_size=1000, ignore_conflicts=True
+            )
+        return len(stats)
+
+    def _compute(self, start_date: date, end_date: date,
+                 resource_ids: Optional[List[int]]) -> Dict[Tuple[int, date], DailyResourceStats]:
+        # Grouped by the database: one row per resource and local day
+        range_start, range_end = local_day_range(start_date, end_date)
+        tz = timezone.get_current_timezone()
+        slots = TimeSlot.objects.filter(start_time__gte=range_start, start_time__lt=range_end)
+        reservations = Reservation.objects.filter(time_slot__start_time__gte=range_start, time_slot__start_time__lt=range_end)
+        if resource_ids is not None:
+            slots = slots.filter(resource_id__in=resource_ids)
+            reservations = reservations.filter(resource_id__in=resource_ids)
+
+        stats = {}
+        for row in (
+            slots.annotate(day=TruncDate('start_time', tzinfo=tz)).values('resource_id', 'day')
+            .annotate(
+                offered=Count('id', filter=Q(is_available=True) | Q(active_count__gte=F('resource__max_bookings'))),
+                peak=Max('active_count')
+            ).order_by()
+        ):
+            stats[(row['resource_id'], row['day'])] = DailyResourceStats(
+                resource_id=row['resource_id'], date=row['day'], slots_offered=row['offered'], peak_occupancy=row['peak'] or 0
+            )
+        for row in (
+            reservations.annotate(day=TruncDate('time_slot__start_time', tzinfo=tz)).values('resource_id', 'day')
+            .annotate(total=Count('id'), cancelled=Count('id', filter=Q(status='CANCELLED'))).order_by()
+        ):
+            entry = stats.setdefault(
+                (row['resource_id'], row['day']), DailyResourceStats(resource_id=row['resource_id'], date=row['day'])
+            )
+            entry.bookings = row['total']
+            entry.cancellations = row['cancelled']
+        return stats
+
+    def list_range(self, start_date: date, end_date: date,
+                   resource_ids: Optional[List[int]] = None) -> List[DailyResourceStatsEntity]:
+        queryset = DailyResourceStats.objects.filter(date__gte=start_date, date__lte=end_date)
+        if resource_ids is not None:
+            queryset = queryset.filter(resource_id__in=resource_ids)
+        return [self._to_entity(s) for s in queryset.order_by('date', 'resource_id')]
+
+    def _to_entity(self, model: DailyResourceStats) -> DailyResourceStatsEntity:
+        return DailyResourceStatsEntity(
+            id=model.id,
+            resource_id=model.resource_id,
+            date=model.date,
+            slots_offered=model.slots_offered,
+            bookings=model.bookings,
+            cancellations=model.cancellations,
+            peak_occupancy=model.peak_occupancy
+        )
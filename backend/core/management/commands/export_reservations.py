@@ -0,0 +1,48 @@
+"""
+Writes the reservation history (joined with slot and resource data) for BI jobs.
+
+    python manage.py export_reservations --output reservations.csv
+    python manage.py export_reservations --format npz --output reservations.npz
+    python manage.py export_reservations --start-date 2026-01-01 --end-date 2026-03-31 --status ACTIVE > q1.csv
+"""
+import sys
+from datetime import datetime
+from django.core.management.base import BaseCommand, CommandError
+from core.application.services.analytics_export_service import AnalyticsExportService
+from core.infrastructure.persistence.repositories.implementations import ReservationRepository
+
+
+class Command(BaseCommand):
+    help = 'Export reservations joined with slots and resources as CSV or a columnar .npz archive'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=['csv', 'npz'], default='csv')
+        parser.add_argument('--output', help='Target file (CSV defaults to stdout)')
+        parser.add_argument('--start-date', help='YYYY-MM-DD, by slot start')
+        parser.add_argument('--end-date', help='YYYY-MM-DD, by slot start')
+        parser.add_argument('--status', choices=['ACTIVE', 'CANCELLED'])
+
+    def handle(self, *args, **options):
+        service = AnalyticsExportService(ReservationRepository())
+        try:
+            start_date = datetime.strptime(options['start_date'], '%Y-%m-%d').date() if options['start_date'] else None
+            end_date = datetime.strptime(options['end_date'], '%Y-%m-%d').date() if options['end_date'] else None
+
+            if options['format'] == 'npz':
+                if not options['output']:
+                    raise CommandError('--output is required for the npz format')
+                with open(options['output'], 'wb') as output:
+                    count = service.write_npz(output, start_date, end_date, options['status'])
+                self.stderr.write(f"Wrote {count} reservation(s) to {options['output']}")
+                return
+
+            chunks = service.iter_csv(start_date, end_date, options['status'])
+            if options['output']:
+                with open(options['output'], 'wb') as output:
+                    for chunk in chunks:
+                        output.write(chunk)
+            else:
+                for chunk in chunks:
+                    sys.stdout.buffer.write(chunk)
+        except ValueError as e:
+            raise CommandError(str(e))
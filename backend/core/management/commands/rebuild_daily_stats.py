@@ -0,0 +1,69 @@
+"""
+Backfills or rebuilds the daily_resource_stats rollup from time slots and reservations.
+
+    python manage.py rebuild_daily_stats                                   # every day with slots
+    python manage.py rebuild_daily_stats --start-date 2025-01-01 --end-date 2025-12-31
+    python manage.py rebuild_daily_stats --resource 3 --chunk-days 7
+
+Each chunk of days is locked, recomputed and overwritten in its own transaction, so a long
+history never holds one huge transaction, bookings made meanwhile are not lost, and an
+interrupted run can simply be repeated.
+"""
+from datetime import datetime, timedelta
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Max, Min
+from django.utils import timezone
+from core.models import TimeSlot
+from core.infrastructure.persistence.repositories.implementations import DailyStatsRepository
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the per-resource daily occupancy rollup in chunks of days'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start-date', help='First local day (YYYY-MM-DD), default the earliest slot')
+        parser.add_argument('--end-date', help='Last local day (YYYY-MM-DD), default the latest slot')
+        parser.add_argument('--resource', type=int, help='Limit to one resource id')
+        parser.add_argument('--chunk-days', type=int, default=31)
+
+    def handle(self, *args, **options):
+        if options['chunk_days'] < 1:
+            raise CommandError('--chunk-days must be at least 1')
+        try:
+            start_date, end_date = self._date_range(options)
+        except ValueError as e:
+            raise CommandError(str(e))
+        if start_date is None:
+            self.stdout.write('No time slots, nothing to rebuild')
+            return
+        if start_date > end_date:
+            raise CommandError('--start-date must not be after --end-date')
+
+        repo = DailyStatsRepository()
+        resource_ids = [options['resource']] if options['resource'] else None
+        written = 0
+        chunk_start = start_date
+        while chunk_start <= end_date:
+            chunk_end = min(chunk_start + timedelta(days=options['chunk_days'] - 1), end_date)
+            rows = repo.rebuild(chunk_start, chunk_end, resource_ids)
+            written += rows
+            self.stdout.write(f"{chunk_start}..{chunk_end}: {rows} row(s)")
+            chunk_start = chunk_end + timedelta(days=1)
+
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {written} daily stats row(s) for {start_date}..{end_date}"))
+
+    @staticmethod
+    def _date_range(options):
+        parse = lambda value: datetime.strptime(value, '%Y-%m-%d').date()
+        start_date = parse(options['start_date']) if options['start_date'] else None
+        end_date = parse(options['end_date']) if options['end_date'] else None
+        if start_date is None or end_date is None:
+            slots = TimeSlot.objects.all()
+            if options['resource']:
+                slots = slots.filter(resource_id=options['resource'])
+            bounds = slots.aggregate(first=Min('start_time'), last=Max('start_time'))
+            if bounds['first'] is None:
+                return None, None
+            start_date = start_date or timezone.localdate(bounds['first'])
+            end_date = end_date or timezone.localdate(bounds['last'])
+        return start_date, end_date
@@ -0,0 +1,71 @@
+"""
+Rebuilds TimeSlot.active_count (and the is_available flag that follows it) from the reservations table.
+
+    python manage.py rebuild_slot_counters            # fix every drifted slot
+    python manage.py rebuild_slot_counters --check    # only report, exit code 1 on drift
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Case, Count, F, IntegerField, OuterRef, Q, Subquery, Value, When
+from django.db.models.functions import Coalesce
+from django.db.models.lookups import GreaterThanOrEqual
+from django.utils import timezone
+from core.models import Resource, TimeSlot, Reservation
+
+
+class Command(BaseCommand):
+    help = 'Rebuild or verify the denormalized active reservation counter on time slots'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--check', action='store_true', help='Report drifted slots without changing them')
+        parser.add_argument('--resource', type=int, help='Limit to one resource id')
+        parser.add_argument('--chunk-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        actual = (
+            Reservation.objects.filter(time_slot_id=OuterRef('pk'), status='ACTIVE')
+            .order_by()
+            .values('time_slot_id')
+            .annotate(total=Count('id'))
+            .values('total')
+        )
+        max_bookings = Subquery(Resource.objects.filter(id=OuterRef('resource_id')).values('max_bookings')[:1])
+        queryset = TimeSlot.objects.annotate(
+            actual=Coalesce(Subquery(actual, output_field=IntegerField()), Value(0)),
+            capacity=max_bookings
+        ).filter(~Q(active_count=F('actual')) | Q(is_available=True, actual__gte=F('capacity')))
+        if options['resource']:
+            queryset = queryset.filter(resource_id=options['resource'])
+
+        drifted = list(
+            queryset.values_list('id', 'active_count', 'actual', 'is_available', 'capacity')
+            .iterator(chunk_size=options['chunk_size'])
+        )
+
+        for slot_id, stored, real, available, capacity in drifted:
+            state = 'open' if available else 'closed'
+            self.stdout.write(f"TimeSlot {slot_id}: stored {stored}, actual {real}, capacity {capacity}, {state}")
+
+        if options['check']:
+            if drifted:
+                raise CommandError(f"{len(drifted)} time slot(s) have a wrong active_count or is_available")
+            self.stdout.write(self.style.SUCCESS('All active_count values are consistent'))
+            return
+
+        # Recount inside the UPDATE itself so bookings made since the scan are not overwritten
+        chunk_size = options['chunk_size']
+        recount = Coalesce(Subquery(actual, output_field=IntegerField()), Value(0))
+        ids = [slot_id for slot_id, *rest in drifted]
+        for i in range(0, len(ids), chunk_size):
+            TimeSlot.objects.filter(id__in=ids[i:i + chunk_size]).update(
+                active_count=recount,
+                updated_at=timezone.now(),
+                # Same rule as reserve_seat/release_seats: a full slot is closed, a slot that was closed
+                # because it was full re-opens once it has room; slots closed with room left stay closed
+                is_available=Case(
+                    When(GreaterThanOrEqual(recount, max_bookings), then=Value(False)),
+                    When(is_available=False, active_count__gte=max_bookings, then=Value(True)),
+                    default=F('is_available')
+                )
+            )
+
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt active_count for {len(drifted)} time slot(s)"))
@@ -0,0 +1,47 @@
+"""
+Worker for asynchronous schedule exports (ExportJob rows created through the API).
+
+    python manage.py run_export_jobs                  # poll forever, one render process per CPU
+    python manage.py run_export_jobs --once           # drain the queue and exit
+    python manage.py run_export_jobs --processes 0    # render inline, without a process pool
+
+Jobs left RUNNING by a killed worker are queued again once they have not made progress for --stale-after.
+"""
+import os
+import time
+from datetime import timedelta
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from core.application.services.export_job_service import ExportJobService
+from core.infrastructure.persistence.repositories.implementations import (
+    ExportJobRepository, ReservationRepository, UserRepository
+)
+
+
+class Command(BaseCommand):
+    help = 'Render pending schedule export jobs into zip archives under MEDIA_ROOT'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=os.cpu_count() or 1,
+                            help='Worker processes rendering members in parallel (0 = inline)')
+        parser.add_argument('--once', action='store_true', help='Exit when no job is pending')
+        parser.add_argument('--poll-interval', type=float, default=5.0, help='Seconds to wait when the queue is empty')
+        parser.add_argument('--stale-after', type=int, default=60,
+                            help='Minutes without progress after which a RUNNING job is considered abandoned and re-queued')
+
+    def handle(self, *args, **options):
+        service = ExportJobService(ExportJobRepository(), UserRepository(), ReservationRepository(), settings.MEDIA_ROOT,
+                                   timedelta(minutes=options['stale_after']))
+
+        while True:
+            job = service.run_next(options['processes'])
+            if job is None:
+                if options['once']:
+                    return
+                time.sleep(options['poll_interval'])
+                continue
+
+            if job.status == 'DONE':
+                self.stdout.write(self.style.SUCCESS(f"Export {job.id} done: {job.file_path}"))
+            else:
+                self.stderr.write(f"Export {job.id} failed: {job.error}")
@@ -0,0 +1,55 @@
+# Generated by Django 6.0 on 2026-10-17 00:38
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_resource_owner'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScheduleTemplate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('weekly_hours', models.JSONField(default=dict)),
+                ('slot_duration_minutes', models.IntegerField(default=60)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('resource', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='schedule_template', to='core.resource')),
+            ],
+            options={
+                'db_table': 'schedule_templates',
+            },
+        ),
+        migrations.CreateModel(
+            name='MaterializedDay',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('resource', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='materialized_days', to='core.resource')),
+            ],
+            options={
+                'db_table': 'schedule_materialized_days',
+                'unique_together': {('resource', 'date')},
+            },
+        ),
+        migrations.CreateModel(
+            name='ScheduleException',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('is_closed', models.BooleanField(default=True)),
+                ('open_time', models.TimeField(blank=True, null=True)),
+                ('close_time', models.TimeField(blank=True, null=True)),
+                ('reason', models.CharField(blank=True, max_length=200, null=True)),
+                ('resource', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='schedule_exceptions', to='core.resource')),
+            ],
+            options={
+                'db_table': 'schedule_exceptions',
+                'unique_together': {('resource', 'date')},
+            },
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 6.0 on 2026-10-17 00:40
+
+from django.db import migrations, models
+
+
+def backfill_active_count(apps, schema_editor):
+    TimeSlot = apps.get_model('core', 'TimeSlot')
+    Reservation = apps.get_model('core', 'Reservation')
+    counts = (
+        Reservation.objects.filter(status='ACTIVE')
+        .values('time_slot_id')
+        .annotate(total=models.Count('id'))
+    )
+    for row in counts.iterator():
+        TimeSlot.objects.filter(id=row['time_slot_id']).update(active_count=row['total'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_schedule_templates'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='timeslot',
+            name='active_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_active_count, migrations.RunPython.noop),
+    ]
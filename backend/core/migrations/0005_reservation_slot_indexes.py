@@ -0,0 +1,25 @@
+# Generated by Django 6.0 on 2026-10-17 00:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_timeslot_active_count'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='reservation',
+            index=models.Index(fields=['time_slot', 'status'], name='reservations_slot_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reservation',
+            index=models.Index(fields=['user', 'status', '-created_at'], name='reservations_user_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='timeslot',
+            index=models.Index(fields=['start_time'], name='time_slots_start_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 6.0 on 2026-10-17 00:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_reservation_slot_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='reservation',
+            index=models.Index(fields=['-created_at', '-id'], name='reservations_created_idx'),
+        ),
+    ]
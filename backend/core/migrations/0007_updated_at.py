@@ -0,0 +1,23 @@
+# Generated by Django 6.0 on 2026-10-17 00:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_reservation_created_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reservation',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='timeslot',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
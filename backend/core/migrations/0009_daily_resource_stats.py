@@ -0,0 +1,32 @@
+# Generated by Django 6.0 on 2026-10-17 01:25
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_export_jobs'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyResourceStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('slots_offered', models.IntegerField(default=0)),
+                ('bookings', models.IntegerField(default=0)),
+                ('cancellations', models.IntegerField(default=0)),
+                ('peak_occupancy', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('resource', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to='core.resource')),
+            ],
+            options={
+                'db_table': 'daily_resource_stats',
+                'indexes': [models.Index(fields=['date'], name='daily_resource_stats_date_idx')],
+                'unique_together': {('resource', 'date')},
+            },
+        ),
+    ]
@@ -51,10 +51,18 @@ class TimeSlot(models.Model):
     start_time = models.DateTimeField()
     end_time = models.DateTimeField()
     is_available = models.BooleanField(default=True)
+    # Number of ACTIVE reservations; checked and incremented in the same UPDATE when booking
+    active_count = models.IntegerField(default=0)
+    # Bumped on every write (set explicitly by queryset.update calls); feeds listing ETags
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         db_table = 'time_slots'
         unique_together = ['resource', 'start_time', 'end_time']
+        indexes = [
+            # Date/range lookups across all resources; per-resource ranges use the unique index
+            models.Index(fields=['start_time'], name='time_slots_start_idx'),
+        ]
 
     def __str__(self):
         return f"{self.resource.name}: {self.start_time.strftime('%Y-%m-%d %H:%M')} - {self.end_time.strftime('%H:%M')}"
@@ -71,9 +79,121 @@ class Reservation(models.Model):
     )
     notes = models.TextField(blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Bumped on every write (set explicitly by queryset.update calls); feeds listing ETags
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         db_table = 'reservations'
+        indexes = [
+            # count_by_timeslot / list_by_timeslot
+            models.Index(fields=['time_slot', 'status'], name='reservations_slot_status_idx'),
+            # list_by_user, newest first
+            models.Index(fields=['user', 'status', '-created_at'], name='reservations_user_status_idx'),
+            # admin listing, keyset paginated on (created_at, id)
+            models.Index(fields=['-created_at', '-id'], name='reservations_created_idx'),
+        ]
 
     def __str__(self):
-        return f"{self.user.email} - {self.resource.name} ({self.time_slot.start_time.strftime('%Y-%m-%d %H:%M')})"
\ No newline at end of file
+        return f"{self.user.email} - {self.resource.name} ({self.time_slot.start_time.strftime('%Y-%m-%d %H:%M')})"
+
+class ScheduleTemplate(models.Model):
+    resource = models.OneToOneField(Resource, on_delete=models.CASCADE, related_name='schedule_template')
+    # {"0": ["08:00", "22:00"], ...} keyed by weekday, Monday = 0; missing days are closed
+    weekly_hours = models.JSONField(default=dict)
+    slot_duration_minutes = models.IntegerField(default=60)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'schedule_templates'
+
+    def __str__(self):
+        return f"{self.resource.name} schedule"
+
+
+class ScheduleException(models.Model):
+    # Null resource means a gym-wide holiday
+    resource = models.ForeignKey(Resource, on_delete=models.CASCADE, null=True, blank=True, related_name='schedule_exceptions')
+    date = models.DateField()
+    is_closed = models.BooleanField(default=True)
+    open_time = models.TimeField(null=True, blank=True)
+    close_time = models.TimeField(null=True, blank=True)
+    reason = models.CharField(max_length=200, blank=True, null=True)
+
+    class Meta:
+        db_table = 'schedule_exceptions'
+        unique_together = ['resource', 'date']
+
+    def __str__(self):
+        target = self.resource.name if self.resource else 'All resources'
+        return f"{target}: {self.date} ({'closed' if self.is_closed else 'changed hours'})"
+
+
+class MaterializedDay(models.Model):
+    # Marks a (resource, date) whose slots were already created from the schedule template
+    resource = models.ForeignKey(Resource, on_delete=models.CASCADE, related_name='materialized_days')
+    date = models.DateField()
+
+    class Meta:
+        db_table = 'schedule_materialized_days'
+        unique_together = ['resource', 'date']
+
+
+class ExportJob(models.Model):
+    # Schedule export requested through the API and rendered by the run_export_jobs worker
+    requested_by = models.ForeignKey(User, on_delete=models.CASCADE, related_name='export_jobs')
+    kind = models.CharField(max_length=10, choices=[('html', 'HTML'), ('ics', 'iCalendar')])
+    # Members to export; null means every member with active reservations in the range
+    user_ids = models.JSONField(null=True, blank=True)
+    start_date = models.DateField()
+    end_date = models.DateField()
+    status = models.CharField(
+        max_length=10,
+        choices=[('PENDING', 'Pending'), ('RUNNING', 'Running'), ('DONE', 'Done'), ('FAILED', 'Failed')],
+        default='PENDING'
+    )
+    # Archive path relative to MEDIA_ROOT, set when the job is DONE
+    file_path = models.CharField(max_length=500, blank=True, null=True)
+    error = models.TextField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    # Claim token: bumped on every claim, so a worker that lost its job cannot finish it
+    attempt = models.PositiveIntegerField(default=0)
+    # Refreshed by the worker after every rendered member; a stale heartbeat means the worker died
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'export_jobs'
+        indexes = [
+            # Worker picks the oldest pending job
+            models.Index(fields=['status', 'created_at'], name='export_jobs_status_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} export {self.start_date} - {self.end_date} ({self.status})"
+
+
+class DailyResourceStats(models.Model):
+    # Per resource and local day rollup for reporting; kept current by the booking and slot
+    # services and rebuilt from history by the rebuild_daily_stats command
+    resource = models.ForeignKey(Resource, on_delete=models.CASCADE, related_name='daily_stats')
+    date = models.DateField()
+    # Slots that offered seats (a slot closed with room left was shut and offered nothing)
+    slots_offered = models.IntegerField(default=0)
+    # Reservations made for slots on this day, including ones cancelled later
+    bookings = models.IntegerField(default=0)
+    cancellations = models.IntegerField(default=0)
+    # Most active reservations held by one slot of the day
+    peak_occupancy = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'daily_resource_stats'
+        unique_together = ['resource', 'date']
+        indexes = [
+            # Reports across all resources for a date range
+            models.Index(fields=['date'], name='daily_resource_stats_date_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.resource.name}: {self.date} ({self.bookings - self.cancellations} active)"
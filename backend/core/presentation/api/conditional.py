@@ -0,0 +1,44 @@
+"""
+Conditional GET helpers: views compute a cheap ETag before doing the expensive
+part of the request and answer 304 Not Modified when the client already has it.
+"""
+import hashlib
+from typing import Iterable
+from django.http import HttpResponse
+from django.utils.http import parse_etags, quote_etag
+
+
+def make_etag(*parts) -> str:
+    return quote_etag('-'.join(str(part) for part in parts))
+
+
+def page_fingerprint(rows: Iterable[dict]) -> str:
+    """Digest of the ids and updated_at stamps of an already fetched page.
+
+    For paginated listings the page query itself is the cheapest fingerprint: any change,
+    insert or delete inside the page alters it, and nothing outside the page is read.
+    """
+    digest = hashlib.blake2b(digest_size=12)
+    for row in rows:
+        digest.update(f"{row['id']}:{row['updated_at'].timestamp()};".encode())
+    return digest.hexdigest()
+
+
+def is_not_modified(request, etag: str) -> bool:
+    header = request.META.get('HTTP_IF_NONE_MATCH')
+    if not header:
+        return False
+    # Weak comparison, as RFC 9110 requires for If-None-Match
+    tags = [tag.removeprefix('W/') for tag in parse_etags(header)]
+    return '*' in tags or etag.removeprefix('W/') in tags
+
+
+def not_modified(etag: str) -> HttpResponse:
+    response = HttpResponse(status=304)
+    response['ETag'] = etag
+    return response
+
+
+def with_etag(response, etag: str):
+    response['ETag'] = etag
+    return response
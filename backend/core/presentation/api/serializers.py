@@ -1,7 +1,10 @@
+from typing import Optional
 from core.domain.entities.user import UserEntity
 from core.domain.entities.resource import ResourceEntity
 from core.domain.entities.timeslot import TimeSlotEntity
 from core.domain.entities.reservation import ReservationEntity
+from core.domain.entities.schedule import ScheduleTemplateEntity, ScheduleExceptionEntity
+from core.domain.entities.export_job import ExportJobEntity
 
 
 class UserSerializer:
@@ -33,14 +36,85 @@ class ResourceSerializer:
 
 class TimeSlotSerializer:
     @staticmethod
-    def to_dict(entity: TimeSlotEntity) -> dict:
-        return {
+    def to_dict(entity: TimeSlotEntity, resource: Optional[ResourceEntity] = None) -> dict:
+        data = {
             'id': entity.id,
             'resource_id': entity.resource_id,
             'start_time': entity.start_time.isoformat(),
             'end_time': entity.end_time.isoformat(),
             'is_available': entity.is_available,
-            'duration_minutes': entity.duration_minutes
+            'duration_minutes': entity.duration_minutes,
+            'active_count': entity.active_count
+        }
+        if resource is not None:
+            data['available_spots'] = resource.get_available_spots(entity.active_count)
+        return data
+
+    @staticmethod
+    def row_to_dict(row: dict, resource: Optional[ResourceEntity] = None) -> dict:
+        # Same output as to_dict for a TimeSlotRepository.ROW_FIELDS row; rows were validated on write
+        start_time = row['start_time']
+        end_time = row['end_time']
+        data = {
+            'id': row['id'],
+            'resource_id': row['resource_id'],
+            'start_time': start_time.isoformat(),
+            'end_time': end_time.isoformat(),
+            'is_available': row['is_available'],
+            'duration_minutes': int((end_time - start_time).total_seconds() / 60),
+            'active_count': row['active_count']
+        }
+        if resource is not None:
+            data['available_spots'] = resource.get_available_spots(row['active_count'])
+        return data
+
+
+class UtilizationSerializer:
+    @staticmethod
+    def to_dict(utilization: dict) -> dict:
+        return {
+            'resources': [
+                {
+                    'resource': ResourceSerializer.to_dict(resource),
+                    'slots': utilization['slots'][i],
+                    'capacity': utilization['capacity'][i],
+                    'booked': utilization['booked'][i],
+                    'occupancy': utilization['occupancy'][i],
+                    'peak_hours': utilization['peak_hours'][i],
+                    'heatmap': utilization['heatmap'][i]
+                }
+                for i, resource in enumerate(utilization['resources'])
+            ]
+        }
+
+
+class DailyStatsSerializer:
+    @staticmethod
+    def to_dict(daily: dict) -> dict:
+        return {
+            'resources': [ResourceSerializer.to_dict(r) for r in daily['resources']],
+            'days': [
+                {
+                    'resource_id': day.resource_id,
+                    'date': day.date.isoformat(),
+                    'slots_offered': day.slots_offered,
+                    'bookings': day.bookings,
+                    'cancellations': day.cancellations,
+                    'active_bookings': day.active_bookings,
+                    'peak_occupancy': day.peak_occupancy
+                }
+                for day in daily['days']
+            ]
+        }
+
+
+class AvailabilityMatrixSerializer:
+    @staticmethod
+    def to_dict(availability: dict) -> dict:
+        return {
+            'resources': [ResourceSerializer.to_dict(r) for r in availability['resources']],
+            'slots': [start.isoformat() for start in availability['slots']],
+            'matrix': availability['matrix']
         }
 
 
@@ -55,4 +129,65 @@ class ReservationSerializer:
             'status': entity.status,
             'notes': entity.notes,
             'created_at': entity.created_at.isoformat() if entity.created_at else None
-        }
\ No newline at end of file
+        }
+
+    @staticmethod
+    def row_to_dict(row: dict) -> dict:
+        # Same output as to_dict for a ReservationRepository.ROW_FIELDS row; rows were validated on write
+        notes = row['notes']
+        created_at = row['created_at']
+        return {
+            'id': row['id'],
+            'user_id': row['user_id'],
+            'resource_id': row['resource_id'],
+            'time_slot_id': row['time_slot_id'],
+            'status': row['status'],
+            'notes': notes if notes is None or notes.strip() else None,
+            'created_at': created_at.isoformat() if created_at else None
+        }
+
+
+class ScheduleTemplateSerializer:
+    @staticmethod
+    def to_dict(entity: ScheduleTemplateEntity) -> dict:
+        return {
+            'id': entity.id,
+            'resource_id': entity.resource_id,
+            'weekly_hours': {
+                str(weekday): [open_time.strftime('%H:%M'), close_time.strftime('%H:%M')]
+                for weekday, (open_time, close_time) in sorted(entity.weekly_hours.items())
+            },
+            'slot_duration_minutes': entity.slot_duration_minutes
+        }
+
+
+class ScheduleExceptionSerializer:
+    @staticmethod
+    def to_dict(entity: ScheduleExceptionEntity) -> dict:
+        return {
+            'id': entity.id,
+            'resource_id': entity.resource_id,
+            'date': entity.date.isoformat(),
+            'is_closed': entity.is_closed,
+            'open_time': entity.open_time.strftime('%H:%M') if entity.open_time else None,
+            'close_time': entity.close_time.strftime('%H:%M') if entity.close_time else None,
+            'reason': entity.reason
+        }
+
+
+class ExportJobSerializer:
+    @staticmethod
+    def to_dict(entity: ExportJobEntity) -> dict:
+        return {
+            'id': entity.id,
+            'kind': entity.kind,
+            'status': entity.status,
+            'start_date': entity.start_date.isoformat(),
+            'end_date': entity.end_date.isoformat(),
+            'user_ids': entity.user_ids,
+            'error': entity.error,
+            'created_at': entity.created_at.isoformat() if entity.created_at else None,
+            'started_at': entity.started_at.isoformat() if entity.started_at else None,
+            'finished_at': entity.finished_at.isoformat() if entity.finished_at else None,
+            'download_url': f'/api/export/jobs/{entity.id}/download/' if entity.is_ready() else None
+        }
@@ -0,0 +1,37 @@
+"""
+Streaming JSON responses for listings that are too large to build in memory.
+Rows are encoded as they arrive from the database cursor, so peak memory does
+not depend on the number of rows.
+"""
+import json
+from typing import Any, Callable, Iterable, Iterator
+from django.http import StreamingHttpResponse
+
+# Rows encoded per yielded chunk; keeps the number of socket writes low without buffering much
+ROWS_PER_CHUNK = 500
+
+
+def _dumps(value: Any) -> str:
+    # Same compact, non-ASCII-escaping output as DRF's JSONRenderer
+    return json.dumps(value, ensure_ascii=False, separators=(',', ':'))
+
+
+def iter_json_list(key: str, items: Iterable[Any], to_dict: Callable[[Any], dict]) -> Iterator[bytes]:
+    yield ('{"success":true,' + _dumps(key) + ':[').encode('utf-8')
+
+    buffer = []
+    first = True
+    for item in items:
+        encoded = _dumps(to_dict(item))
+        buffer.append(encoded if first else ',' + encoded)
+        first = False
+        if len(buffer) >= ROWS_PER_CHUNK:
+            yield ''.join(buffer).encode('utf-8')
+            buffer = []
+
+    buffer.append(']}')
+    yield ''.join(buffer).encode('utf-8')
+
+
+def streaming_json_response(key: str, items: Iterable[Any], to_dict: Callable[[Any], dict]) -> StreamingHttpResponse:
+    return StreamingHttpResponse(iter_json_list(key, items, to_dict), content_type='application/json')
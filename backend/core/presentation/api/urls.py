@@ -8,17 +8,33 @@ urlpatterns = [
     path("auth/register/", register),
     path("auth/refresh/", TokenRefreshView.as_view(), name='token_refresh'),
     path('reservations/create/', views.create_reservation, name='create_reservation'),
+    path('reservations/batch/', views.create_reservations_batch, name='create_reservations_batch'),
     # list reservations for authenticated user
     path('reservations/', views.list_user_reservations, name='list_user_reservations'),
+    path('reservations/summary/', views.reservation_summary, name='reservation_summary'),
     path('reservations/<int:reservation_id>/cancel/', views.cancel_reservation, name='cancel_reservation'),
+    path('reservations/cancel-bulk/', views.cancel_reservations_bulk, name='cancel_reservations_bulk'),
+    path('reservations/overlaps/', views.audit_double_bookings, name='audit_double_bookings'),
 
     path('resources/', views.list_resources, name='list_resources'),
     path('resources/create/', views.create_resource, name='create_resource'),
+    path('resources/<int:resource_id>/close/', views.close_resource, name='close_resource'),
+    path('resources/<int:resource_id>/schedule/', views.resource_schedule, name='resource_schedule'),
+    path('schedule/exceptions/', views.create_schedule_exception, name='create_schedule_exception'),
 
     path('timeslots/', views.list_timeslots, name='list_timeslots'),
     path('timeslots/generate/', views.generate_timeslots, name='generate_timeslots'),
+    path('timeslots/next-available/', views.next_available_timeslots, name='next_available_timeslots'),
+    path('availability/', views.availability_matrix, name='availability_matrix'),
+    path('analytics/utilization/', views.resource_utilization, name='resource_utilization'),
+    path('analytics/daily/', views.resource_daily_stats, name='resource_daily_stats'),
     
     # Export endpoints
     path('export/weekly-schedule-print/', views.export_weekly_schedule_print, name='export_weekly_schedule_print'),
     path('export/calendar.ics', views.export_calendar_ics, name='export_calendar_ics'),
+    path('export/reservations.csv', views.export_reservations_csv, name='export_reservations_csv'),
+    path('export/reservations.npz', views.export_reservations_npz, name='export_reservations_npz'),
+    path('export/jobs/', views.create_export_job, name='create_export_job'),
+    path('export/jobs/<int:job_id>/', views.export_job_status, name='export_job_status'),
+    path('export/jobs/<int:job_id>/download/', views.download_export_job, name='download_export_job'),
 ]
\ No newline at end of file
@@ -3,28 +3,62 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
 import json
+import tempfile
 from core.application.services.reservation_service import ReservationService
 from core.application.services.resource_service import ResourceService
-from core.application.services.export_service import WeeklySchedulePrintService, ICalendarExportService
+from core.application.services.schedule_service import ScheduleService
+from core.application.services.availability_service import AvailabilityService
+from core.application.services.export_job_service import ExportJobService
+from core.application.services.analytics_export_service import AnalyticsExportService
+from core.application.services.utilization_service import UtilizationService
+from core.application.services.export_service import (
+    WeeklySchedulePrintService, ICalendarExportService, CachedScheduleExport
+)
 from core.infrastructure.persistence.repositories.implementations import (
-    UserRepository, ResourceRepository, TimeSlotRepository, ReservationRepository
+    UserRepository, ResourceRepository, TimeSlotRepository, ReservationRepository, ScheduleRepository,
+    ExportJobRepository, DailyStatsRepository
+)
+from core.presentation.api.pagination import get_page_size, decode_cursor, split_page
+from core.presentation.api.streaming import streaming_json_response
+from core.presentation.api.renderers import fast_json_response
+from core.presentation.api.conditional import make_etag, page_fingerprint, is_not_modified, not_modified, with_etag
+from core.presentation.api.serializers import (
+    ReservationSerializer, ResourceSerializer, TimeSlotSerializer, AvailabilityMatrixSerializer, ExportJobSerializer,
+    UtilizationSerializer, DailyStatsSerializer,
+    ScheduleTemplateSerializer, ScheduleExceptionSerializer
 )
-from core.presentation.api.serializers import ReservationSerializer, ResourceSerializer, TimeSlotSerializer
-from datetime import datetime
-from django.http import HttpResponse
+from datetime import datetime, time, timedelta
+from django.conf import settings
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.utils import timezone
 
 
 user_repo = UserRepository()
 resource_repo = ResourceRepository()
 timeslot_repo = TimeSlotRepository()
 reservation_repo = ReservationRepository()
+schedule_repo = ScheduleRepository()
+daily_stats_repo = DailyStatsRepository()
+
+schedule_service = ScheduleService(schedule_repo, timeslot_repo, resource_repo, daily_stats_repo)
+reservation_service = ReservationService(
+    reservation_repo, user_repo, resource_repo, timeslot_repo, schedule_service, daily_stats_repo
+)
+resource_service = ResourceService(resource_repo, timeslot_repo, daily_stats_repo)
+availability_service = AvailabilityService(timeslot_repo, resource_repo, schedule_service)
+utilization_service = UtilizationService(timeslot_repo, resource_repo, daily_stats_repo)
 
-reservation_service = ReservationService(reservation_repo, user_repo, resource_repo, timeslot_repo)
-resource_service = ResourceService(resource_repo, timeslot_repo)
+# How many days ahead list_timeslots materializes template slots when no range is given
+SCHEDULE_LOOKAHEAD_DAYS = 7
 
-# Export services
-weekly_schedule_service = WeeklySchedulePrintService(reservation_repo, resource_repo, timeslot_repo, user_repo)
-icalendar_service = ICalendarExportService(reservation_repo, user_repo)
+# Export services; repeated downloads of unchanged data are served from the cache
+weekly_schedule_service = CachedScheduleExport(
+    WeeklySchedulePrintService(reservation_repo, resource_repo, timeslot_repo, user_repo), reservation_repo, resource_repo
+)
+icalendar_service = CachedScheduleExport(ICalendarExportService(reservation_repo, user_repo), reservation_repo, resource_repo)
+# Long or multi-member exports are queued and rendered by the run_export_jobs worker
+export_job_service = ExportJobService(ExportJobRepository(), user_repo, reservation_repo, settings.MEDIA_ROOT)
+analytics_export_service = AnalyticsExportService(reservation_repo)
 
 
 @api_view(['POST'])
@@ -34,12 +68,19 @@ def create_reservation(request):
         data = request.data if hasattr(request, 'data') else json.loads(request.body)
         resource_id = data.get('resource_id')
         timeslot_id = data.get('timeslot_id')
+        start_time = data.get('start_time')
         notes = data.get('notes')
 
-        # Use authenticated user
-        user_id = request.user.id
+        # Use authenticated user; already loaded by authentication, so services needn't refetch it
+        user_id = user_repo.remember(request.user).id
 
-        reservation = reservation_service.create_reservation(user_id, resource_id, timeslot_id, notes)
+        if timeslot_id is None and start_time:
+            # Book a template slot by its start time; it is created on demand
+            reservation = reservation_service.create_reservation_at(
+                user_id, resource_id, datetime.fromisoformat(start_time), notes
+            )
+        else:
+            reservation = reservation_service.create_reservation(user_id, resource_id, timeslot_id, notes)
 
         return Response({'success': True, 'reservation': ReservationSerializer.to_dict(reservation)}, status=status.HTTP_201_CREATED)
     except ValueError as e:
@@ -48,19 +89,134 @@ def create_reservation(request):
         return Response({'success': False, 'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def create_reservations_batch(request):
+    """
+    Book several slots of one resource at once.
+    Body: resource_id, timeslot_ids, optional notes, mode ('all_or_nothing' (default) or 'best_effort')
+    """
+    try:
+        data = request.data
+        mode = data.get('mode', 'all_or_nothing')
+        if mode not in ('all_or_nothing', 'best_effort'):
+            raise ValueError("mode трябва да е all_or_nothing или best_effort")
+
+        user_id = user_repo.remember(request.user).id
+        results = reservation_service.create_reservations_batch(
+            user_id,
+            data.get('resource_id'),
+            [int(slot_id) for slot_id in data.get('timeslot_ids') or []],
+            data.get('notes'),
+            all_or_nothing=mode == 'all_or_nothing'
+        )
+
+        booked = sum(1 for r in results if r['success'])
+        return Response({
+            'success': booked == len(results),
+            'booked': booked,
+            'results': [
+                {**r, 'reservation': ReservationSerializer.to_dict(r['reservation'])} if r['success'] else r
+                for r in results
+            ]
+        }, status=status.HTTP_201_CREATED if booked else status.HTTP_400_BAD_REQUEST)
+    except ValueError as e:
+        return Response({'success': False, 'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    except Exception as e:
+        return Response({'success': False, 'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def list_user_reservations(request):
     try:
         status_filter = request.GET.get('status')
+        is_admin = getattr(request.user, 'role', None) == 'ADMIN'
+
+        if request.GET.get('stream') in ('1', 'true'):
+            # Full export: rows are written as they come off the database cursor instead of paginated.
+            # It reads every row anyway, so a fingerprint over the same rows costs no more than that.
+            etag = make_etag('reservations', request.user.id, status_filter,
+                             reservation_repo.fingerprint(None if is_admin else request.user.id))
+            if is_not_modified(request, etag):
+                return not_modified(etag)
+            if is_admin:
+                reservations = reservation_repo.iter_all(status_filter)
+            else:
+                reservations = reservation_repo.iter_by_user(request.user.id, status_filter)
+            return with_etag(streaming_json_response('reservations', reservations, ReservationSerializer.to_dict), etag)
+
+        limit = get_page_size(request)
+        after = decode_cursor(request.GET.get('cursor'))
         # If admin, list ALL reservations; otherwise only the authenticated user's
-        if getattr(request.user, 'role', None) == 'ADMIN':
-            reservations = reservation_repo.list_all(status_filter)
+        # One extra row is fetched to know whether another page exists
+        # Read-only listing: rows are serialized straight from the projection, without entities
+        if is_admin:
+            rows = reservation_repo.list_all_page_rows(status_filter, after, limit + 1)
         else:
-            user_id = request.user.id
-            reservations = reservation_service.get_user_reservations(user_id, status_filter)
+            rows = reservation_repo.list_by_user_page_rows(request.user.id, status_filter, after, limit + 1)
+
+        # Tagged by the page just read rather than a whole-table aggregate; 304 skips the serialization
+        etag = make_etag('reservations', request.user.id, status_filter, limit, page_fingerprint(rows))
+        if is_not_modified(request, etag):
+            return not_modified(etag)
+        rows, next_cursor = split_page(rows, limit, lambda r: (r['created_at'], r['id']))
+        return with_etag(fast_json_response({
+            'success': True,
+            'reservations': [ReservationSerializer.row_to_dict(r) for r in rows],
+            'next_cursor': next_cursor
+        }), etag)
+    except ValueError as e:
+        return Response({'success': False, 'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    except Exception as e:
+        return Response({'success': False, 'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-        return Response({'success': True, 'reservations': [ReservationSerializer.to_dict(r) for r in reservations]})
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def reservation_summary(request):
+    """
+    Reservation counts for dashboards, over the same reservations list_user_reservations pages through:
+    total, active, cancelled and this_month (created since the first of the local month).
+    """
+    try:
+        is_admin = getattr(request.user, 'role', None) == 'ADMIN'
+        month_start = timezone.localtime().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+        counts = reservation_repo.count_summary(None if is_admin else request.user.id, month_start)
+        return Response({
+            'success': True,
+            'total': counts['total'],
+            'active': counts['active'],
+            'cancelled': counts['cancelled'],
+            'this_month': counts['created_since']
+        })
+    except Exception as e:
+        return Response({'success': False, 'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def audit_double_bookings(request):
+    """
+    Admin audit of members holding overlapping active reservations.
+    Query params: start_date, end_date (YYYY-MM-DD)
+    """
+    try:
+        if not getattr(request.user, 'role', None) == 'ADMIN':
+            return Response({'success': False, 'error': 'Неавторизирано: само администратор може да вижда одита'}, status=status.HTTP_403_FORBIDDEN)
+
+        start_date_str = request.GET.get('start_date')
+        end_date_str = request.GET.get('end_date')
+        if not start_date_str or not end_date_str:
+            return Response({'success': False, 'error': 'start_date и end_date са задължителни (YYYY-MM-DD формат)'}, status=status.HTTP_400_BAD_REQUEST)
+
+        conflicts = reservation_service.find_double_bookings(
+            datetime.strptime(start_date_str, '%Y-%m-%d'),
+            datetime.strptime(end_date_str, '%Y-%m-%d')
+        )
+        return Response({'success': True, 'conflicts': conflicts})
+    except ValueError as e:
+        return Response({'success': False, 'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
     except Exception as e:
         return Response({'success': False, 'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
@@ -70,7 +226,7 @@ def list_user_reservations(request):
 def cancel_reservation(request, reservation_id):
     try:
         # authenticated user
-        user_id = request.user.id
+        user_id = user_repo.remember(request.user).id
 
         reservation = reservation_service.cancel_reservation(reservation_id, user_id)
 
@@ -81,15 +237,80 @@ def cancel_reservation(request, reservation_id):
         return Response({'success': False, 'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def cancel_reservations_bulk(request):
+    """
+    Cancel the authenticated user's upcoming reservations in a date range.
+    Body: start_date, end_date (YYYY-MM-DD), optional resource_id
+    """
+    try:
+        data = request.data
+        if not data.get('start_date') or not data.get('end_date'):
+            return Response({'success': False, 'error': 'start_date и end_date са задължителни (YYYY-MM-DD формат)'}, status=status.HTTP_400_BAD_REQUEST)
+
+        user_id = user_repo.remember(request.user).id
+        results = reservation_service.cancel_reservations_in_range(
+            user_id,
+            datetime.strptime(data['start_date'], '%Y-%m-%d').date(),
+            datetime.strptime(data['end_date'], '%Y-%m-%d').date(),
+            data.get('resource_id')
+        )
+        cancelled = sum(1 for r in results if r['success'])
+        return Response({'success': cancelled == len(results), 'cancelled': cancelled, 'results': results})
+    except ValueError as e:
+        return Response({'success': False, 'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    except Exception as e:
+        return Response({'success': False, 'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def close_resource(request, resource_id):
+    """
+    Admin: close a resource for maintenance and cancel every upcoming reservation on it.
+    Body: start_date, end_date (YYYY-MM-DD)
+    """
+    try:
+        if not getattr(request.user, 'role', None) == 'ADMIN':
+            return Response({'success': False, 'error': 'Неавторизирано: само администратор може да затваря ресурси'}, status=status.HTTP_403_FORBIDDEN)
+
+        data = request.data
+        if not data.get('start_date') or not data.get('end_date'):
+            return Response({'success': False, 'error': 'start_date и end_date са задължителни (YYYY-MM-DD формат)'}, status=status.HTTP_400_BAD_REQUEST)
+
+        outcome = reservation_service.close_resource(
+            user_repo.remember(request.user).id,
+            resource_id,
+            datetime.strptime(data['start_date'], '%Y-%m-%d').date(),
+            datetime.strptime(data['end_date'], '%Y-%m-%d').date()
+        )
+        return Response({
+            'success': True,
+            'cancelled': len(outcome['results']),
+            'closed_slots': outcome['closed_slots'],
+            'results': outcome['results']
+        })
+    except ValueError as e:
+        return Response({'success': False, 'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    except Exception as e:
+        return Response({'success': False, 'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def list_resources(request):
     try:
         type_filter = request.GET.get('type')
+        # The catalog version changes on every resource write, so it identifies the response
+        etag = make_etag('resources', resource_service.catalog_version())
+        if is_not_modified(request, etag):
+            return not_modified(etag)
+
         # Resources are gym-owned and visible to all users. Only admins can create them.
         resources = resource_service.list_resources(type_filter, None)
 
-        return Response({'success': True, 'resources': [ResourceSerializer.to_dict(r) for r in resources]})
+        return with_etag(Response({'success': True, 'resources': [ResourceSerializer.to_dict(r) for r in resources]}), etag)
     except Exception as e:
         return Response({'success': False, 'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
@@ -138,9 +359,14 @@ def generate_timeslots(request):
         if not resource:
             return Response({'success': False, 'error': 'Resource не съществува'}, status=status.HTTP_404_NOT_FOUND)
 
-        resource_service.generate_timeslots(resource_id, start_date, end_date, duration)
+        result = resource_service.generate_timeslots(resource_id, start_date, end_date, duration)
 
-        return Response({'success': True, 'message': 'TimeSlots generated'})
+        return Response({
+            'success': True,
+            'message': 'TimeSlots generated',
+            'created': result['created'],
+            'skipped': result['skipped']
+        })
     except ValueError as e:
         return Response({'success': False, 'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
     except Exception as e:
@@ -153,20 +379,240 @@ def list_timeslots(request):
     try:
         resource_id = request.GET.get('resource_id')
         date_str = request.GET.get('date')
+        start_date_str = request.GET.get('start_date')
+        end_date_str = request.GET.get('end_date')
+        next_cursor = None
 
         if date_str:
-            date = datetime.fromisoformat(date_str)
-            timeslots = timeslot_repo.list_by_date(date)
+            day = datetime.fromisoformat(date_str).date()
+            schedule_service.ensure_slots(None, day, day)
+            resource_ids, start_day, end_day = None, day, day
         elif resource_id:
             # Resources are visible to all users; just ensure the resource exists
             res = resource_repo.get_by_id(int(resource_id))
             if not res:
                 return Response({'success': False, 'error': 'Resource not found'}, status=status.HTTP_404_NOT_FOUND)
-            timeslots = timeslot_repo.list_by_resource(int(resource_id))
+            if start_date_str and end_date_str:
+                start_day = datetime.fromisoformat(start_date_str).date()
+                end_day = datetime.fromisoformat(end_date_str).date()
+                schedule_service.ensure_slots([res.id], start_day, end_day)
+            else:
+                today = timezone.localdate()
+                schedule_service.ensure_slots([res.id], today, today + timedelta(days=SCHEDULE_LOOKAHEAD_DAYS - 1))
+                start_day = end_day = None
+            resource_ids = [res.id]
         else:
             return Response({'success': False, 'error': 'Provide resource_id or date'}, status=status.HTTP_400_BAD_REQUEST)
 
-        return Response({'success': True, 'timeslots': [TimeSlotSerializer.to_dict(t) for t in timeslots]})
+        # Capacity comes from the resources, so their catalog version is part of the ETag too
+        if start_day is not None:
+            etag = make_etag('timeslots', timeslot_repo.fingerprint(resource_ids, start_day, end_day), resource_service.catalog_version())
+            if is_not_modified(request, etag):
+                return not_modified(etag)
+            timeslots = timeslot_repo.list_by_date_range_rows(resource_ids, start_day, end_day)
+        else:
+            # Open-ended listing covers the resource's whole history, so it is paginated and
+            # tagged by the page just read instead of an aggregate over every slot of the resource
+            limit = get_page_size(request)
+            timeslots = timeslot_repo.list_by_resource_page_rows(resource_ids[0], decode_cursor(request.GET.get('cursor')), limit + 1)
+            etag = make_etag('timeslots', resource_ids[0], limit, page_fingerprint(timeslots), resource_service.catalog_version())
+            if is_not_modified(request, etag):
+                return not_modified(etag)
+            timeslots, next_cursor = split_page(timeslots, limit, lambda t: (t['start_time'], t['id']))
+        # The catalog is cached, so remaining capacity needs no per-slot lookups
+        resources = {r.id: r for r in resource_repo.list_all()}
+
+        return with_etag(fast_json_response({
+            'success': True,
+            'timeslots': [TimeSlotSerializer.row_to_dict(t, resources.get(t['resource_id'])) for t in timeslots],
+            'next_cursor': next_cursor
+        }), etag)
+    except ValueError as e:
+        return Response({'success': False, 'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    except Exception as e:
+        return Response({'success': False, 'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def availability_matrix(request):
+    """
+    Remaining capacity per resource x slot start for a week view, in one request.
+    Query params: start_date, end_date (YYYY-MM-DD), optional resource_ids (comma separated), type
+    """
+    try:
+        start_date_str = request.GET.get('start_date')
+        end_date_str = request.GET.get('end_date')
+        if not start_date_str or not end_date_str:
+            return Response({'success': False, 'error': 'start_date и end_date са задължителни (YYYY-MM-DD формат)'}, status=status.HTTP_400_BAD_REQUEST)
+
+        ids_param = request.GET.get('resource_ids')
+        resource_ids = [int(rid) for rid in ids_param.split(',') if rid] if ids_param else None
+
+        availability = availability_service.get_matrix(
+            resource_ids,
+            datetime.fromisoformat(start_date_str).date(),
+            datetime.fromisoformat(end_date_str).date(),
+            request.GET.get('type')
+        )
+        return fast_json_response({'success': True, **AvailabilityMatrixSerializer.to_dict(availability)})
+    except ValueError as e:
+        return Response({'success': False, 'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    except Exception as e:
+        return Response({'success': False, 'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def resource_utilization(request):
+    """
+    Admin: occupancy per resource, overall and as a weekday x hour heatmap, with peak hours.
+    Query params: start_date, end_date (YYYY-MM-DD), optional resource_ids (comma separated), type
+    """
+    try:
+        if not getattr(request.user, 'role', None) == 'ADMIN':
+            return Response({'success': False, 'error': 'Неавторизирано: само администратор може да вижда натоварването'}, status=status.HTTP_403_FORBIDDEN)
+
+        start_date_str = request.GET.get('start_date')
+        end_date_str = request.GET.get('end_date')
+        if not start_date_str or not end_date_str:
+            return Response({'success': False, 'error': 'start_date и end_date са задължителни (YYYY-MM-DD формат)'}, status=status.HTTP_400_BAD_REQUEST)
+
+        raw_ids = request.GET.get('resource_ids')
+        utilization = utilization_service.get_utilization(
+            datetime.strptime(start_date_str, '%Y-%m-%d').date(),
+            datetime.strptime(end_date_str, '%Y-%m-%d').date(),
+            [int(rid) for rid in raw_ids.split(',') if rid] if raw_ids else None,
+            request.GET.get('type')
+        )
+        return fast_json_response({'success': True, **UtilizationSerializer.to_dict(utilization)})
+    except ValueError as e:
+        return Response({'success': False, 'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    except Exception as e:
+        return Response({'success': False, 'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def resource_daily_stats(request):
+    """
+    Admin: precomputed per-day slots offered, bookings, cancellations and peak occupancy per resource.
+    Query params: start_date, end_date (YYYY-MM-DD), optional resource_ids (comma separated), type
+    """
+    try:
+        if not getattr(request.user, 'role', None) == 'ADMIN':
+            return Response({'success': False, 'error': 'Неавторизирано: само администратор може да вижда натоварването'}, status=status.HTTP_403_FORBIDDEN)
+
+        start_date_str = request.GET.get('start_date')
+        end_date_str = request.GET.get('end_date')
+        if not start_date_str or not end_date_str:
+            return Response({'success': False, 'error': 'start_date и end_date са задължителни (YYYY-MM-DD формат)'}, status=status.HTTP_400_BAD_REQUEST)
+
+        raw_ids = request.GET.get('resource_ids')
+        daily = utilization_service.get_daily_stats(
+            datetime.strptime(start_date_str, '%Y-%m-%d').date(),
+            datetime.strptime(end_date_str, '%Y-%m-%d').date(),
+            [int(rid) for rid in raw_ids.split(',') if rid] if raw_ids else None,
+            request.GET.get('type')
+        )
+        return fast_json_response({'success': True, **DailyStatsSerializer.to_dict(daily)})
+    except ValueError as e:
+        return Response({'success': False, 'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    except Exception as e:
+        return Response({'success': False, 'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def next_available_timeslots(request):
+    """
+    Earliest bookable slots across resources.
+    Query params: optional type, resource_ids (comma separated), start (ISO datetime, default now),
+    end (ISO datetime) or days (default 3), min_duration (minutes), limit (default 5)
+    """
+    try:
+        ids_param = request.GET.get('resource_ids')
+        resource_ids = [int(rid) for rid in ids_param.split(',') if rid] if ids_param else None
+
+        tz = timezone.get_current_timezone()
+        start_time = datetime.fromisoformat(request.GET['start']) if request.GET.get('start') else timezone.now()
+        if timezone.is_naive(start_time):
+            start_time = timezone.make_aware(start_time, tz)
+        if request.GET.get('end'):
+            end_time = datetime.fromisoformat(request.GET['end'])
+            if timezone.is_naive(end_time):
+                end_time = timezone.make_aware(end_time, tz)
+        else:
+            end_time = start_time + timedelta(days=int(request.GET.get('days', 3)))
+
+        found = availability_service.find_next_available(
+            start_time,
+            end_time,
+            resource_ids,
+            request.GET.get('type'),
+            int(request.GET.get('min_duration', 0)),
+            int(request.GET.get('limit', 5))
+        )
+        return Response({
+            'success': True,
+            'timeslots': [TimeSlotSerializer.to_dict(slot, resource) for slot, resource in found]
+        })
+    except ValueError as e:
+        return Response({'success': False, 'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    except Exception as e:
+        return Response({'success': False, 'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(['GET', 'POST'])
+@permission_classes([IsAuthenticated])
+def resource_schedule(request, resource_id):
+    try:
+        if request.method == 'GET':
+            template = schedule_service.get_template(resource_id)
+            return Response({
+                'success': True,
+                'schedule': ScheduleTemplateSerializer.to_dict(template) if template else None
+            })
+
+        # Only admins may change opening hours
+        if not getattr(request.user, 'role', None) == 'ADMIN':
+            return Response({'success': False, 'error': 'Неавторизирано: само администратор може да променя графика'}, status=status.HTTP_403_FORBIDDEN)
+
+        data = request.data
+        weekly_hours = {
+            int(weekday): (time.fromisoformat(hours[0]), time.fromisoformat(hours[1]))
+            for weekday, hours in data['weekly_hours'].items()
+        }
+        template = schedule_service.set_template(resource_id, weekly_hours, data.get('slot_duration_minutes', 60))
+
+        return Response({'success': True, 'schedule': ScheduleTemplateSerializer.to_dict(template)})
+    except (ValueError, KeyError, TypeError) as e:
+        return Response({'success': False, 'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    except Exception as e:
+        return Response({'success': False, 'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def create_schedule_exception(request):
+    try:
+        if not getattr(request.user, 'role', None) == 'ADMIN':
+            return Response({'success': False, 'error': 'Неавторизирано: само администратор може да променя графика'}, status=status.HTTP_403_FORBIDDEN)
+
+        data = request.data
+        # Without resource_id the exception is a gym-wide holiday
+        exception = schedule_service.add_exception(
+            resource_id=data.get('resource_id'),
+            day=datetime.fromisoformat(data['date']).date(),
+            is_closed=data.get('is_closed', True),
+            open_time=time.fromisoformat(data['open_time']) if data.get('open_time') else None,
+            close_time=time.fromisoformat(data['close_time']) if data.get('close_time') else None,
+            reason=data.get('reason')
+        )
+
+        return Response({'success': True, 'exception': ScheduleExceptionSerializer.to_dict(exception)}, status=status.HTTP_201_CREATED)
+    except (ValueError, KeyError) as e:
+        return Response({'success': False, 'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
     except Exception as e:
         return Response({'success': False, 'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
@@ -178,10 +624,10 @@ def list_timeslots(request):
 def export_weekly_schedule_print(request):
     """
     Export user's weekly schedule as HTML/printable format.
-    Query params: start_date (YYYY-MM-DD), end_date (YYYY-MM-DD)
+    Query params: start_date (YYYY-MM-DD), end_date (YYYY-MM-DD), all=1 (admins: every member)
     """
     try:
-        user_id = request.user.id
+        user_id = user_repo.remember(request.user).id
         
         start_date_str = request.GET.get('start_date')
         end_date_str = request.GET.get('end_date')
@@ -201,9 +647,12 @@ def export_weekly_schedule_print(request):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        html_content = weekly_schedule_service.export(user_id, start_date, end_date)
+        # Streamed one day section at a time, so long ranges print with constant memory
+        html_chunks = weekly_schedule_service.stream(
+            user_id, start_date, end_date, all_members=request.GET.get('all') in ('1', 'true')
+        )
         
-        response = HttpResponse(html_content, content_type='text/html; charset=utf-8')
+        response = StreamingHttpResponse(html_chunks, content_type='text/html; charset=utf-8')
         response['Content-Disposition'] = f'attachment; filename="sedmichnia_grafik_{start_date_str}_do_{end_date_str}.html"'
         
         return response
@@ -248,12 +697,19 @@ def export_calendar_ics(request):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        ics_content = icalendar_service.export(user_id, start_date, end_date)
+        # Calendar clients re-fetch every few minutes; answer 304 unless a reservation or resource changed
+        reservations_fingerprint = reservation_repo.fingerprint(user_id, start_date, end_date)
+        etag = make_etag('ics', user_id, reservations_fingerprint, resource_service.catalog_version())
+        if is_not_modified(request, etag):
+            return not_modified(etag)
+
+        # Streamed in chunks of events straight off the database cursor; the cache key reuses the ETag's fingerprint
+        ics_chunks = icalendar_service.stream(user_id, start_date, end_date, fingerprint=reservations_fingerprint)
         
-        response = HttpResponse(ics_content, content_type='text/calendar; charset=utf-8')
+        response = StreamingHttpResponse(ics_chunks, content_type='text/calendar; charset=utf-8')
         response['Content-Disposition'] = f'attachment; filename="gymdesk_calendar_{start_date_str}_do_{end_date_str}.ics"'
         
-        return response
+        return with_etag(response, etag)
         
     except ValueError as e:
         return Response(
@@ -264,4 +720,117 @@ def export_calendar_ics(request):
         return Response(
             {'success': False, 'error': f'Грешка при експорт: {str(e)}'},
             status=status.HTTP_500_INTERNAL_SERVER_ERROR
-        )
\ No newline at end of file
+        )
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def create_export_job(request):
+    """
+    Queue an export for the run_export_jobs worker.
+    Body: kind ('html' or 'ics'), start_date, end_date (YYYY-MM-DD),
+    optional user_ids (admins; omitted = every member with reservations in the range)
+    """
+    try:
+        data = request.data
+        if not data.get('start_date') or not data.get('end_date'):
+            return Response({'success': False, 'error': 'start_date и end_date са задължителни (YYYY-MM-DD формат)'}, status=status.HTTP_400_BAD_REQUEST)
+
+        user_ids = data.get('user_ids')
+        job = export_job_service.create_job(
+            user_repo.remember(request.user).id,
+            data.get('kind', 'html'),
+            datetime.strptime(data['start_date'], '%Y-%m-%d').date(),
+            datetime.strptime(data['end_date'], '%Y-%m-%d').date(),
+            [int(user_id) for user_id in user_ids] if user_ids is not None else None
+        )
+        return Response({'success': True, 'job': ExportJobSerializer.to_dict(job)}, status=status.HTTP_202_ACCEPTED)
+    except ValueError as e:
+        return Response({'success': False, 'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    except Exception as e:
+        return Response({'success': False, 'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def export_job_status(request, job_id):
+    try:
+        job = export_job_service.get_job(job_id, user_repo.remember(request.user).id)
+        return Response({'success': True, 'job': ExportJobSerializer.to_dict(job)})
+    except ValueError as e:
+        return Response({'success': False, 'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    except Exception as e:
+        return Response({'success': False, 'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def download_export_job(request, job_id):
+    try:
+        path = export_job_service.get_archive_path(job_id, user_repo.remember(request.user).id)
+        # FileResponse streams the archive from disk in blocks
+        return FileResponse(open(path, 'rb'), as_attachment=True, filename=f'gymdesk_export_{job_id}.zip',
+                            content_type='application/zip')
+    except ValueError as e:
+        return Response({'success': False, 'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    except Exception as e:
+        return Response({'success': False, 'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+def _analytics_filters(request):
+    start_date_str = request.GET.get('start_date')
+    end_date_str = request.GET.get('end_date')
+    return (
+        datetime.strptime(start_date_str, '%Y-%m-%d').date() if start_date_str else None,
+        datetime.strptime(end_date_str, '%Y-%m-%d').date() if end_date_str else None,
+        request.GET.get('status')
+    )
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def export_reservations_csv(request):
+    """
+    Admin: reservation history joined with slot and resource data, as streamed CSV.
+    Query params: optional start_date, end_date (YYYY-MM-DD, by slot start), status
+    """
+    try:
+        if not getattr(request.user, 'role', None) == 'ADMIN':
+            return Response({'success': False, 'error': 'Неавторизирано: само администратор може да експортира историята'}, status=status.HTTP_403_FORBIDDEN)
+
+        response = StreamingHttpResponse(
+            analytics_export_service.iter_csv(*_analytics_filters(request)), content_type='text/csv; charset=utf-8'
+        )
+        response['Content-Disposition'] = 'attachment; filename="gymdesk_reservations.csv"'
+        return response
+    except ValueError as e:
+        return Response({'success': False, 'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    except Exception as e:
+        return Response({'success': False, 'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def export_reservations_npz(request):
+    """
+    Admin: the same data as export_reservations_csv as a columnar NumPy .npz archive.
+    Query params: optional start_date, end_date (YYYY-MM-DD, by slot start), status
+    """
+    try:
+        if not getattr(request.user, 'role', None) == 'ADMIN':
+            return Response({'success': False, 'error': 'Неавторизирано: само администратор може да експортира историята'}, status=status.HTTP_403_FORBIDDEN)
+
+        # The archive is built in a temporary file (the zip directory comes last), then streamed from disk
+        archive = tempfile.TemporaryFile()
+        try:
+            analytics_export_service.write_npz(archive, *_analytics_filters(request))
+        except Exception:
+            archive.close()
+            raise
+        archive.seek(0)
+        return FileResponse(archive, as_attachment=True, filename='gymdesk_reservations.npz',
+                            content_type='application/octet-stream')
+    except ValueError as e:
+        return Response({'success': False, 'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    except Exception as e:
+        return Response({'success': False, 'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -0,0 +1,12 @@
+from core.infrastructure.persistence.identity_map import identity_scope
+
+
+class IdentityMapMiddleware:
+    """Gives each request its own repository identity map, dropped when the response is returned."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with identity_scope():
+            return self.get_response(request)
@@ -0,0 +1,10 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from core.models import Resource
+from core.infrastructure.persistence.repositories.implementations import invalidate_resource_catalog
+
+
+@receiver(post_save, sender=Resource)
+@receiver(post_delete, sender=Resource)
+def resource_changed(sender, **kwargs):
+    invalidate_resource_catalog()
@@ -0,0 +1,10 @@
+import pytest
+from django.core.cache import cache
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    # Rolled-back test transactions don't fire model signals, so cached catalogs would leak between tests
+    cache.clear()
+    yield
+    cache.clear()
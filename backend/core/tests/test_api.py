@@ -1,12 +1,23 @@
+import io
+import json
+import os
+import shutil
+import tempfile
+import zipfile
 import pytest
 from django.test import TestCase
 from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import override_settings
 from django.urls import reverse
+from django.utils import timezone
 from rest_framework.test import APITestCase
 from rest_framework import status
 from unittest.mock import patch, Mock
-from core.models import Resource, TimeSlot, Reservation
-from datetime import datetime, timedelta
+from core.models import Resource, TimeSlot, Reservation, ScheduleTemplate, ExportJob
+from core.infrastructure.persistence.repositories.implementations import ExportJobRepository
+from core.presentation.api import views
+from datetime import datetime, timedelta, timezone as dt_timezone
 
 User = get_user_model()
 
@@ -111,6 +122,20 @@ class TestReservationAPI(APITestCase):
         self.assertTrue(response.data['success'])
         self.assertIn('reservation', response.data)
 
+    def test_create_reservations_batch(self):
+        second = TimeSlot.objects.create(resource=self.resource, start_time=self.timeslot.start_time + timedelta(days=1),
+                                         end_time=self.timeslot.end_time + timedelta(days=1))
+
+        response = self.client.post('/api/reservations/batch/', {
+            'resource_id': self.resource.id,
+            'timeslot_ids': [self.timeslot.id, second.id],
+            'mode': 'best_effort'
+        }, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['booked'], 2)
+        self.assertEqual([r['reservation']['time_slot_id'] for r in response.data['results']], [self.timeslot.id, second.id])
+
     def test_create_reservation_conflict(self):
         # Create a resource with max_bookings=1
         conflict_resource = Resource.objects.create(
@@ -186,6 +211,23 @@ class TestReservationAPI(APITestCase):
         self.assertIn('attachment; filename=', response['Content-Disposition'])
         self.assertIn('sedmichnia_grafik', response['Content-Disposition'])
 
+    def test_export_weekly_schedule_streams_one_chunk_per_day(self):
+        Reservation.objects.create(user=self.user, resource=self.resource, time_slot=self.timeslot,
+                                   status='ACTIVE', notes='<b>late</b>')
+        day = self.timeslot.start_time.date()
+        data = {'start_date': day.isoformat(), 'end_date': (day + timedelta(days=6)).isoformat()}
+
+        response = self.client.get('/api/export/weekly-schedule-print/', data)
+        everyone = self.client.get('/api/export/weekly-schedule-print/', {**data, 'all': '1'})
+
+        self.assertTrue(response.streaming)
+        chunks = [chunk.decode('utf-8') for chunk in response.streaming_content]
+        self.assertEqual(len(chunks), 9)
+        self.assertIn('Test Room', chunks[1])
+        self.assertIn('&lt;b&gt;late&lt;/b&gt;', chunks[1])
+        self.assertEqual(sum('Няма резервации' in chunk for chunk in chunks), 6)
+        self.assertEqual(everyone.status_code, status.HTTP_400_BAD_REQUEST)
+
     def test_export_calendar_ics(self):
         # Create a reservation for the user
         Reservation.objects.create(
@@ -210,7 +252,7 @@ class TestReservationAPI(APITestCase):
         self.assertIn('attachment; filename=', response['Content-Disposition'])
         self.assertIn('.ics', response['Content-Disposition'])
         # Check that response contains iCalendar content
-        content = response.content.decode('utf-8')
+        content = b''.join(response.streaming_content).decode('utf-8')
         self.assertIn('BEGIN:VCALENDAR', content)
         self.assertIn('END:VCALENDAR', content)
 
@@ -254,13 +296,151 @@ class TestReservationAPI(APITestCase):
         response = self.client.get(url)
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertTrue(response.data['success'])
-        self.assertEqual(len(response.data['reservations']), 1)
+        self.assertTrue(response.json()['success'])
+        self.assertEqual(len(response.json()['reservations']), 1)
 
-        reservation_data = response.data['reservations'][0]
+        reservation_data = response.json()['reservations'][0]
         self.assertEqual(reservation_data['resource_id'], self.resource.id)
         self.assertEqual(reservation_data['status'], 'ACTIVE')
 
+    def test_get_user_reservations_paginated(self):
+        for i in range(5):
+            Reservation.objects.create(user=self.user, resource=self.resource, time_slot=self.timeslot, status='ACTIVE')
+        # Identical timestamps must still page without gaps or duplicates thanks to the id tie-breaker
+        Reservation.objects.update(created_at=datetime(2030, 1, 1, 12, 0, tzinfo=dt_timezone.utc))
+
+        seen = []
+        cursor = None
+        for _ in range(3):
+            url = '/api/reservations/?limit=2' + (f'&cursor={cursor}' if cursor else '')
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            seen += [r['id'] for r in response.json()['reservations']]
+            cursor = response.json()['next_cursor']
+
+        self.assertIsNone(cursor)
+        self.assertEqual(seen, sorted(Reservation.objects.values_list('id', flat=True), reverse=True))
+
+    def test_reservation_summary_counts_past_the_first_page(self):
+        for i in range(3):
+            Reservation.objects.create(user=self.user, resource=self.resource, time_slot=self.timeslot,
+                                       status='CANCELLED' if i == 0 else 'ACTIVE')
+        Reservation.objects.filter(status='CANCELLED').update(created_at=datetime(2020, 1, 1, tzinfo=dt_timezone.utc))
+
+        response = self.client.get('/api/reservations/summary/')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            {k: response.json()[k] for k in ('total', 'active', 'cancelled', 'this_month')},
+            {'total': 3, 'active': 2, 'cancelled': 1, 'this_month': 2}
+        )
+
+    def test_stream_all_reservations_as_admin(self):
+        admin = User.objects.create_superuser(email='admin@example.com', username='admin', password='adminpass123')
+        for owner in (self.user, admin, self.user):
+            Reservation.objects.create(user=owner, resource=self.resource, time_slot=self.timeslot,
+                                       status='ACTIVE', notes='Бележка, "quoted"')
+        self.client.force_authenticate(user=admin)
+
+        response = self.client.get('/api/reservations/?stream=1')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        payload = json.loads(b''.join(response.streaming_content))
+        self.assertTrue(payload['success'])
+        self.assertEqual(len(payload['reservations']), 3)
+        self.assertEqual(payload['reservations'][0]['notes'], 'Бележка, "quoted"')
+
+    def test_stream_own_reservations(self):
+        other = User.objects.create_user(email='other@example.com', username='other', password='testpass123')
+        Reservation.objects.create(user=self.user, resource=self.resource, time_slot=self.timeslot, status='ACTIVE')
+        Reservation.objects.create(user=other, resource=self.resource, time_slot=self.timeslot, status='ACTIVE')
+
+        response = self.client.get('/api/reservations/?stream=1')
+
+        payload = json.loads(b''.join(response.streaming_content))
+        self.assertEqual([r['user_id'] for r in payload['reservations']], [self.user.id])
+
+    def test_reservations_not_modified_until_changed(self):
+        reservation = Reservation.objects.create(user=self.user, resource=self.resource, time_slot=self.timeslot, status='ACTIVE')
+        etag = self.client.get('/api/reservations/?status=ACTIVE')['ETag']
+
+        cached = self.client.get('/api/reservations/?status=ACTIVE', HTTP_IF_NONE_MATCH=etag)
+        other_filter = self.client.get('/api/reservations/?status=CANCELLED', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(cached.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(other_filter.status_code, status.HTTP_200_OK)
+
+        self.client.post(f'/api/reservations/{reservation.id}/cancel/', format='json')
+        changed = self.client.get('/api/reservations/?status=ACTIVE', HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(changed.status_code, status.HTTP_200_OK)
+        self.assertEqual(changed.json()['reservations'], [])
+
+    def test_admin_reservation_pages_are_tagged_without_a_table_aggregate(self):
+        admin = User.objects.create_user(email='boss@example.com', username='boss', password='testpass123', role='ADMIN')
+        Reservation.objects.create(user=self.user, resource=self.resource, time_slot=self.timeslot, status='ACTIVE')
+        self.client.force_authenticate(user=admin)
+
+        with patch.object(views.reservation_repo, 'fingerprint', side_effect=AssertionError('whole-table fingerprint')):
+            etag = self.client.get('/api/reservations/?limit=5')['ETag']
+            cached = self.client.get('/api/reservations/?limit=5', HTTP_IF_NONE_MATCH=etag)
+            other_limit = self.client.get('/api/reservations/?limit=6', HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(cached.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(other_limit.status_code, status.HTTP_200_OK)
+
+    def test_export_calendar_ics_escapes_and_uses_local_time(self):
+        Reservation.objects.create(user=self.user, resource=self.resource, time_slot=self.timeslot,
+                                   status='ACTIVE', notes='a,b;c\\d\r\ne')
+        day = self.timeslot.start_time.date().isoformat()
+
+        response = self.client.get('/api/export/calendar.ics', {'start_date': day, 'end_date': day})
+
+        content = b''.join(response.streaming_content).decode('utf-8')
+        self.assertIn('Бележка: a\\,b\\;c\\\\d\\ne\n', content)
+        self.assertIn(f"DTSTART;TZID=Europe/Sofia:{self.timeslot.start_time.strftime('%Y%m%dT%H%M%S')}\n", content)
+
+    def test_export_calendar_ics_not_modified(self):
+        Reservation.objects.create(user=self.user, resource=self.resource, time_slot=self.timeslot, status='ACTIVE')
+        data = {
+            'start_date': datetime.now().strftime('%Y-%m-%d'),
+            'end_date': (datetime.now() + timedelta(days=1)).strftime('%Y-%m-%d')
+        }
+        first = self.client.get('/api/export/calendar.ics', data)
+
+        second = self.client.get('/api/export/calendar.ics', data, HTTP_IF_NONE_MATCH=first['ETag'])
+
+        self.assertEqual(second.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(second.content, b'')
+
+    def test_export_calendar_ics_fingerprints_once(self):
+        day = self.timeslot.start_time.date().isoformat()
+
+        with patch.object(views.reservation_repo, 'fingerprint', wraps=views.reservation_repo.fingerprint) as fingerprint:
+            response = self.client.get('/api/export/calendar.ics', {'start_date': day, 'end_date': day})
+            b''.join(response.streaming_content)
+
+        self.assertEqual(fingerprint.call_count, 1)
+
+    def test_double_booking_audit_is_admin_only(self):
+        Reservation.objects.create(user=self.user, resource=self.resource, time_slot=self.timeslot, status='ACTIVE')
+        Reservation.objects.create(user=self.user, resource=self.resource, time_slot=self.timeslot, status='ACTIVE')
+        day = self.timeslot.start_time.date().isoformat()  # naive local time in this fixture
+        url = f'/api/reservations/overlaps/?start_date={day}&end_date={day}'
+
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_403_FORBIDDEN)
+
+        self.client.force_authenticate(user=User.objects.create_superuser(email='admin@example.com', username='admin', password='adminpass123'))
+        response = self.client.get(url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([c['user_id'] for c in response.data['conflicts']], [self.user.id])
+
+    def test_get_user_reservations_invalid_cursor(self):
+        response = self.client.get('/api/reservations/?cursor=not-a-cursor')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
 
 class TestResourceAPI(APITestCase):
 
@@ -339,6 +519,42 @@ class TestResourceAPI(APITestCase):
 
         self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
 
+    def test_resources_not_modified_until_catalog_changes(self):
+        Resource.objects.create(name='Room A', type='ROOM', max_bookings=10, color_code='#FF5733')
+        first = self.client.get('/api/resources/')
+        etag = first['ETag']
+
+        cached = self.client.get('/api/resources/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(cached.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        self.client.force_authenticate(user=self.admin)
+        self.client.post('/api/resources/create/', {
+            'name': 'Room B', 'type': 'ROOM', 'max_bookings': 5, 'color_code': '#FF5733'
+        }, format='json')
+        changed = self.client.get('/api/resources/', HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(changed.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(changed['ETag'], etag)
+        self.assertEqual(len(changed.data['resources']), 2)
+
+
+    def test_close_resource_cancels_and_closes(self):
+        resource = Resource.objects.create(name='Pool', type='ROOM', max_bookings=1, color_code='#FF5733')
+        start = timezone.now() + timedelta(days=2)
+        slot = TimeSlot.objects.create(resource=resource, start_time=start, end_time=start + timedelta(hours=1),
+                                       is_available=False, active_count=1)
+        Reservation.objects.create(user=self.user, resource=resource, time_slot=slot, status='ACTIVE')
+        day = timezone.localtime(start).date().isoformat()
+
+        forbidden = self.client.post(f'/api/resources/{resource.id}/close/', {'start_date': day, 'end_date': day}, format='json')
+        self.client.force_authenticate(user=self.admin)
+        response = self.client.post(f'/api/resources/{resource.id}/close/', {'start_date': day, 'end_date': day}, format='json')
+
+        self.assertEqual(forbidden.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual((response.data['cancelled'], response.data['closed_slots']), (1, 1))
+        slot.refresh_from_db()
+        self.assertEqual((slot.active_count, slot.is_available), (0, False))
 
 class TestTimeSlotAPI(APITestCase):
 
@@ -373,8 +589,83 @@ class TestTimeSlotAPI(APITestCase):
         response = self.client.get(url)
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertTrue(response.data['success'])
-        self.assertEqual(len(response.data['timeslots']), 3)
+        self.assertTrue(response.json()['success'])
+        self.assertEqual(len(response.json()['timeslots']), 3)
+
+    def test_get_timeslots_for_resource_paginated(self):
+        start_time = datetime.now() + timedelta(hours=1)
+        for i in range(5):
+            TimeSlot.objects.create(
+                resource=self.resource,
+                start_time=start_time + timedelta(hours=i),
+                end_time=start_time + timedelta(hours=i+1)
+            )
+
+        first = self.client.get(f'/api/timeslots/?resource_id={self.resource.id}&limit=3')
+        second = self.client.get(f'/api/timeslots/?resource_id={self.resource.id}&limit=3&cursor={first.json()["next_cursor"]}')
+
+        self.assertEqual(len(first.json()['timeslots']), 3)
+        self.assertEqual(len(second.json()['timeslots']), 2)
+        self.assertIsNone(second.json()['next_cursor'])
+        self.assertLess(first.json()['timeslots'][-1]['start_time'], second.json()['timeslots'][0]['start_time'])
+
+    def test_timeslots_not_modified_until_booked(self):
+        start_time = timezone.now() + timedelta(hours=3)
+        slot = TimeSlot.objects.create(resource=self.resource, start_time=start_time, end_time=start_time + timedelta(hours=1))
+        url = f'/api/timeslots/?resource_id={self.resource.id}'
+        etag = self.client.get(url)['ETag']
+
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_304_NOT_MODIFIED)
+
+        self.client.post('/api/reservations/create/', {'resource_id': self.resource.id, 'timeslot_id': slot.id}, format='json')
+        changed = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(changed.status_code, status.HTTP_200_OK)
+        self.assertEqual(changed.json()['timeslots'][0]['active_count'], 1)
+
+    def test_availability_matrix(self):
+        start_time = timezone.now() + timedelta(days=1)
+        TimeSlot.objects.create(resource=self.resource, start_time=start_time,
+                                end_time=start_time + timedelta(hours=1), active_count=2)
+        day = timezone.localdate(start_time).isoformat()
+
+        response = self.client.get(f'/api/availability/?start_date={day}&end_date={day}&resource_ids={self.resource.id}')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        payload = response.json()
+        self.assertEqual([r['id'] for r in payload['resources']], [self.resource.id])
+        self.assertEqual(payload['matrix'], [[3]])
+        self.assertEqual(len(payload['slots']), 1)
+
+    def test_next_available_timeslots(self):
+        start_time = timezone.now() + timedelta(hours=5)
+        slot = TimeSlot.objects.create(resource=self.resource, start_time=start_time, end_time=start_time + timedelta(hours=1))
+
+        response = self.client.get('/api/timeslots/next-available/?type=ROOM&days=1&min_duration=45')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([t['id'] for t in response.data['timeslots']], [slot.id])
+        self.assertEqual(response.data['timeslots'][0]['available_spots'], 5)
+
+    def test_availability_matrix_requires_range(self):
+        response = self.client.get('/api/availability/')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_timeslots_expose_remaining_capacity(self):
+        start_time = datetime.now() + timedelta(hours=1)
+        TimeSlot.objects.create(
+            resource=self.resource,
+            start_time=start_time,
+            end_time=start_time + timedelta(hours=1),
+            active_count=3
+        )
+
+        response = self.client.get(f'/api/timeslots/?resource_id={self.resource.id}')
+
+        slot = response.json()['timeslots'][0]
+        self.assertEqual(slot['active_count'], 3)
+        self.assertEqual(slot['available_spots'], 2)
 
     @patch('core.presentation.api.views.resource_service.generate_timeslots')
     def test_generate_timeslots_as_admin(self, mock_generate):
@@ -385,7 +676,7 @@ class TestTimeSlotAPI(APITestCase):
         )
         self.client.force_authenticate(user=admin)
 
-        mock_generate.return_value = None
+        mock_generate.return_value = {'created': 28, 'skipped': 0}
 
         url = '/api/timeslots/generate/'
         data = {
@@ -398,4 +689,270 @@ class TestTimeSlotAPI(APITestCase):
         response = self.client.post(url, data, format='json')
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        mock_generate.assert_called_once()
\ No newline at end of file
+        mock_generate.assert_called_once()
+
+
+class TestScheduleAPI(APITestCase):
+
+    def setUp(self):
+        """Set up test data"""
+        self.user = User.objects.create_user(
+            email='test@example.com',
+            username='testuser',
+            password='testpass123'
+        )
+        self.admin = User.objects.create_superuser(
+            email='admin@example.com',
+            username='admin',
+            password='adminpass123'
+        )
+        self.resource = Resource.objects.create(
+            name='Test Room',
+            type='ROOM',
+            max_bookings=5,
+            color_code='#FF5733'
+        )
+        self.day = (datetime.now() + timedelta(days=2)).date()
+        ScheduleTemplate.objects.create(
+            resource=self.resource,
+            weekly_hours={str(weekday): ['10:00', '13:00'] for weekday in range(7)},
+            slot_duration_minutes=60
+        )
+        self.client.force_authenticate(user=self.user)
+
+    def test_set_schedule_as_admin(self):
+        self.client.force_authenticate(user=self.admin)
+
+        url = f'/api/resources/{self.resource.id}/schedule/'
+        data = {'weekly_hours': {'0': ['08:00', '20:00']}, 'slot_duration_minutes': 30}
+
+        response = self.client.post(url, data, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['schedule']['weekly_hours'], {'0': ['08:00', '20:00']})
+        self.assertEqual(ScheduleTemplate.objects.get(resource=self.resource).slot_duration_minutes, 30)
+
+    def test_set_schedule_as_regular_user(self):
+        url = f'/api/resources/{self.resource.id}/schedule/'
+        data = {'weekly_hours': {'0': ['08:00', '20:00']}}
+
+        response = self.client.post(url, data, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_list_timeslots_materializes_range_once(self):
+        url = f'/api/timeslots/?resource_id={self.resource.id}&start_date={self.day}&end_date={self.day}'
+
+        response = self.client.get(url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.json()['timeslots']), 3)
+
+        # Slots are kept; deleting one must not bring it back on the next read
+        TimeSlot.objects.filter(resource=self.resource).first().delete()
+        response = self.client.get(url)
+        self.assertEqual(len(response.json()['timeslots']), 2)
+
+    def test_holiday_closes_day(self):
+        self.client.force_authenticate(user=self.admin)
+        response = self.client.post('/api/schedule/exceptions/', {'date': self.day.isoformat(), 'reason': 'Holiday'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        url = f'/api/timeslots/?resource_id={self.resource.id}&start_date={self.day}&end_date={self.day}'
+        response = self.client.get(url)
+
+        self.assertEqual(len(response.json()['timeslots']), 0)
+
+    def test_book_by_start_time_creates_slot(self):
+        url = '/api/reservations/create/'
+        data = {
+            'resource_id': self.resource.id,
+            'start_time': datetime.combine(self.day, datetime.min.time().replace(hour=11)).isoformat()
+        }
+
+        response = self.client.post(url, data, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(TimeSlot.objects.filter(resource=self.resource).count(), 3)
+        self.assertEqual(Reservation.objects.filter(user=self.user).count(), 1)
+
+
+class TestExportJobAPI(APITestCase):
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        patcher = patch('core.presentation.api.views.export_job_service.media_root', self.media_root)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.admin = User.objects.create_superuser(email='admin@example.com', username='admin', password='adminpass123')
+        self.members = [
+            User.objects.create_user(email=f'member{i}@example.com', username=f'member{i}', password='pass12345')
+            for i in range(3)
+        ]
+        resource = Resource.objects.create(name='Pool', type='ROOM', max_bookings=10, color_code='#FF5733')
+        start = timezone.now() + timedelta(days=1)
+        slot = TimeSlot.objects.create(resource=resource, start_time=start, end_time=start + timedelta(hours=1))
+        for member in self.members[:2]:
+            Reservation.objects.create(user=member, resource=resource, time_slot=slot, status='ACTIVE')
+        self.day = timezone.localtime(start).date().isoformat()
+
+    def test_admin_export_of_every_member(self):
+        self.client.force_authenticate(user=self.admin)
+        created = self.client.post('/api/export/jobs/', {'kind': 'ics', 'start_date': self.day, 'end_date': self.day}, format='json')
+        job_id = created.data['job']['id']
+        pending = self.client.get(f'/api/export/jobs/{job_id}/download/')
+
+        with override_settings(MEDIA_ROOT=self.media_root):
+            call_command('run_export_jobs', '--once', '--processes', '0', stdout=io.StringIO())
+        done = self.client.get(f'/api/export/jobs/{job_id}/')
+        download = self.client.get(done.data['job']['download_url'])
+
+        self.assertEqual(created.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(pending.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(done.data['job']['status'], 'DONE')
+        archive = zipfile.ZipFile(io.BytesIO(b''.join(download.streaming_content)))
+        self.assertEqual(sorted(archive.namelist()), [f'user_{m.id}.ics' for m in self.members[:2]])
+        self.assertIn(b'BEGIN:VEVENT', archive.read(f'user_{self.members[0].id}.ics'))
+
+    def test_unknown_member_is_rejected_at_creation(self):
+        self.client.force_authenticate(user=self.admin)
+
+        response = self.client.post('/api/export/jobs/', {
+            'start_date': self.day, 'end_date': self.day, 'user_ids': [self.members[0].id, 9999]
+        }, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(ExportJob.objects.exists())
+
+    def test_job_abandoned_by_a_killed_worker_is_requeued(self):
+        self.client.force_authenticate(user=self.admin)
+        created = self.client.post('/api/export/jobs/', {'start_date': self.day, 'end_date': self.day}, format='json')
+        job_id = created.data['job']['id']
+        two_hours_ago = timezone.now() - timedelta(hours=2)
+        ExportJob.objects.filter(id=job_id).update(status='RUNNING', attempt=1, started_at=two_hours_ago, heartbeat_at=two_hours_ago)
+
+        with override_settings(MEDIA_ROOT=self.media_root):
+            call_command('run_export_jobs', '--once', '--processes', '0', stdout=io.StringIO())
+
+        job = ExportJob.objects.get(id=job_id)
+        self.assertEqual((job.status, job.attempt), ('DONE', 2))
+
+    def test_long_running_job_with_recent_heartbeat_is_not_requeued(self):
+        self.client.force_authenticate(user=self.admin)
+        created = self.client.post('/api/export/jobs/', {'start_date': self.day, 'end_date': self.day}, format='json')
+        job_id = created.data['job']['id']
+        ExportJob.objects.filter(id=job_id).update(
+            status='RUNNING', attempt=1, started_at=timezone.now() - timedelta(hours=2), heartbeat_at=timezone.now()
+        )
+
+        with override_settings(MEDIA_ROOT=self.media_root):
+            call_command('run_export_jobs', '--once', '--processes', '0', stdout=io.StringIO())
+
+        self.assertEqual(ExportJob.objects.get(id=job_id).status, 'RUNNING')
+
+    def test_presumed_dead_worker_cannot_overwrite_finished_job(self):
+        self.client.force_authenticate(user=self.admin)
+        created = self.client.post('/api/export/jobs/', {'start_date': self.day, 'end_date': self.day}, format='json')
+        job_id = created.data['job']['id']
+        repo = ExportJobRepository()
+        stalled = repo.claim_next()
+        ExportJob.objects.filter(id=job_id).update(heartbeat_at=timezone.now() - timedelta(hours=2))
+
+        with override_settings(MEDIA_ROOT=self.media_root):
+            call_command('run_export_jobs', '--once', '--processes', '0', stdout=io.StringIO())
+
+        self.assertFalse(repo.heartbeat(job_id, stalled.attempt))
+        self.assertFalse(repo.mark_failed(job_id, stalled.attempt, 'zip member vanished'))
+        job = ExportJob.objects.get(id=job_id)
+        self.assertEqual(job.status, 'DONE')
+        self.assertTrue(os.path.exists(os.path.join(self.media_root, job.file_path)))
+        self.assertEqual(sorted(os.listdir(os.path.join(self.media_root, 'exports'))), [f'job_{job_id}.zip'])
+
+    def test_members_export_only_their_own_schedule(self):
+        self.client.force_authenticate(user=self.members[0])
+        own = self.client.post('/api/export/jobs/', {'start_date': self.day, 'end_date': self.day}, format='json')
+        other = self.client.post('/api/export/jobs/', {
+            'start_date': self.day, 'end_date': self.day, 'user_ids': [self.members[1].id]
+        }, format='json')
+        self.client.force_authenticate(user=self.members[1])
+        foreign = self.client.get(f"/api/export/jobs/{own.data['job']['id']}/")
+
+        self.assertEqual(own.data['job']['user_ids'], [self.members[0].id])
+        self.assertEqual(other.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(foreign.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class TestAnalyticsExportAPI(APITestCase):
+
+    def setUp(self):
+        self.admin = User.objects.create_superuser(email='admin@example.com', username='admin', password='adminpass123')
+        self.member = User.objects.create_user(email='member@example.com', username='member', password='pass12345')
+        self.resource = Resource.objects.create(name='Басейн', type='ROOM', max_bookings=10, color_code='#FF5733')
+        start = timezone.now() + timedelta(days=1)
+        self.slots = [
+            TimeSlot.objects.create(resource=self.resource, start_time=start + timedelta(hours=i),
+                                    end_time=start + timedelta(hours=i, minutes=45))
+            for i in range(3)
+        ]
+        self.reservations = [
+            Reservation.objects.create(user=self.member, resource=self.resource, time_slot=slot,
+                                       status='CANCELLED' if i == 1 else 'ACTIVE', notes='a,"b"')
+            for i, slot in enumerate(self.slots)
+        ]
+        self.client.force_authenticate(user=self.admin)
+
+    def test_csv_streams_joined_rows(self):
+        response = self.client.get('/api/export/reservations.csv', {'status': 'ACTIVE'})
+
+        self.assertTrue(response.streaming)
+        lines = b''.join(response.streaming_content).decode('utf-8').splitlines()
+        self.assertEqual(lines[0], 'id,user_id,resource_id,resource_name,resource_type,time_slot_id,start_time,end_time,status,created_at')
+        self.assertEqual(len(lines), 3)
+        self.assertTrue(lines[1].startswith(f'{self.reservations[0].id},{self.member.id},{self.resource.id},Басейн,ROOM,'))
+
+    def test_npz_is_columnar(self):
+        np = pytest.importorskip('numpy')
+
+        response = self.client.get('/api/export/reservations.npz')
+
+        data = np.load(io.BytesIO(b''.join(response.streaming_content)))
+        self.assertEqual(data['id'].tolist(), [r.id for r in self.reservations])
+        self.assertEqual(data['status_labels'][data['status']].tolist(), ['ACTIVE', 'CANCELLED', 'ACTIVE'])
+        self.assertEqual(data['resource_name_labels'].tolist(), ['Басейн'])
+        durations = (data['end_time'] - data['start_time']).astype('timedelta64[m]').astype(int)
+        self.assertEqual(durations.tolist(), [45, 45, 45])
+
+    def test_utilization_report(self):
+        pytest.importorskip('numpy')
+        day = timezone.localtime(self.slots[0].start_time).date().isoformat()
+
+        response = self.client.get('/api/analytics/utilization/', {'start_date': day, 'end_date': day})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        report = response.json()['resources'][0]
+        self.assertEqual((report['resource']['id'], report['slots'], report['booked']), (self.resource.id, 3, 0))
+
+    def test_daily_stats_follow_bookings(self):
+        day = timezone.localtime(self.slots[0].start_time).date().isoformat()
+        self.client.force_authenticate(user=self.member)
+        booked = self.client.post('/api/reservations/create/', {
+            'resource_id': self.resource.id, 'timeslot_id': self.slots[1].id
+        }, format='json')
+        self.client.force_authenticate(user=self.admin)
+
+        response = self.client.get('/api/analytics/daily/', {'start_date': day, 'end_date': day})
+
+        self.assertEqual(booked.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        # The day had no rollup row yet, so it was counted from the fixture reservations too
+        day_stats = response.json()['days'][0]
+        self.assertEqual((day_stats['bookings'], day_stats['cancellations']), (4, 1))
+
+    def test_members_cannot_export_history(self):
+        self.client.force_authenticate(user=self.member)
+
+        response = self.client.get('/api/export/reservations.csv')
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
@@ -1,9 +1,11 @@
 import pytest
-from datetime import datetime, timedelta
+from datetime import date, datetime, time, timedelta
 from core.domain.entities.user import UserEntity
 from core.domain.entities.resource import ResourceEntity
 from core.domain.entities.timeslot import TimeSlotEntity
 from core.domain.entities.reservation import ReservationEntity
+from core.domain.entities.schedule import ScheduleTemplateEntity, ScheduleExceptionEntity
+from core.domain.intervals import IntervalTree
 
 
 class TestUserEntity:
@@ -224,6 +226,24 @@ class TestTimeSlotEntity:
 
         assert str(timeslot) == '2024-01-01 10:00 - 11:00 (60 min)'
 
+    def test_from_row_skips_validation(self, monkeypatch):
+        def fail(self):
+            raise AssertionError('_validate should not run for trusted rows')
+        monkeypatch.setattr(TimeSlotEntity, '_validate', fail)
+        start_time = datetime(2024, 1, 1, 10, 0)
+
+        timeslot = TimeSlotEntity.from_row(1, 1, start_time, start_time + timedelta(minutes=45), False, 2)
+
+        assert (timeslot.duration_minutes, timeslot.is_available, timeslot.active_count) == (45, False, 2)
+
+    def test_entities_use_slots(self):
+        start_time = datetime(2024, 1, 1, 10, 0)
+        timeslot = TimeSlotEntity.from_row(1, 1, start_time, start_time + timedelta(hours=1))
+
+        assert not hasattr(timeslot, '__dict__')
+        with pytest.raises(AttributeError):
+            timeslot.unknown_field = True
+
 
 class TestReservationEntity:
 
@@ -253,4 +273,93 @@ class TestReservationEntity:
             status='ACTIVE'
         )
 
-        assert str(reservation) == 'Reservation #1 (ACTIVE)'
\ No newline at end of file
+        assert str(reservation) == 'Reservation #1 (ACTIVE)'
+
+    def test_from_row_matches_constructor(self):
+        created_at = datetime(2024, 1, 1, 10, 0)
+
+        trusted = ReservationEntity.from_row(1, 2, 3, 4, 'CANCELLED', '   ', created_at)
+
+        assert trusted == ReservationEntity(id=1, user_id=2, resource_id=3, time_slot_id=4,
+                                            status='CANCELLED', notes=None, created_at=created_at)
+        assert trusted.time_slot is None
+
+
+class TestScheduleTemplateEntity:
+
+    def test_plan_slots_for_open_day(self):
+        template = ScheduleTemplateEntity(
+            id=None,
+            resource_id=1,
+            weekly_hours={0: (time(9, 0), time(12, 0))},
+            slot_duration_minutes=90
+        )
+
+        slots = template.plan_slots(date(2024, 1, 1))  # Monday
+
+        assert slots == [
+            (datetime(2024, 1, 1, 9, 0), datetime(2024, 1, 1, 10, 30)),
+            (datetime(2024, 1, 1, 10, 30), datetime(2024, 1, 1, 12, 0)),
+        ]
+
+    def test_plan_slots_for_closed_weekday(self):
+        template = ScheduleTemplateEntity(id=None, resource_id=1, weekly_hours={0: (time(9, 0), time(12, 0))})
+
+        assert template.plan_slots(date(2024, 1, 2)) == []  # Tuesday
+
+    def test_exception_overrides_weekly_hours(self):
+        template = ScheduleTemplateEntity.default(resource_id=1)
+        holiday = ScheduleExceptionEntity(id=None, resource_id=None, date=date(2024, 1, 1))
+        short_day = ScheduleExceptionEntity(id=None, resource_id=1, date=date(2024, 1, 2), is_closed=False,
+                                            open_time=time(10, 0), close_time=time(12, 0))
+        exceptions = {holiday.date: holiday, short_day.date: short_day}
+
+        assert template.plan_slots(date(2024, 1, 1), exceptions) == []
+        assert len(template.plan_slots(date(2024, 1, 2), exceptions)) == 2
+        assert len(template.plan_slots(date(2024, 1, 3), exceptions)) == 14
+
+    def test_invalid_hours(self):
+        with pytest.raises(ValueError):
+            ScheduleTemplateEntity(id=None, resource_id=1, weekly_hours={0: (time(12, 0), time(9, 0))})
+
+    def test_open_exception_requires_hours(self):
+        with pytest.raises(ValueError):
+            ScheduleExceptionEntity(id=None, resource_id=1, date=date(2024, 1, 1), is_closed=False)
+
+
+class TestIntervalTree:
+
+    def _intervals(self):
+        base = datetime(2030, 1, 7, 8, 0)
+        return [
+            (base, base + timedelta(hours=1), 'a'),
+            (base + timedelta(minutes=30), base + timedelta(hours=2), 'b'),
+            (base + timedelta(hours=1), base + timedelta(hours=3), 'c'),   # touches a, overlaps b
+            (base + timedelta(hours=5), base + timedelta(hours=6), 'd'),
+        ]
+
+    def test_overlapping_query(self):
+        tree = IntervalTree(self._intervals())
+        base = datetime(2030, 1, 7, 8, 0)
+
+        hits = tree.overlapping(base + timedelta(minutes=45), base + timedelta(hours=1, minutes=15))
+
+        assert [value for _, _, value in hits] == ['a', 'b', 'c']
+        assert tree.overlapping(base + timedelta(hours=3), base + timedelta(hours=5)) == []
+
+    def test_overlapping_pairs_matches_pairwise_check(self):
+        intervals = self._intervals()
+
+        pairs = IntervalTree(intervals).overlapping_pairs()
+
+        expected = [
+            (x[2], y[2]) for i, x in enumerate(intervals) for y in intervals[i + 1:]
+            if x[0] < y[1] and y[0] < x[1]
+        ]
+        assert pairs == expected == [('a', 'b'), ('b', 'c')]
+
+    def test_empty_tree(self):
+        tree = IntervalTree([])
+
+        assert len(tree) == 0
+        assert tree.overlapping_pairs() == []
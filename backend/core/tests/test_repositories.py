@@ -0,0 +1,378 @@
+import re
+import unittest
+from unittest.mock import patch
+from io import StringIO
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from core.models import User, Resource, TimeSlot, Reservation
+from core.domain.entities.timeslot import TimeSlotEntity
+from core.infrastructure.persistence.identity_map import identity_scope
+from core.infrastructure.persistence.repositories.implementations import (
+    UserRepository, ResourceRepository, TimeSlotRepository, ReservationRepository
+)
+from core.presentation.api.renderers import dumps
+from core.presentation.api.serializers import ReservationSerializer, TimeSlotSerializer
+from datetime import datetime, timedelta
+
+
+class TimeSlotRepositoryTest(TestCase):
+
+    def setUp(self):
+        self.repo = TimeSlotRepository()
+        self.resource = Resource.objects.create(
+            name='Test Room',
+            type='ROOM',
+            max_bookings=5,
+            color_code='#FF5733'
+        )
+        self.start = timezone.make_aware(datetime(2030, 1, 7, 8, 0))
+
+    def _plan(self, count):
+        return [
+            TimeSlotEntity(
+                id=None,
+                resource_id=self.resource.id,
+                start_time=self.start + timedelta(hours=i),
+                end_time=self.start + timedelta(hours=i + 1)
+            )
+            for i in range(count)
+        ]
+
+    def test_bulk_create_inserts_all_planned_slots(self):
+        created, skipped = self.repo.bulk_create(self._plan(10), batch_size=3)
+
+        self.assertEqual((created, skipped), (10, 0))
+        self.assertEqual(TimeSlot.objects.filter(resource=self.resource).count(), 10)
+
+    def test_bulk_create_is_idempotent(self):
+        self.repo.bulk_create(self._plan(4))
+
+        created, skipped = self.repo.bulk_create(self._plan(6))
+
+        self.assertEqual((created, skipped), (2, 4))
+        self.assertEqual(TimeSlot.objects.filter(resource=self.resource).count(), 6)
+
+    def test_bulk_create_skips_duplicates_within_batch(self):
+        created, skipped = self.repo.bulk_create(self._plan(3) + self._plan(3))
+
+        self.assertEqual((created, skipped), (3, 3))
+
+    def test_list_by_date_uses_local_day_boundaries(self):
+        late = timezone.make_aware(datetime(2030, 1, 7, 23, 30))   # 21:30 UTC
+        early = timezone.make_aware(datetime(2030, 1, 8, 0, 30))   # 22:30 UTC on the 7th
+        for start in (late, early):
+            TimeSlot.objects.create(resource=self.resource, start_time=start, end_time=start + timedelta(minutes=30))
+
+        monday = self.repo.list_by_date(datetime(2030, 1, 7))
+        tuesday = self.repo.list_by_date_range([self.resource.id], datetime(2030, 1, 8).date(), datetime(2030, 1, 8).date())
+
+        self.assertEqual([s.start_time for s in monday], [late])
+        self.assertEqual([s.start_time for s in tuesday], [early])
+
+    def test_list_by_date_range_filters_resources(self):
+        other = Resource.objects.create(name='Other Room', type='ROOM', max_bookings=1, color_code='#FF5733')
+        self.repo.bulk_create(self._plan(3))
+        TimeSlot.objects.create(resource=other, start_time=self.start, end_time=self.start + timedelta(hours=1))
+
+        day = self.start.date()
+        self.assertEqual(len(self.repo.list_by_date_range(None, day, day)), 4)
+        self.assertEqual(len(self.repo.list_by_date_range([other.id], day, day)), 1)
+
+    def test_update_validates_trusted_entities(self):
+        self.repo.bulk_create(self._plan(1))
+        slot = self.repo.list_by_resource_page(self.resource.id)[0]
+        slot.active_count = -1
+
+        with self.assertRaises(ValueError):
+            self.repo.update(slot)
+
+    def test_bulk_create_uses_one_lookup_per_resource(self):
+        with self.assertNumQueries(1 + 1 + 2 + 2):  # existing lookup, one batch, two savepoint pairs
+            self.repo.bulk_create(self._plan(14))
+
+    def test_bulk_create_counts_rows_lost_to_conflicts(self):
+        plan = self._plan(4)
+        self.repo.bulk_create(plan[:2])
+        original = TimeSlot.objects.filter
+
+        def stale_lookup(*args, **kwargs):
+            # As if another process inserted the first two slots right after the existing-slot lookup
+            if 'start_time__gte' in kwargs:
+                return TimeSlot.objects.none()
+            return original(*args, **kwargs)
+
+        with patch.object(TimeSlot.objects, 'filter', side_effect=stale_lookup):
+            created, skipped = self.repo.bulk_create(plan)
+
+        self.assertEqual(TimeSlot.objects.filter(resource=self.resource).count(), 4)
+        self.assertEqual((created, skipped), (2, 2))
+
+
+class ReadOnlyRowsTest(TestCase):
+    """The *_rows fast path must render exactly the bytes of the entity + DRF path."""
+
+    def setUp(self):
+        self.user = User.objects.create(email='member@example.com', username='member')
+        self.resource = Resource.objects.create(name='Test Room', type='ROOM', max_bookings=5, color_code='#FF5733')
+        start = timezone.make_aware(datetime(2030, 3, 30, 22, 15))  # DST switch night in Sofia
+        self.slots = [
+            TimeSlot.objects.create(resource=self.resource, start_time=start + timedelta(minutes=45 * i),
+                                    end_time=start + timedelta(minutes=45 * (i + 1)), active_count=i,
+                                    is_available=bool(i % 2))
+            for i in range(4)
+        ]
+        for i, notes in enumerate([None, 'Бележка, "quoted"\n\u2028', '   ', 'ok']):
+            Reservation.objects.create(user=self.user, resource=self.resource, time_slot=self.slots[i],
+                                       status='ACTIVE' if i % 2 else 'CANCELLED', notes=notes)
+
+    def assertSameBytes(self, key, entities, rows, entity_to_dict, row_to_dict):
+        self.assertEqual(
+            dumps({'success': True, key: [row_to_dict(r) for r in rows]}),
+            JSONRenderer().render({'success': True, key: [entity_to_dict(e) for e in entities]})
+        )
+
+    def test_reservation_rows_match_entities(self):
+        repo = ReservationRepository()
+        self.assertSameBytes(
+            'reservations',
+            repo.list_by_user_page(self.user.id, limit=10), repo.list_by_user_page_rows(self.user.id, limit=10),
+            ReservationSerializer.to_dict, ReservationSerializer.row_to_dict
+        )
+        self.assertSameBytes(
+            'reservations',
+            repo.list_all_page('ACTIVE'), repo.list_all_page_rows('ACTIVE'),
+            ReservationSerializer.to_dict, ReservationSerializer.row_to_dict
+        )
+
+    def test_timeslot_rows_match_entities(self):
+        repo = TimeSlotRepository()
+        resource = {self.resource.id: ResourceRepository().get_by_id(self.resource.id)}
+        day = timezone.localdate(self.slots[0].start_time)
+        self.assertSameBytes(
+            'timeslots',
+            repo.list_by_date_range(None, day, day + timedelta(days=1)),
+            repo.list_by_date_range_rows(None, day, day + timedelta(days=1)),
+            lambda t: TimeSlotSerializer.to_dict(t, resource[t.resource_id]),
+            lambda r: TimeSlotSerializer.row_to_dict(r, resource[r['resource_id']])
+        )
+        self.assertSameBytes(
+            'timeslots',
+            repo.list_by_resource_page(self.resource.id, limit=3),
+            repo.list_by_resource_page_rows(self.resource.id, limit=3),
+            TimeSlotSerializer.to_dict, TimeSlotSerializer.row_to_dict
+        )
+
+
+class IdentityMapTest(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create(email='member@example.com', username='member')
+        self.resource = Resource.objects.create(name='Test Room', type='ROOM', max_bookings=5, color_code='#FF5733')
+        start = timezone.now() + timedelta(days=1)
+        self.slot = TimeSlot.objects.create(resource=self.resource, start_time=start, end_time=start + timedelta(hours=1))
+        self.repo = TimeSlotRepository()
+
+    def test_repeated_lookups_share_one_query(self):
+        with identity_scope():
+            with self.assertNumQueries(1):
+                first = self.repo.get_by_id(self.slot.id)
+                second = self.repo.get_by_id(self.slot.id)
+
+        self.assertIs(first, second)
+
+    def test_writes_invalidate_the_entry(self):
+        with identity_scope():
+            before = self.repo.get_by_id(self.slot.id)
+            self.repo.reserve_seat(self.slot.id, self.resource.id)
+            after = self.repo.get_by_id(self.slot.id)
+
+        self.assertEqual((before.active_count, after.active_count), (0, 1))
+
+    def test_no_caching_outside_a_scope(self):
+        with self.assertNumQueries(2):
+            self.repo.get_by_id(self.slot.id)
+            self.repo.get_by_id(self.slot.id)
+
+    def test_remembered_user_costs_no_query(self):
+        repo = UserRepository()
+        with identity_scope():
+            repo.remember(self.user)
+            with self.assertNumQueries(0):
+                self.assertEqual(repo.get_by_id(self.user.id).email, 'member@example.com')
+
+
+class ResourceCatalogCacheTest(TestCase):
+
+    def setUp(self):
+        self.repo = ResourceRepository()
+        self.resource = Resource.objects.create(name='Test Room', type='ROOM', max_bookings=5, color_code='#FF5733')
+
+    def test_reads_are_served_from_cache(self):
+        self.repo.list_all()
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self.repo.get_by_id(self.resource.id).name, 'Test Room')
+            self.assertIsNone(self.repo.get_by_id(self.resource.id + 1))
+            self.assertEqual(len(self.repo.list_all('ROOM')), 1)
+
+    def test_repository_update_writes_through(self):
+        version = self.repo.catalog_version()
+        entity = self.repo.get_by_id(self.resource.id)
+        entity.max_bookings = 8
+
+        self.repo.update(entity)
+
+        self.assertNotEqual(self.repo.catalog_version(), version)
+        self.assertEqual(self.repo.get_by_id(self.resource.id).max_bookings, 8)
+
+    def test_writes_outside_the_repository_invalidate(self):
+        self.repo.list_all()
+
+        Resource.objects.create(name='Other Room', type='ROOM', max_bookings=1, color_code='#FF5733')
+        self.resource.delete()
+
+        self.assertEqual([r.name for r in self.repo.list_all()], ['Other Room'])
+
+
+class RebuildSlotCountersCommandTest(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create(email='member@example.com', username='member')
+        self.resource = Resource.objects.create(name='Test Room', type='ROOM', max_bookings=5, color_code='#FF5733')
+        start = timezone.now() + timedelta(days=1)
+        self.slot = TimeSlot.objects.create(resource=self.resource, start_time=start, end_time=start + timedelta(hours=1))
+        # Rows written behind the repository's back leave the counter at 0
+        for status in ['ACTIVE', 'ACTIVE', 'CANCELLED']:
+            Reservation.objects.create(user=self.user, resource=self.resource, time_slot=self.slot, status=status)
+
+    def test_check_reports_drift(self):
+        with self.assertRaises(CommandError):
+            call_command('rebuild_slot_counters', '--check', stdout=StringIO())
+
+        self.slot.refresh_from_db()
+        self.assertEqual(self.slot.active_count, 0)
+
+    def test_rebuild_fixes_drift(self):
+        call_command('rebuild_slot_counters', stdout=StringIO())
+
+        self.slot.refresh_from_db()
+        self.assertEqual(self.slot.active_count, 2)
+        call_command('rebuild_slot_counters', '--check', stdout=StringIO())
+
+    def test_rebuild_reopens_slot_closed_as_full(self):
+        TimeSlot.objects.filter(id=self.slot.id).update(active_count=5, is_available=False)
+
+        call_command('rebuild_slot_counters', stdout=StringIO())
+
+        self.slot.refresh_from_db()
+        self.assertEqual(self.slot.active_count, 2)
+        self.assertTrue(self.slot.is_available)
+
+    def test_rebuild_closes_full_slot(self):
+        Resource.objects.filter(id=self.resource.id).update(max_bookings=2)
+
+        call_command('rebuild_slot_counters', stdout=StringIO())
+
+        self.slot.refresh_from_db()
+        self.assertEqual(self.slot.active_count, 2)
+        self.assertFalse(self.slot.is_available)
+
+    def test_open_full_slot_with_correct_count_is_drift(self):
+        Resource.objects.filter(id=self.resource.id).update(max_bookings=2)
+        TimeSlot.objects.filter(id=self.slot.id).update(active_count=2)
+
+        with self.assertRaises(CommandError):
+            call_command('rebuild_slot_counters', '--check', stdout=StringIO())
+        call_command('rebuild_slot_counters', stdout=StringIO())
+
+        self.slot.refresh_from_db()
+        self.assertFalse(self.slot.is_available)
+
+    def test_rebuild_keeps_maintenance_closure(self):
+        TimeSlot.objects.filter(id=self.slot.id).update(is_available=False)
+
+        call_command('rebuild_slot_counters', stdout=StringIO())
+
+        self.slot.refresh_from_db()
+        self.assertEqual(self.slot.active_count, 2)
+        self.assertFalse(self.slot.is_available)
+
+
+@unittest.skipUnless(connection.vendor == 'sqlite', 'EXPLAIN QUERY PLAN output is SQLite specific')
+class HotQueryPlanTest(TestCase):
+    """Fails if a hot repository query falls back to a full scan of reservations or time_slots."""
+
+    FULL_SCAN = re.compile(r'^SCAN (reservations|time_slots)\b')
+
+    @classmethod
+    def setUpTestData(cls):
+        users = [User.objects.create(email=f'member{i}@example.com', username=f'member{i}') for i in range(5)]
+        resources = [
+            Resource.objects.create(name=f'Room {i}', type='ROOM', max_bookings=5, color_code='#FF5733')
+            for i in range(4)
+        ]
+        start = timezone.make_aware(datetime(2030, 1, 7, 8, 0))
+        slots = TimeSlot.objects.bulk_create([
+            TimeSlot(resource=resource, start_time=start + timedelta(hours=h), end_time=start + timedelta(hours=h + 1))
+            for resource in resources
+            for h in range(0, 24 * 14, 2)
+        ])
+        Reservation.objects.bulk_create([
+            Reservation(user=users[i % len(users)], resource_id=slot.resource_id, time_slot=slot,
+                        status='ACTIVE' if i % 3 else 'CANCELLED')
+            for i, slot in enumerate(slots)
+        ])
+        cls.user = users[0]
+        cls.resource = resources[0]
+        cls.slot = slots[0]
+        cls.start = start
+
+    def _assert_no_full_scan(self, call):
+        with CaptureQueriesContext(connection) as ctx:
+            call()
+        self.assertTrue(ctx.captured_queries)
+        for query in ctx.captured_queries:
+            with connection.cursor() as cursor:
+                cursor.execute('EXPLAIN QUERY PLAN ' + query['sql'])
+                plan = [row[-1] for row in cursor.fetchall()]
+            scans = [line for line in plan if self.FULL_SCAN.match(line)]
+            self.assertFalse(scans, f"Full table scan in {query['sql']}: {plan}")
+
+    def test_count_by_timeslot(self):
+        self._assert_no_full_scan(lambda: ReservationRepository().count_by_timeslot(self.slot.id))
+
+    def test_list_by_user(self):
+        self._assert_no_full_scan(lambda: ReservationRepository().list_by_user(self.user.id, 'ACTIVE'))
+
+    def test_list_all_page(self):
+        repo = ReservationRepository()
+        first = repo.list_all_page(limit=20)
+        self._assert_no_full_scan(lambda: repo.list_all_page(after=(first[-1].created_at, first[-1].id), limit=20))
+
+    def test_list_by_date(self):
+        self._assert_no_full_scan(lambda: TimeSlotRepository().list_by_date(self.start))
+
+    def test_list_by_date_range(self):
+        self._assert_no_full_scan(lambda: TimeSlotRepository().list_by_date_range(
+            [self.resource.id], self.start.date(), self.start.date() + timedelta(days=2)
+        ))
+
+    def test_find_bookable(self):
+        self._assert_no_full_scan(lambda: TimeSlotRepository().find_bookable(
+            None, self.start, self.start + timedelta(days=3), min_duration_minutes=30, limit=5
+        ))
+
+    def test_find_overlapping(self):
+        self._assert_no_full_scan(lambda: ReservationRepository().find_overlapping(
+            self.user.id, self.start, self.start + timedelta(hours=1)
+        ))
+
+    def test_list_by_resource_range(self):
+        self._assert_no_full_scan(lambda: TimeSlotRepository().list_by_resource(
+            self.resource.id, self.start, self.start + timedelta(days=3)
+        ))
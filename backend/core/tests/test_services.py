@@ -1,12 +1,64 @@
+import io
 import pytest
-from unittest.mock import Mock, MagicMock
+import threading
+from unittest.mock import Mock, MagicMock, patch
 from datetime import datetime, timedelta
+from django.core.management import call_command
+from django.db import connection, OperationalError
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
 from core.application.services.reservation_service import ReservationService
 from core.application.services.resource_service import ResourceService
+from core.application.services.availability_service import AvailabilityService
+from core.application.services.export_service import ICalendarExportService, CachedScheduleExport, WeeklySchedulePrintService
+from core.application.services.utilization_service import UtilizationService
 from core.domain.entities.user import UserEntity
 from core.domain.entities.resource import ResourceEntity
 from core.domain.entities.timeslot import TimeSlotEntity
 from core.domain.entities.reservation import ReservationEntity
+from core.infrastructure.persistence.repositories.implementations import (
+    UserRepository, ResourceRepository, TimeSlotRepository, ReservationRepository, DailyStatsRepository, EpochSeconds
+)
+from core.models import User, Resource, TimeSlot, Reservation, DailyResourceStats
+
+
+def _repository_backed_reservation_service():
+    return ReservationService(ReservationRepository(), UserRepository(), ResourceRepository(), TimeSlotRepository())
+
+
+def _run_concurrently(book, args):
+    """Call book(arg) for every arg in its own thread, all released at once by a barrier.
+
+    Returns one outcome per call: 'booked', 'rejected' (ValueError) or 'gave up'.
+    """
+    barrier = threading.Barrier(len(args))
+    results = []
+
+    def run(arg):
+        try:
+            barrier.wait()
+            for attempt in range(50):
+                try:
+                    book(arg)
+                    results.append('booked')
+                    return
+                except ValueError:
+                    results.append('rejected')
+                    return
+                except OperationalError:
+                    # SQLite reports writer contention as "database is locked"; retry like a client would
+                    continue
+            results.append('gave up')
+        finally:
+            connection.close()
+
+    threads = [threading.Thread(target=run, args=(arg,)) for arg in args]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results
 
 
 class TestReservationService:
@@ -40,7 +92,7 @@ class TestReservationService:
         self.user_repo.get_by_id.return_value = user
         self.resource_repo.get_by_id.return_value = resource
         self.timeslot_repo.get_by_id.return_value = timeslot
-        self.reservation_repo.count_by_timeslot.return_value = 2  # Less than max_bookings
+        self.timeslot_repo.reserve_seat.return_value = True  # Seat taken by the conditional update
 
         # Mock the create method to return a reservation entity
         expected_reservation = ReservationEntity(
@@ -55,22 +107,26 @@ class TestReservationService:
         assert result == expected_reservation
         self.reservation_repo.create.assert_called_once()
 
+    @pytest.mark.django_db
     def test_create_reservation_user_not_found(self):
-        self.user_repo.get_by_id.return_value = None
+        self.user_repo.lock_for_booking.return_value = None
 
         with pytest.raises(ValueError, match="User 1 не съществува"):
             self.service.create_reservation(1, 1, 1)
 
+    @pytest.mark.django_db
     def test_create_reservation_resource_not_found(self):
         user = UserEntity(id=1, email='user@example.com', first_name='Test', last_name='User',
                          role='USER', password_hash='hash')
 
         self.user_repo.get_by_id.return_value = user
         self.resource_repo.get_by_id.return_value = None
+        self.timeslot_repo.reserve_seat.return_value = False
 
         with pytest.raises(ValueError, match="Resource 1 не съществува"):
             self.service.create_reservation(1, 1, 1)
 
+    @pytest.mark.django_db
     def test_create_reservation_timeslot_not_found(self):
         user = UserEntity(id=1, email='user@example.com', first_name='Test', last_name='User',
                          role='USER', password_hash='hash')
@@ -80,10 +136,12 @@ class TestReservationService:
         self.user_repo.get_by_id.return_value = user
         self.resource_repo.get_by_id.return_value = resource
         self.timeslot_repo.get_by_id.return_value = None
+        self.timeslot_repo.reserve_seat.return_value = False
 
         with pytest.raises(ValueError, match="TimeSlot 1 не съществува"):
             self.service.create_reservation(1, 1, 1)
 
+    @pytest.mark.django_db
     def test_create_reservation_timeslot_unavailable(self):
         user = UserEntity(id=1, email='user@example.com', first_name='Test', last_name='User',
                          role='USER', password_hash='hash')
@@ -97,10 +155,12 @@ class TestReservationService:
         self.user_repo.get_by_id.return_value = user
         self.resource_repo.get_by_id.return_value = resource
         self.timeslot_repo.get_by_id.return_value = timeslot
+        self.timeslot_repo.reserve_seat.return_value = False
 
         with pytest.raises(ValueError, match="TimeSlot е затворен за резервации"):
             self.service.create_reservation(1, 1, 1)
 
+    @pytest.mark.django_db
     def test_create_reservation_timeslot_in_past(self):
         user = UserEntity(id=1, email='user@example.com', first_name='Test', last_name='User',
                          role='USER', password_hash='hash')
@@ -114,10 +174,33 @@ class TestReservationService:
         self.user_repo.get_by_id.return_value = user
         self.resource_repo.get_by_id.return_value = resource
         self.timeslot_repo.get_by_id.return_value = timeslot
+        self.timeslot_repo.reserve_seat.return_value = False
 
         with pytest.raises(ValueError, match="TimeSlot е в миналото и не може да се резервира"):
             self.service.create_reservation(1, 1, 1)
 
+    @pytest.mark.django_db
+    def test_create_reservation_timeslot_full(self):
+        user = UserEntity(id=1, email='user@example.com', first_name='Test', last_name='User',
+                         role='USER', password_hash='hash')
+        resource = ResourceEntity(id=1, name='Test Room', type='ROOM', max_bookings=5,
+                                color_code='#FF5733')
+        timeslot = TimeSlotEntity(id=1, resource_id=1,
+                                start_time=datetime.now() + timedelta(hours=1),
+                                end_time=datetime.now() + timedelta(hours=2),
+                                is_available=True)
+
+        self.user_repo.get_by_id.return_value = user
+        self.resource_repo.get_by_id.return_value = resource
+        self.timeslot_repo.get_by_id.return_value = timeslot
+        self.timeslot_repo.reserve_seat.return_value = False
+        self.reservation_repo.find_overlapping.return_value = []
+
+        with pytest.raises(ValueError, match="TimeSlot е пълен"):
+            self.service.create_reservation(1, 1, 1)
+
+        self.reservation_repo.create.assert_not_called()
+
 
 class TestResourceService:
 
@@ -134,22 +217,23 @@ class TestResourceService:
                                 color_code='#FF5733')
 
         self.resource_repo.get_by_id.return_value = resource
+        self.timeslot_repo.bulk_create.return_value = (28, 0)
 
         start_date = datetime(2024, 1, 1)
         end_date = datetime(2024, 1, 2)  # 1 day later
 
         # Execute
-        self.service.generate_timeslots(1, start_date, end_date, 60)
+        result = self.service.generate_timeslots(1, start_date, end_date, 60)
 
-        # Assert - should create timeslots for each hour of each day
-        # For 2 days with 60 min slots, should create 28 slots (14 hours per day * 2 days)
-        assert self.timeslot_repo.create.call_count == 28
+        # Assert - all slots are planned in memory and handed over in a single bulk call
+        # For 2 days with 60 min slots, should plan 28 slots (14 hours per day * 2 days)
+        assert result == {'created': 28, 'skipped': 0}
+        self.timeslot_repo.create.assert_not_called()
+        self.timeslot_repo.bulk_create.assert_called_once()
 
-        # Verify the calls
-        calls = self.timeslot_repo.create.call_args_list
-        for i, call in enumerate(calls):
-            args, kwargs = call
-            timeslot_entity = args[0]
+        planned = self.timeslot_repo.bulk_create.call_args[0][0]
+        assert len(planned) == 28
+        for i, timeslot_entity in enumerate(planned):
             assert timeslot_entity.resource_id == 1
             assert timeslot_entity.is_available is True
             # Check that times are sequential starting from 8 AM
@@ -162,4 +246,509 @@ class TestResourceService:
             expected_start = timezone.make_aware(expected_start, timezone.get_current_timezone())
             expected_end = timezone.make_aware(expected_end, timezone.get_current_timezone())
             assert timeslot_entity.start_time == expected_start
-            assert timeslot_entity.end_time == expected_end
\ No newline at end of file
+            assert timeslot_entity.end_time == expected_end
+
+
+class TestReservationBooking(TestCase):
+
+    def setUp(self):
+        self.service = _repository_backed_reservation_service()
+        self.resource = Resource.objects.create(name='Rack', type='EQUIPMENT', max_bookings=2, color_code='#FF5733')
+        start_time = timezone.now() + timedelta(hours=3)
+        self.timeslot = TimeSlot.objects.create(resource=self.resource, start_time=start_time,
+                                                end_time=start_time + timedelta(hours=1))
+        self.users = [
+            User.objects.create(email=f'member{i}@example.com', username=f'member{i}')
+            for i in range(3)
+        ]
+
+    def test_booking_query_budget(self):
+        # Production wiring: the booking also bumps the day's rollup row, which slot creation added
+        stats_repo = DailyStatsRepository()
+        service = ReservationService(ReservationRepository(), UserRepository(), ResourceRepository(),
+                                     TimeSlotRepository(), stats_repo=stats_repo)
+        day = timezone.localtime(self.timeslot.start_time).date()
+        stats_repo.refresh_slots([self.resource.id], day, day)
+
+        with CaptureQueriesContext(connection) as ctx:
+            service.create_reservation(self.users[0].id, self.resource.id, self.timeslot.id)
+
+        queries = [q['sql'] for q in ctx.captured_queries if 'SAVEPOINT' not in q['sql']]
+        # User, seat UPDATE, reservation INSERT, rollup UPDATE
+        self.assertLessEqual(len(queries), 4)
+        self.assertEqual(DailyResourceStats.objects.get(resource=self.resource, date=day).bookings, 1)
+
+    def test_last_seat_closes_slot_and_cancel_releases_it(self):
+        self.service.create_reservation(self.users[0].id, self.resource.id, self.timeslot.id)
+        reservation = self.service.create_reservation(self.users[1].id, self.resource.id, self.timeslot.id)
+
+        self.timeslot.refresh_from_db()
+        self.assertEqual(self.timeslot.active_count, 2)
+        self.assertFalse(self.timeslot.is_available)
+        with self.assertRaises(ValueError):
+            self.service.create_reservation(self.users[2].id, self.resource.id, self.timeslot.id)
+
+        self.service.cancel_reservation(reservation.id, self.users[1].id)
+        self.timeslot.refresh_from_db()
+        self.assertEqual(self.timeslot.active_count, 1)
+
+        with self.assertRaises(ValueError):
+            self.service.cancel_reservation(reservation.id, self.users[1].id)
+        self.timeslot.refresh_from_db()
+        self.assertEqual(self.timeslot.active_count, 1)
+
+    def test_overlapping_booking_is_rejected(self):
+        other = Resource.objects.create(name='Room', type='ROOM', max_bookings=10, color_code='#FF5733')
+        overlapping = TimeSlot.objects.create(resource=other, start_time=self.timeslot.start_time + timedelta(minutes=30),
+                                              end_time=self.timeslot.end_time + timedelta(minutes=30))
+        adjacent = TimeSlot.objects.create(resource=other, start_time=self.timeslot.end_time,
+                                           end_time=self.timeslot.end_time + timedelta(hours=1))
+        self.service.create_reservation(self.users[0].id, self.resource.id, self.timeslot.id)
+
+        with self.assertRaisesRegex(ValueError, 'застъпва'):
+            self.service.create_reservation(self.users[0].id, other.id, overlapping.id)
+        self.service.create_reservation(self.users[0].id, other.id, adjacent.id)
+        self.service.create_reservation(self.users[1].id, other.id, overlapping.id)
+
+        overlapping.refresh_from_db()
+        self.assertEqual(overlapping.active_count, 1)
+
+    def test_double_booking_audit(self):
+        reservations = [
+            Reservation.objects.create(user=self.users[0], resource=self.resource, time_slot=self.timeslot, status='ACTIVE')
+            for _ in range(2)
+        ]
+        Reservation.objects.create(user=self.users[1], resource=self.resource, time_slot=self.timeslot, status='ACTIVE')
+        day = timezone.localdate(self.timeslot.start_time)
+
+        conflicts = self.service.find_double_bookings(day, day)
+
+        self.assertEqual(conflicts, [{'user_id': self.users[0].id, 'reservation_ids': sorted(r.id for r in reservations)}])
+
+    def test_wrong_resource_is_rejected(self):
+        other = Resource.objects.create(name='Room', type='ROOM', max_bookings=10, color_code='#FF5733')
+
+        with self.assertRaisesRegex(ValueError, 'не принадлежи'):
+            self.service.create_reservation(self.users[0].id, other.id, self.timeslot.id)
+
+
+class TestBatchBooking(TestCase):
+
+    def setUp(self):
+        self.service = _repository_backed_reservation_service()
+        self.user = User.objects.create(email='coach@example.com', username='coach')
+        self.resource = Resource.objects.create(name='Rack', type='EQUIPMENT', max_bookings=1, color_code='#FF5733')
+        start = timezone.now() + timedelta(days=1)
+        self.slots = [
+            TimeSlot.objects.create(resource=self.resource, start_time=start + timedelta(days=i),
+                                    end_time=start + timedelta(days=i, hours=1))
+            for i in range(12)
+        ]
+        self.ids = [slot.id for slot in self.slots]
+
+    def test_books_every_slot_in_constant_queries(self):
+        with CaptureQueriesContext(connection) as ctx:
+            results = self.service.create_reservations_batch(self.user.id, self.resource.id, self.ids)
+
+        self.assertTrue(all(r['success'] for r in results))
+        self.assertEqual(Reservation.objects.filter(user=self.user, status='ACTIVE').count(), 12)
+        self.assertEqual(TimeSlot.objects.filter(id__in=self.ids, active_count=1, is_available=False).count(), 12)
+        queries = [q['sql'] for q in ctx.captured_queries if 'SAVEPOINT' not in q['sql']]
+        self.assertLessEqual(len(queries), 7)
+
+    def test_all_or_nothing_books_nothing_on_one_failure(self):
+        TimeSlot.objects.filter(id=self.ids[5]).update(active_count=1)
+
+        results = self.service.create_reservations_batch(self.user.id, self.resource.id, self.ids)
+
+        self.assertFalse(any(r['success'] for r in results))
+        self.assertEqual(results[5]['error'], 'TimeSlot е пълен')
+        self.assertFalse(Reservation.objects.exists())
+        self.assertEqual(TimeSlot.objects.filter(id__in=self.ids, active_count=1).count(), 1)
+
+    def test_best_effort_books_the_valid_slots(self):
+        TimeSlot.objects.filter(id=self.ids[5]).update(active_count=1)
+        other = TimeSlot.objects.create(resource=Resource.objects.create(name='Room', type='ROOM', max_bookings=5, color_code='#FF5733'),
+                                        start_time=self.slots[0].start_time, end_time=self.slots[0].end_time)
+        Reservation.objects.create(user=self.user, resource_id=other.resource_id, time_slot=other, status='ACTIVE')
+
+        results = self.service.create_reservations_batch(self.user.id, self.resource.id, self.ids + [self.ids[0] + 1000],
+                                                         all_or_nothing=False)
+
+        failed = {r['timeslot_id']: r['error'] for r in results if not r['success']}
+        self.assertEqual(set(failed), {self.ids[0], self.ids[5], self.ids[0] + 1000})
+        self.assertIn('застъпва', failed[self.ids[0]])
+        self.assertEqual(Reservation.objects.filter(resource=self.resource).count(), 10)
+
+    def test_duplicate_slots_are_rejected(self):
+        with self.assertRaises(ValueError):
+            self.service.create_reservations_batch(self.user.id, self.resource.id, [self.ids[0], self.ids[0]])
+
+
+class TestBulkCancel(TestCase):
+
+    def setUp(self):
+        self.service = _repository_backed_reservation_service()
+        self.user = User.objects.create(email='member@example.com', username='member')
+        self.resource = Resource.objects.create(name='Bike', type='EQUIPMENT', max_bookings=1, color_code='#FF5733')
+        self.start = timezone.now() + timedelta(days=1)
+        self.slots = [
+            TimeSlot.objects.create(resource=self.resource, start_time=self.start + timedelta(hours=2 * i),
+                                    end_time=self.start + timedelta(hours=2 * i + 1))
+            for i in range(6)
+        ]
+        self.service.create_reservations_batch(self.user.id, self.resource.id, [s.id for s in self.slots])
+        self.days = (timezone.localtime(self.start).date(), timezone.localtime(self.slots[-1].start_time).date())
+
+    def test_cancels_in_constant_queries_and_reopens_full_slots(self):
+        with CaptureQueriesContext(connection) as ctx:
+            results = self.service.cancel_reservations_in_range(self.user.id, *self.days)
+
+        self.assertEqual([r['success'] for r in results], [True] * 6)
+        self.assertFalse(Reservation.objects.filter(status='ACTIVE').exists())
+        self.assertEqual(TimeSlot.objects.filter(resource=self.resource, active_count=0, is_available=True).count(), 6)
+        queries = [q['sql'] for q in ctx.captured_queries if 'SAVEPOINT' not in q['sql']]
+        self.assertLessEqual(len(queries), 3)
+
+    def test_reservations_inside_the_notice_period_are_kept(self):
+        soon = TimeSlot.objects.create(resource=self.resource, start_time=timezone.now() + timedelta(minutes=30),
+                                       end_time=timezone.now() + timedelta(minutes=90))
+        Reservation.objects.create(user=self.user, resource=self.resource, time_slot=soon, status='ACTIVE')
+
+        results = self.service.cancel_reservations_in_range(self.user.id, timezone.localdate(), self.days[1])
+
+        failed = [r for r in results if not r['success']]
+        self.assertEqual([r['timeslot_id'] for r in failed], [soon.id])
+        self.assertTrue(Reservation.objects.get(time_slot=soon).status == 'ACTIVE')
+
+    def test_slots_closed_with_room_left_stay_closed(self):
+        resource = Resource.objects.create(name='Studio', type='ROOM', max_bookings=3, color_code='#FF5733')
+        slot = TimeSlot.objects.create(resource=resource, start_time=self.start + timedelta(hours=20),
+                                       end_time=self.start + timedelta(hours=21), is_available=False, active_count=1)
+        Reservation.objects.create(user=self.user, resource=resource, time_slot=slot, status='ACTIVE')
+
+        self.service.cancel_reservations_in_range(self.user.id, self.days[0], self.days[1] + timedelta(days=1),
+                                                  resource_id=resource.id)
+
+        slot.refresh_from_db()
+        self.assertEqual((slot.active_count, slot.is_available), (0, False))
+
+    def test_close_resource_requires_admin(self):
+        with self.assertRaises(ValueError):
+            self.service.close_resource(self.user.id, self.resource.id, *self.days)
+        self.assertEqual(Reservation.objects.filter(status='ACTIVE').count(), 6)
+
+
+class TestAvailabilityMatrix(TestCase):
+
+    def setUp(self):
+        self.service = AvailabilityService(TimeSlotRepository(), ResourceRepository())
+        self.rack = Resource.objects.create(name='Rack', type='EQUIPMENT', max_bookings=2, color_code='#FF5733')
+        self.room = Resource.objects.create(name='Room', type='ROOM', max_bookings=10, color_code='#FF5733')
+        self.start = timezone.make_aware(datetime(2030, 1, 7, 8, 0))
+        for hour in range(3):
+            TimeSlot.objects.create(resource=self.rack, start_time=self.start + timedelta(hours=hour),
+                                    end_time=self.start + timedelta(hours=hour + 1), active_count=hour)
+        TimeSlot.objects.create(resource=self.room, start_time=self.start + timedelta(hours=1),
+                                end_time=self.start + timedelta(hours=2), active_count=4, is_available=False)
+
+    def test_matrix_cells_hold_remaining_capacity(self):
+        day = self.start.date()
+
+        result = self.service.get_matrix(None, day, day)
+
+        self.assertEqual([r.id for r in result['resources']], [self.rack.id, self.room.id])
+        self.assertEqual(len(result['slots']), 3)
+        self.assertEqual(result['matrix'], [[2, 1, 0], [None, 0, None]])
+
+    def test_matrix_loads_slots_in_one_query(self):
+        day = self.start.date()
+        self.service.get_matrix(None, day, day)  # warm the resource catalog cache
+
+        with self.assertNumQueries(1):
+            result = self.service.get_matrix([self.room.id], day, day + timedelta(days=6))
+
+        self.assertEqual(result['matrix'], [[0]])
+
+    def test_unknown_resource_is_rejected(self):
+        with self.assertRaisesRegex(ValueError, 'не съществува'):
+            self.service.get_matrix([self.room.id + 100], self.start.date(), self.start.date())
+
+
+class TestNextAvailable(TestCase):
+
+    def setUp(self):
+        self.service = AvailabilityService(TimeSlotRepository(), ResourceRepository())
+        self.rack = Resource.objects.create(name='Rack', type='EQUIPMENT', max_bookings=1, color_code='#FF5733')
+        self.room = Resource.objects.create(name='Room', type='ROOM', max_bookings=10, color_code='#FF5733')
+        self.now = timezone.now()
+        base = self.now + timedelta(hours=2)
+        # Rack: full, then a 30 minute slot, then a free hour; Room: one hour later than the rack
+        self.full = TimeSlot.objects.create(resource=self.rack, start_time=base, end_time=base + timedelta(hours=1),
+                                            active_count=1)
+        self.short = TimeSlot.objects.create(resource=self.rack, start_time=base + timedelta(hours=1),
+                                             end_time=base + timedelta(hours=1, minutes=30))
+        self.free = TimeSlot.objects.create(resource=self.rack, start_time=base + timedelta(hours=2),
+                                            end_time=base + timedelta(hours=3))
+        self.room_slot = TimeSlot.objects.create(resource=self.room, start_time=base + timedelta(hours=3),
+                                                 end_time=base + timedelta(hours=4))
+
+    def _ids(self, found):
+        return [slot.id for slot, resource in found]
+
+    def test_skips_full_slots_and_honours_limit(self):
+        found = self.service.find_next_available(self.now, self.now + timedelta(days=3), limit=2)
+
+        self.assertEqual(self._ids(found), [self.short.id, self.free.id])
+
+    def test_min_duration_and_type_filter(self):
+        window = (self.now, self.now + timedelta(days=3))
+
+        self.assertEqual(self._ids(self.service.find_next_available(*window, min_duration_minutes=60)),
+                         [self.free.id, self.room_slot.id])
+        self.assertEqual(self._ids(self.service.find_next_available(*window, type_filter='ROOM')), [self.room_slot.id])
+
+    def test_window_is_bounded(self):
+        with self.assertRaises(ValueError):
+            self.service.find_next_available(self.now, self.now + timedelta(days=365))
+
+
+class TestCachedExport(TestCase):
+
+    def setUp(self):
+        self.reservation_repo = ReservationRepository()
+        self.exporter = ICalendarExportService(self.reservation_repo, UserRepository())
+        self.cached = CachedScheduleExport(self.exporter, self.reservation_repo, ResourceRepository())
+        self.user = User.objects.create(email='member@example.com', username='member')
+        self.resource = Resource.objects.create(name='Pool', type='ROOM', max_bookings=5, color_code='#FF5733')
+        start = timezone.now() + timedelta(days=1)
+        self.slots = [
+            TimeSlot.objects.create(resource=self.resource, start_time=start + timedelta(hours=2 * i),
+                                    end_time=start + timedelta(hours=2 * i + 1))
+            for i in range(2)
+        ]
+        Reservation.objects.create(user=self.user, resource=self.resource, time_slot=self.slots[0], status='ACTIVE')
+        day = datetime.combine(timezone.localtime(start).date(), datetime.min.time())
+        self.range = (day, day + timedelta(days=1))
+
+    def test_unchanged_reservations_are_served_from_the_cache(self):
+        first = self.cached.export(self.user.id, *self.range)
+
+        def regenerated(*args):
+            raise AssertionError('regenerated')
+            yield
+
+        self.exporter._generate_ics = regenerated
+
+        with CaptureQueriesContext(connection) as ctx:
+            second = self.cached.export(self.user.id, *self.range)
+
+        self.assertEqual(first, second)
+        # The exporter's user check and the fingerprint; the reservations are not read
+        self.assertEqual(len(ctx.captured_queries), 2)
+
+    def test_cache_hit_still_checks_admin_rights(self):
+        admin = User.objects.create(email='admin@example.com', username='admin', role='ADMIN')
+        printer = WeeklySchedulePrintService(self.reservation_repo, ResourceRepository(), TimeSlotRepository(), UserRepository())
+        cached = CachedScheduleExport(printer, self.reservation_repo, ResourceRepository())
+        b''.join(cached.stream(admin.id, *self.range, all_members=True))
+        User.objects.filter(id=admin.id).update(role='MEMBER')
+
+        with self.assertRaises(ValueError):
+            cached.stream(admin.id, *self.range, all_members=True)
+
+    def test_precomputed_fingerprint_is_reused(self):
+        fingerprint = self.reservation_repo.fingerprint(self.user.id, *self.range)
+        first = self.cached.export(self.user.id, *self.range)
+        self.reservation_repo.fingerprint = Mock(side_effect=AssertionError('fingerprint recomputed'))
+
+        second = b''.join(self.cached.stream(self.user.id, *self.range, fingerprint=fingerprint))
+
+        self.assertEqual(first, second)
+
+    def test_booking_invalidates_the_entry(self):
+        first = self.cached.export(self.user.id, *self.range)
+        Reservation.objects.create(user=self.user, resource=self.resource, time_slot=self.slots[1], status='ACTIVE')
+
+        second = self.cached.export(self.user.id, *self.range)
+
+        self.assertEqual(first.count(b'BEGIN:VEVENT'), 1)
+        self.assertEqual(second.count(b'BEGIN:VEVENT'), 2)
+
+
+class TestUtilization(TestCase):
+
+    def setUp(self):
+        pytest.importorskip('numpy')
+        self.service = UtilizationService(TimeSlotRepository(), ResourceRepository())
+        self.rack = Resource.objects.create(name='Rack', type='EQUIPMENT', max_bookings=4, color_code='#FF5733')
+        self.room = Resource.objects.create(name='Room', type='ROOM', max_bookings=10, color_code='#FF5733')
+        tz = timezone.get_current_timezone()
+        # Mondays 18:00 local time in winter (UTC+2) and summer (UTC+3)
+        for day, booked in ((datetime(2025, 3, 24, 18), 4), (datetime(2025, 3, 31, 18), 2)):
+            start = timezone.make_aware(day, tz)
+            TimeSlot.objects.create(resource=self.rack, start_time=start, end_time=start + timedelta(hours=1),
+                                    active_count=booked, is_available=booked < 4)
+        start = timezone.make_aware(datetime(2025, 3, 26, 9), tz)
+        TimeSlot.objects.create(resource=self.room, start_time=start, end_time=start + timedelta(hours=1), active_count=5)
+        # Closed for maintenance with room left: offered nothing
+        TimeSlot.objects.create(resource=self.room, start_time=start + timedelta(hours=1),
+                                end_time=start + timedelta(hours=2), active_count=0, is_available=False)
+
+    def test_occupancy_by_local_hour_of_week(self):
+        result = self.service.get_utilization(datetime(2025, 3, 24).date(), datetime(2025, 4, 6).date())
+
+        self.assertEqual([r.id for r in result['resources']], [self.rack.id, self.room.id])
+        self.assertEqual(result['slots'], [2, 1])
+        self.assertEqual(result['capacity'], [8, 10])
+        self.assertEqual(result['occupancy'], [0.75, 0.5])
+        self.assertEqual(result['heatmap'][0][0][18], 0.75)
+        self.assertEqual(sum(v is not None for day in result['heatmap'][0] for v in day), 1)
+        self.assertEqual(result['peak_hours'][1], [{'weekday': 2, 'hour': 9, 'occupancy': 0.5}])
+
+    def test_unknown_resource_is_rejected(self):
+        with self.assertRaises(ValueError):
+            self.service.get_utilization(datetime(2025, 3, 24).date(), datetime(2025, 3, 30).date(), [self.room.id + 100])
+
+    def test_backends_without_epoch_sql_fall_back_to_python(self):
+        days = (datetime(2025, 3, 24).date(), datetime(2025, 4, 6).date())
+        expected = self.service.get_utilization(*days)
+
+        with patch.object(EpochSeconds, 'vendors', ()):
+            self.assertEqual(self.service.get_utilization(*days), expected)
+
+
+class TestDailyStats(TestCase):
+
+    def setUp(self):
+        self.stats_repo = DailyStatsRepository()
+        self.service = ReservationService(ReservationRepository(), UserRepository(), ResourceRepository(),
+                                          TimeSlotRepository(), stats_repo=self.stats_repo)
+        self.members = [User.objects.create(email=f'm{i}@example.com', username=f'm{i}') for i in range(3)]
+        self.admin = User.objects.create(email='admin@example.com', username='admin', role='ADMIN')
+        self.resource = Resource.objects.create(name='Rack', type='EQUIPMENT', max_bookings=2, color_code='#FF5733')
+        # Local 23:00 and 08:00 the next day: the rollup must split them by the Europe/Sofia day
+        day = timezone.localdate() + timedelta(days=2)
+        late = timezone.make_aware(datetime.combine(day, datetime.min.time()) + timedelta(hours=23))
+        self.late = TimeSlot.objects.create(resource=self.resource, start_time=late, end_time=late + timedelta(hours=1))
+        self.early = TimeSlot.objects.create(resource=self.resource, start_time=late + timedelta(hours=9),
+                                             end_time=late + timedelta(hours=10))
+        self.days = (day, day + timedelta(days=1))
+
+    def _rows(self):
+        return [
+            (s.date, s.slots_offered, s.bookings, s.cancellations, s.peak_occupancy)
+            for s in self.stats_repo.list_range(*self.days)
+        ]
+
+    def test_bookings_and_cancellations_update_the_day_rows(self):
+        first = self.service.create_reservation(self.members[0].id, self.resource.id, self.late.id)
+        self.service.create_reservation(self.members[1].id, self.resource.id, self.late.id)
+        self.service.create_reservations_batch(self.members[2].id, self.resource.id, [self.early.id])
+        self.service.cancel_reservation(first.id, self.members[0].id)
+
+        # The full late slot re-opened on cancel and counts as offered throughout
+        self.assertEqual(self._rows(), [(self.days[0], 1, 2, 1, 1), (self.days[1], 1, 1, 0, 1)])
+        self.assertEqual(self.stats_repo.list_range(*self.days)[0].active_bookings, 1)
+
+    def test_rebuild_matches_incremental_rollup(self):
+        self.service.create_reservation(self.members[0].id, self.resource.id, self.late.id)
+        self.service.create_reservation(self.members[1].id, self.resource.id, self.late.id)
+        self.service.cancel_reservations_in_range(self.members[1].id, *self.days)
+        incremental = self._rows()
+
+        DailyResourceStats.objects.all().delete()
+        self.assertEqual(self.stats_repo.rebuild(*self.days), 2)
+
+        # Booking activity only touches its own days; the rebuild also fills in idle days with slots
+        self.assertEqual(self._rows(), incremental + [(self.days[1], 1, 0, 0, 0)])
+
+    def test_rebuild_overwrites_rows_in_place(self):
+        self.service.create_reservation(self.members[0].id, self.resource.id, self.late.id)
+        row_id = DailyResourceStats.objects.get(date=self.days[0]).id
+        DailyResourceStats.objects.filter(id=row_id).update(bookings=7, peak_occupancy=2)
+        # A day without slots or reservations has nothing to count: its row goes away
+        DailyResourceStats.objects.create(resource=self.resource, date=self.days[0] - timedelta(days=1), bookings=3)
+
+        self.stats_repo.rebuild(self.days[0] - timedelta(days=1), self.days[1])
+
+        self.assertEqual(DailyResourceStats.objects.get(date=self.days[0]).id, row_id)
+        self.assertEqual(self._rows(), [(self.days[0], 1, 1, 0, 1), (self.days[1], 1, 0, 0, 0)])
+        self.assertFalse(DailyResourceStats.objects.filter(date=self.days[0] - timedelta(days=1)).exists())
+
+    def test_close_resource_recounts_offered_slots(self):
+        self.service.create_reservation(self.members[0].id, self.resource.id, self.early.id)
+
+        self.service.close_resource(self.admin.id, self.resource.id, *self.days)
+
+        self.assertEqual(self._rows(), [(self.days[0], 0, 0, 0, 0), (self.days[1], 0, 1, 1, 0)])
+
+    def test_cancel_on_a_day_never_rolled_up_is_recounted(self):
+        reservation = Reservation.objects.create(user=self.members[0], resource=self.resource, time_slot=self.late)
+        TimeSlot.objects.filter(id=self.late.id).update(active_count=1)
+
+        self.service.cancel_reservation(reservation.id, self.members[0].id)
+
+        self.assertEqual(self._rows(), [(self.days[0], 1, 1, 1, 0)])
+        self.assertEqual(self.stats_repo.list_range(*self.days)[0].active_bookings, 0)
+
+    def test_generated_slots_get_day_rows(self):
+        service = ResourceService(ResourceRepository(), TimeSlotRepository(), self.stats_repo)
+        start = datetime.combine(self.days[1] + timedelta(days=1), datetime.min.time())
+
+        service.generate_timeslots(self.resource.id, start, start + timedelta(days=1))
+
+        rows = self.stats_repo.list_range(start.date(), start.date() + timedelta(days=1))
+        self.assertEqual([(r.slots_offered, r.bookings) for r in rows], [(14, 0), (14, 0)])
+
+    def test_rebuild_command_processes_chunks(self):
+        self.service.create_reservation(self.members[0].id, self.resource.id, self.early.id)
+        DailyResourceStats.objects.all().delete()
+        out = io.StringIO()
+
+        call_command('rebuild_daily_stats', '--chunk-days', '1', stdout=out)
+
+        self.assertEqual(self._rows(), [(self.days[0], 1, 0, 0, 0), (self.days[1], 1, 1, 0, 1)])
+        self.assertIn(f'{self.days[1]}..{self.days[1]}: 1 row(s)', out.getvalue())
+
+
+class TestConcurrentBooking(TransactionTestCase):
+
+    def test_parallel_bookings_never_overbook(self):
+        service = _repository_backed_reservation_service()
+        resource = Resource.objects.create(name='Squat Rack', type='EQUIPMENT', max_bookings=5, color_code='#FF5733')
+        start_time = timezone.now() + timedelta(hours=3)
+        timeslot = TimeSlot.objects.create(resource=resource, start_time=start_time,
+                                           end_time=start_time + timedelta(hours=1))
+        users = [User.objects.create(email=f'member{i}@example.com', username=f'member{i}') for i in range(20)]
+
+        results = _run_concurrently(
+            lambda user_id: service.create_reservation(user_id, resource.id, timeslot.id), [u.id for u in users]
+        )
+
+        timeslot.refresh_from_db()
+        self.assertEqual(results.count('booked'), 5)
+        self.assertEqual(results.count('rejected'), 15)
+        self.assertEqual(Reservation.objects.filter(time_slot=timeslot, status='ACTIVE').count(), 5)
+        self.assertEqual(timeslot.active_count, 5)
+        self.assertFalse(timeslot.is_available)
+
+    def test_parallel_overlapping_bookings_of_one_user(self):
+        service = _repository_backed_reservation_service()
+        user = User.objects.create(email='member@example.com', username='member')
+        start_time = timezone.now() + timedelta(hours=3)
+        # Different resources, so every request updates a different slot row
+        slots = [
+            TimeSlot.objects.create(
+                resource=Resource.objects.create(name=f'Rack {i}', type='EQUIPMENT', max_bookings=5, color_code='#FF5733'),
+                start_time=start_time + timedelta(minutes=10 * i),
+                end_time=start_time + timedelta(minutes=10 * i + 60)
+            )
+            for i in range(4)
+        ]
+
+        results = _run_concurrently(lambda slot: service.create_reservation(user.id, slot.resource_id, slot.id), slots)
+
+        self.assertEqual(sorted(results), ['booked'] + ['rejected'] * 3)
+        self.assertEqual(Reservation.objects.filter(user=user, status='ACTIVE').count(), 1)
+        self.assertEqual(sum(TimeSlot.objects.filter(id__in=[s.id for s in slots]).values_list('active_count', flat=True)), 1)
@@ -53,6 +53,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'core.presentation.middleware.IdentityMapMiddleware',
 ]
 
 CORS_ALLOW_ALL_ORIGINS = True
@@ -77,6 +78,15 @@ TEMPLATES = [
 WSGI_APPLICATION = 'gymdesk.wsgi.application'
 
 
+# Cache (resource catalog). Local memory is per process; use a shared backend in production, e.g.
+# {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': 'redis://127.0.0.1:6379'}
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+
 # Database
 # https://docs.djangoproject.com/en/6.0/ref/settings/#databases
 
@@ -124,6 +134,9 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 
+# Files written by the server, e.g. archives of the run_export_jobs worker (served through the API, not MEDIA_URL)
+MEDIA_ROOT = BASE_DIR / 'media'
+
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
         'rest_framework_simplejwt.authentication.JWTAuthentication',
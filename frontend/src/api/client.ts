@@ -28,6 +28,8 @@ export interface TimeSlot {
   end_time: string;
   is_available: boolean;
   duration_minutes: number;
+  active_count?: number;
+  available_spots?: number;
 }
 
 export interface Reservation {
@@ -40,6 +42,14 @@ export interface Reservation {
   created_at: string | null;
 }
 
+export interface ReservationSummary {
+  success: boolean;
+  total: number;
+  active: number;
+  cancelled: number;
+  this_month: number;
+}
+
 interface ApiResponse<T> {
   success: boolean;
   error?: string;
@@ -235,8 +245,11 @@ export const reservationsApi = {
     return res;
   },
 
-  list: async (status?: string): Promise<{ success: boolean; reservations: Reservation[] }> => {
-    const params = status ? `?status=${status}` : '';
+  list: async (status?: string, cursor?: string): Promise<{ success: boolean; reservations: Reservation[]; next_cursor?: string | null }> => {
+    const query = new URLSearchParams();
+    if (status) query.set('status', status);
+    if (cursor) query.set('cursor', cursor);
+    const params = query.toString() ? `?${query.toString()}` : '';
     const res = await apiRequest(`/reservations/${params}`);
     if (res.reservations && Array.isArray(res.reservations)) {
       res.reservations = res.reservations.map((r: any) => ({
@@ -247,6 +260,11 @@ export const reservationsApi = {
     return res;
   },
 
+  // Counts over every reservation the list endpoint pages through (all of them for admins)
+  summary: async (): Promise<ReservationSummary> => {
+    return apiRequest('/reservations/summary/');
+  },
+
   cancel: async (reservationId: number): Promise<{ success: boolean; reservation: Reservation }> => {
     const res = await apiRequest(`/reservations/${reservationId}/cancel/`, {
       method: 'POST',
@@ -299,15 +317,31 @@ export const timeslotsApi = {
   list: async (params: {
     resource_id?: number;
     date?: string;
-  }): Promise<{ success: boolean; timeslots: TimeSlot[] }> => {
+    cursor?: string;
+  }): Promise<{ success: boolean; timeslots: TimeSlot[]; next_cursor?: string | null }> => {
     const queryParams = new URLSearchParams();
     if (params.resource_id) queryParams.set('resource_id', params.resource_id.toString());
     if (params.date) queryParams.set('date', params.date);
+    if (params.cursor) queryParams.set('cursor', params.cursor);
 
     const queryString = queryParams.toString();
     return apiRequest(`/timeslots/${queryString ? `?${queryString}` : ''}`);
   },
 
+  // Remaining capacity per resource (rows) x slot start (columns); null = no slot at that time
+  availability: async (params: {
+    start_date: string;
+    end_date: string;
+    resource_ids?: number[];
+    type?: string;
+  }): Promise<{ success: boolean; resources: Resource[]; slots: string[]; matrix: (number | null)[][] }> => {
+    const queryParams = new URLSearchParams({ start_date: params.start_date, end_date: params.end_date });
+    if (params.resource_ids?.length) queryParams.set('resource_ids', params.resource_ids.join(','));
+    if (params.type) queryParams.set('type', params.type);
+
+    return apiRequest(`/availability/?${queryParams.toString()}`);
+  },
+
   generate: async (data: {
     resource_id: number;
     start_date: string;
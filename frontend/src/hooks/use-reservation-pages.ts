@@ -0,0 +1,28 @@
+import { useInfiniteQuery } from "@tanstack/react-query";
+import { reservationsApi, type Reservation } from "@/api/client";
+
+/**
+ * Cursor-paginated reservations for one status (server value, e.g. "ACTIVE").
+ * The list endpoint returns at most one page per request, so callers show a
+ * "load more" control while hasNextPage is true instead of truncating silently.
+ */
+export const useReservationPages = (status: "ACTIVE" | "CANCELLED", enabled = true) => {
+  const query = useInfiniteQuery({
+    queryKey: ["reservations", "pages", status],
+    queryFn: ({ pageParam }) => reservationsApi.list(status, pageParam ?? undefined),
+    initialPageParam: null as string | null,
+    getNextPageParam: (lastPage) => lastPage.next_cursor ?? null,
+    enabled,
+    retry: false,
+  });
+
+  const reservations: Reservation[] = query.data?.pages.flatMap((page) => page.reservations ?? []) ?? [];
+
+  return {
+    reservations,
+    isLoading: query.isLoading,
+    hasNextPage: query.hasNextPage,
+    isFetchingNextPage: query.isFetchingNextPage,
+    fetchNextPage: query.fetchNextPage,
+  };
+};
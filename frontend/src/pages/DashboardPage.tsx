@@ -12,13 +12,20 @@ import { useAuth } from "@/contexts/AuthContext";
 export default function DashboardPage() {
   const auth = useAuth();
 
-  // Fetch user reservations (server returns reservations for authenticated user)
+  // Newest reservations for the "recent" list: the first page is all this view shows
   const { data: reservationsData, isLoading: reservationsLoading } = useQuery({
-    queryKey: ["reservations"],
+    queryKey: ["reservations", "recent"],
     queryFn: () => reservationsApi.list(),
     retry: false,
   });
 
+  // Counts come from the server, since the list above is only one page
+  const { data: summaryData, isLoading: summaryLoading } = useQuery({
+    queryKey: ["reservations", "summary"],
+    queryFn: () => reservationsApi.summary(),
+    retry: false,
+  });
+
   // Fetch resources
   // Fetch resources scoped to authenticated user
   const { data: resourcesData, isLoading: resourcesLoading } = useQuery({
@@ -29,19 +36,18 @@ export default function DashboardPage() {
 
   const reservations = reservationsData?.reservations || [];
   const resources = resourcesData?.resources || [];
-  const activeReservations = reservations.filter((r) => r.status === "Active");
 
   const stats = [
     {
       label: "Активни резервации",
-      value: activeReservations.length,
+      value: summaryData?.active ?? 0,
       icon: Calendar,
       color: "text-primary",
       bg: "bg-primary/10",
     },
     {
       label: "Общо резервации",
-      value: reservations.length,
+      value: summaryData?.total ?? 0,
       icon: ClipboardList,
       color: "text-accent-foreground",
       bg: "bg-accent",
@@ -55,12 +61,7 @@ export default function DashboardPage() {
     },
     {
       label: "Този месец",
-      value: reservations.filter((r) => {
-        if (!r.created_at) return false;
-        const date = new Date(r.created_at);
-        const now = new Date();
-        return date.getMonth() === now.getMonth() && date.getFullYear() === now.getFullYear();
-      }).length,
+      value: summaryData?.this_month ?? 0,
       icon: TrendingUp,
       color: "text-chart-5",
       bg: "bg-chart-5/10",
@@ -106,7 +107,7 @@ export default function DashboardPage() {
                     <Icon className={`h-6 w-6 ${stat.color}`} />
                   </div>
                   <div>
-                    {reservationsLoading || resourcesLoading ? (
+                    {summaryLoading || resourcesLoading ? (
                       <Skeleton className="h-8 w-12 mb-1" />
                     ) : (
                       <div className="text-2xl font-bold text-card-foreground">{stat.value}</div>
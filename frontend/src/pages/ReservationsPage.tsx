@@ -18,6 +18,7 @@ import { TimeSlotPicker } from "@/components/TimeSlotPicker";
 import { ExportControls } from "@/components/ExportControls";
 import { reservationsApi, resourcesApi, timeslotsApi, type Resource, type TimeSlot } from "@/api/client";
 import { useAuth } from "@/contexts/AuthContext";
+import { useReservationPages } from "@/hooks/use-reservation-pages";
 import { cn } from "@/lib/utils";
 
 // No demo user - this route is protected by AuthProvider/RequireAuth
@@ -34,10 +35,14 @@ export default function ReservationsPage() {
 
   const auth = useAuth();
 
-  // Fetch reservations
-  const { data: reservationsData, isLoading: reservationsLoading } = useQuery({
-    queryKey: ["reservations"],
-    queryFn: () => reservationsApi.list(),
+  // Fetch reservations page by page; the cancelled list loads once its tab is opened
+  const activePages = useReservationPages("ACTIVE");
+  const cancelledPages = useReservationPages("CANCELLED", activeTab === "cancelled");
+
+  // Tab counts cover every reservation, not only the pages loaded so far
+  const { data: summaryData } = useQuery({
+    queryKey: ["reservations", "summary"],
+    queryFn: () => reservationsApi.summary(),
     retry: false,
   });
 
@@ -106,12 +111,12 @@ export default function ReservationsPage() {
     },
   });
 
-  const reservations = reservationsData?.reservations || [];
   const resources = resourcesData?.resources || [];
   const timeSlots = timeslotsData?.timeslots || [];
 
-  const activeReservations = reservations.filter((r) => r.status === "Active");
-  const cancelledReservations = reservations.filter((r) => r.status === "Cancelled");
+  const activeReservations = activePages.reservations;
+  const cancelledReservations = cancelledPages.reservations;
+  const reservationsLoading = activePages.isLoading;
 
   const resetForm = () => {
     setSelectedResource(null);
@@ -341,11 +346,11 @@ export default function ReservationsPage() {
         <TabsList>
           <TabsTrigger value="active" className="gap-2">
             <Calendar className="h-4 w-4" />
-            Активни ({activeReservations.length})
+            Активни ({summaryData?.active ?? activeReservations.length})
           </TabsTrigger>
           <TabsTrigger value="cancelled" className="gap-2">
             <Filter className="h-4 w-4" />
-            Отменени ({cancelledReservations.length})
+            Отменени ({summaryData?.cancelled ?? cancelledReservations.length})
           </TabsTrigger>
         </TabsList>
 
@@ -384,10 +389,17 @@ export default function ReservationsPage() {
               })}
             </div>
           )}
+          <LoadMoreButton pages={activePages} />
         </TabsContent>
 
         <TabsContent value="cancelled" className="mt-6">
-          {cancelledReservations.length === 0 ? (
+          {cancelledPages.isLoading ? (
+            <div className="grid gap-4 md:grid-cols-2 lg:grid-cols-3">
+              {Array.from({ length: 6 }).map((_, i) => (
+                <div key={i} className="h-48 rounded-lg bg-muted animate-pulse" />
+              ))}
+            </div>
+          ) : cancelledReservations.length === 0 ? (
             <Card className="p-12 text-center">
               <Filter className="h-16 w-16 mx-auto text-muted-foreground/30 mb-4" />
               <h3 className="text-lg font-medium mb-2">Няма отменени резервации</h3>
@@ -409,8 +421,26 @@ export default function ReservationsPage() {
               })}
             </div>
           )}
+          <LoadMoreButton pages={cancelledPages} />
         </TabsContent>
       </Tabs>
     </div>
   );
 }
+
+function LoadMoreButton({ pages }: { pages: ReturnType<typeof useReservationPages> }) {
+  if (!pages.hasNextPage) return null;
+  return (
+    <div className="flex justify-center mt-6">
+      <Button
+        variant="outline"
+        onClick={() => pages.fetchNextPage()}
+        disabled={pages.isFetchingNextPage}
+        className="gap-2"
+      >
+        {pages.isFetchingNextPage && <Loader2 className="h-4 w-4 animate-spin" />}
+        Зареди още
+      </Button>
+    </div>
+  );
+}